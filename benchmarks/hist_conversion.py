@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+
+""" Benchmark for converting a nested dict of hists to ``Histogram1D`` objects.
+
+Compares walking the nested dict and converting each hist individually against ``convert_histograms(...)``.
+The hists are lightweight stand ins implementing the UHI
+``PlottableHistogram`` protocol (so ROOT isn't required). Run with:
+
+.. code-block:: bash
+
+    $ python benchmarks/hist_conversion.py --n-hists 1000 --n-bins 10000
+
+.. codeauthor:: Raymond Ehlers <raymond.ehlers@cern.ch>, Yale University
+"""
+
+import argparse
+import numpy as np
+import timeit
+from typing import Any, Dict, Optional
+
+from pachyderm import histogram
+
+class _Axis:
+    """ Minimal stand in for a UHI axis, which provides the bin edges. """
+    def __init__(self, edges: np.ndarray):
+        self.edges = edges
+
+    def __len__(self) -> int:
+        return len(self.edges) - 1
+
+class _Hist:
+    """ Minimal stand in for a histogram implementing the UHI protocol. """
+    def __init__(self, n_bins: int):
+        self.axes = [_Axis(np.linspace(0, 1, n_bins + 1))]
+        self._values = np.random.random(n_bins)
+        self._variances = self._values.copy()
+
+    def values(self) -> np.ndarray:
+        return self._values
+
+    def variances(self) -> Optional[np.ndarray]:
+        return self._variances
+
+def _convert_individually(hists: Dict[str, Any]) -> Dict[str, Any]:
+    """ Convert the hists one by one while walking the nested dict (ie. the approach without bulk conversion). """
+    output: Dict[str, Any] = {}
+    for key, value in hists.items():
+        if isinstance(value, dict):
+            output[key] = _convert_individually(value)
+        else:
+            output[key] = histogram.Histogram1D.from_existing_hist(value, copy = True)
+    return output
+
+def run(n_hists: int, n_bins: int, repeat: int = 3) -> Dict[str, float]:
+    """ Run the benchmark.
+
+    Args:
+        n_hists: Number of hists to convert. They are split evenly into ten nested dicts.
+        n_bins: Number of bins in each hist.
+        repeat: Number of times to repeat the measurement. The minimum is reported.
+    Returns:
+        Time to convert all of the hists for each approach, in seconds.
+    """
+    hists = {
+        f"list_{i}": {f"hist_{j}": _Hist(n_bins) for j in range(n_hists // 10)}
+        for i in range(10)
+    }
+
+    def measure(func: Any) -> float:
+        return min(timeit.repeat(func, number = 1, repeat = repeat))
+
+    return {
+        "individually": measure(lambda: _convert_individually(hists)),
+        "bulk": measure(lambda: histogram.convert_histograms(hists, copy = True)),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Histogram conversion benchmark.")
+    parser.add_argument("--n-hists", type = int, default = 1000, help = "Number of hists to convert.")
+    parser.add_argument("--n-bins", type = int, default = 10000, help = "Number of bins per hist.")
+    args = parser.parse_args()
+
+    results = run(n_hists = args.n_hists, n_bins = args.n_bins)
+    for name, value in results.items():
+        print(f"{name}: {value * 1e3:.1f} ms")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+
+""" Memory benchmark for keeping many small histograms in memory.
+
+Compares the memory used per histogram for ``Histogram1D`` and ``CompactHistogram1D`` (with and
+without reduced precision storage). Run with:
+
+.. code-block:: bash
+
+    $ python benchmarks/histogram_memory.py --n-hists 100000 --n-bins 10
+
+.. codeauthor:: Raymond Ehlers <raymond.ehlers@cern.ch>, Yale University
+"""
+
+import argparse
+import gc
+import numpy as np
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from pachyderm import histogram
+
+def _measure(create: Callable[[np.ndarray, np.ndarray, np.ndarray], Any],
+             n_hists: int, bin_edges: np.ndarray) -> float:
+    """ Measure the memory used per histogram.
+
+    Args:
+        create: Function to create a histogram from the bin edges, values, and errors squared.
+        n_hists: Number of histograms to create.
+        bin_edges: Bin edges of the histograms. Each histogram receives its own copy, as would be the
+            case when they are created independently (ie. converted from a file).
+    Returns:
+        Memory allocated per histogram in bytes.
+    """
+    n_bins = len(bin_edges) - 1
+    gc.collect()
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    hists: List[Any] = [
+        create(bin_edges.copy(), np.ones(n_bins), np.ones(n_bins)) for _ in range(n_hists)
+    ]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Keep the hists alive until after the measurement.
+    del hists
+    return (current - start) / n_hists
+
+def run(n_hists: int, n_bins: int) -> Dict[str, float]:
+    """ Run the benchmark.
+
+    Args:
+        n_hists: Number of histograms to create.
+        n_bins: Number of bins in each histogram.
+    Returns:
+        Memory per histogram in bytes, keyed by the histogram type.
+    """
+    bin_edges = np.linspace(0, 1, n_bins + 1)
+    return {
+        "Histogram1D": _measure(
+            lambda e, y, e2: histogram.Histogram1D(bin_edges = e, y = y, errors_squared = e2), n_hists, bin_edges
+        ),
+        "CompactHistogram1D": _measure(
+            lambda e, y, e2: histogram.CompactHistogram1D(bin_edges = e, y = y, errors_squared = e2),
+            n_hists, bin_edges,
+        ),
+        "CompactHistogram1D (float32)": _measure(
+            lambda e, y, e2: histogram.CompactHistogram1D(bin_edges = e, y = y, errors_squared = e2, dtype = np.float32),
+            n_hists, bin_edges,
+        ),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Histogram memory benchmark.")
+    parser.add_argument("--n-hists", type = int, default = 100000, help = "Number of histograms.")
+    parser.add_argument("--n-bins", type = int, default = 10, help = "Number of bins per histogram.")
+    args = parser.parse_args()
+
+    results = run(n_hists = args.n_hists, n_bins = args.n_bins)
+    baseline = results["Histogram1D"]
+    for name, memory in results.items():
+        print(f"{name:>30}: {memory:8.1f} bytes/hist ({memory / baseline:.2f}x)")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+""" Benchmark for the per projection overhead of ``HistProjector``.
+
+The histograms are lightweight stand ins for ``TH2`` hists (so ROOT isn't required), such that the
+measured time is dominated by the projector argument handling. The projection arguments carry an
+analysis object with a large histogram attached, which previously was deep copied for each projection.
+Run with:
+
+.. code-block:: bash
+
+    $ python benchmarks/projector_overhead.py --n-observables 100 --payload-size 1000000
+
+.. codeauthor:: Raymond Ehlers <raymond.ehlers@cern.ch>, Yale University
+"""
+
+import argparse
+import copy
+import numpy as np
+import timeit
+from typing import Dict
+
+from pachyderm import histogram
+from pachyderm import projectors
+
+from stand_ins import Axis, Hist
+
+def run(n_observables: int, payload_size: int, repeat: int = 5) -> Dict[str, float]:
+    """ Run the benchmark.
+
+    Args:
+        n_observables: Number of observables to project in each ``project()`` call.
+        payload_size: Number of bins in the histogram attached to the analysis object in the arguments.
+        repeat: Number of times to repeat the measurement. The minimum is reported.
+    Returns:
+        Time per projection, time per deep copy of the arguments (for reference), and the time to determine
+        the bin range of an axis with and without the cached range, in seconds.
+    """
+    analysis = {
+        "name": "analysis",
+        "hist": histogram.Histogram1D(
+            bin_edges = np.linspace(0, 1, payload_size + 1), y = np.ones(payload_size),
+            errors_squared = np.ones(payload_size),
+        ),
+    }
+    projector = projectors.HistProjector(
+        observable_to_project_from = {f"hist_{i}": Hist(f"hist_{i}") for i in range(n_observables)},
+        output_observable = {},
+        projection_name_format = "{input_key}_{label}",
+        projection_information = {"label": "proj", "analysis": analysis},
+    )
+    projector.projection_axes.append(projectors.HistAxisRange(
+        axis_type = projectors.TH1AxisType.x_axis, axis_range_name = "x",
+        min_val = projectors.HistAxisRange.apply_func_to_find_bin(None, 1),
+        max_val = projectors.HistAxisRange.apply_func_to_find_bin(None, 5),
+    ))
+
+    kwargs = {"analysis_object": analysis}
+    projection_time = min(timeit.repeat(lambda: projector.project(**kwargs), number = 1, repeat = repeat))
+    deepcopy_time = min(timeit.repeat(lambda: copy.deepcopy(kwargs), number = 1, repeat = repeat))
+
+    # Determining the bin range of an axis, both via the cache and by evaluating the range functions directly.
+    axis_range = projectors.HistAxisRange(
+        axis_type = projectors.TH1AxisType.y_axis, axis_range_name = "y",
+        min_val = projectors.HistAxisRange.apply_func_to_find_bin(Axis.FindBin, 2.5),
+        max_val = projectors.HistAxisRange.apply_func_to_find_bin(Axis.FindBin, 7.5),
+    )
+    axis = Axis(1000)
+    n_calls = 10000
+    cached_time = min(timeit.repeat(lambda: axis_range.resolve_bin_range(axis), number = n_calls, repeat = repeat))
+    uncached_time = min(timeit.repeat(
+        lambda: (axis_range.min_val(axis), axis_range.max_val(axis)), number = n_calls, repeat = repeat
+    ))
+    return {
+        "per_projection": projection_time / n_observables,
+        "deepcopy_of_kwargs": deepcopy_time,
+        "bin_range_cached": cached_time / n_calls,
+        "bin_range_uncached": uncached_time / n_calls,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Projector overhead benchmark.")
+    parser.add_argument("--n-observables", type = int, default = 100, help = "Number of observables to project.")
+    parser.add_argument("--payload-size", type = int, default = 1000000, help = "Size of the attached histogram.")
+    args = parser.parse_args()
+
+    results = run(n_observables = args.n_observables, payload_size = args.payload_size)
+    print(f"Per projection overhead: {results['per_projection'] * 1e6:.1f} us")
+    print(f"Deep copy of the kwargs (for reference, previously performed multiple times per projection): "
+          f"{results['deepcopy_of_kwargs'] * 1e6:.1f} us")
+    print(f"Bin range of an axis: {results['bin_range_cached'] * 1e6:.2f} us cached, "
+          f"{results['bin_range_uncached'] * 1e6:.2f} us uncached")
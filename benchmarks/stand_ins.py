@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+
+""" Lightweight stand ins for ROOT objects, shared by the benchmarks.
+
+They implement just enough of the ``TAxis`` and ``TH2`` interfaces for the projectors, such that the
+overhead of pachyderm itself can be measured without ROOT.
+
+.. codeauthor:: Raymond Ehlers <raymond.ehlers@cern.ch>, Yale University
+"""
+
+import numpy as np
+from typing import Any
+
+class Axis:
+    """ Minimal stand in for a ``TAxis``. """
+    def __init__(self, n_bins: int):
+        self.n_bins = n_bins
+
+    def GetNbins(self) -> int:
+        return self.n_bins
+
+    def GetXmin(self) -> float:
+        return 0.0
+
+    def GetXmax(self) -> float:
+        return float(self.n_bins)
+
+    def IsVariableBinSize(self) -> bool:
+        return False
+
+    def SetRange(self, min_val: int, max_val: int) -> None:
+        pass
+
+    def FindBin(self, value: float) -> int:
+        return int(np.searchsorted(np.linspace(self.GetXmin(), self.GetXmax(), self.n_bins + 1), value, side = "right"))
+
+class Hist:
+    """ Minimal stand in for a ``TH2``. """
+    def __init__(self, name: str):
+        self.name = name
+        self.axes = [Axis(10), Axis(10), Axis(1)]
+
+    def GetName(self) -> str:
+        return self.name
+
+    def SetName(self, name: str) -> None:
+        self.name = name
+
+    def GetXaxis(self) -> Axis:
+        return self.axes[0]
+
+    def GetYaxis(self) -> Axis:
+        return self.axes[1]
+
+    def GetZaxis(self) -> Axis:
+        return self.axes[2]
+
+    def ProjectionX(self) -> "Hist":
+        return Hist(f"{self.name}_px")
+
+    def ProjectionY(self) -> "Hist":
+        return Hist(f"{self.name}_py")
+
+    def Add(self, other: "Hist") -> None:
+        pass
+
+    def SetDirectory(self, directory: Any) -> None:
+        pass
@@ -0,0 +1,348 @@
+#!/usr/bin/env python
+
+""" Benchmark suite covering the pachyderm hot paths.
+
+Each scenario is measured at several data sizes, recording the time (minimum over the repetitions) and
+the peak memory allocated during a single run (via ``tracemalloc``). The results can be stored as a JSON
+baseline, and later runs can be compared against it to identify regressions. Scenarios which require
+ROOT are skipped if it isn't available. Run with:
+
+.. code-block:: bash
+
+    $ python benchmarks/suite.py --save-baseline baseline.json
+    $ # After making changes...
+    $ python benchmarks/suite.py --baseline baseline.json --tolerance 0.2
+
+The baseline isn't stored in the repository because the times are only comparable on the same hardware
+(the peak memory is reproducible). Instead, record a baseline on your machine (for example, by checking out
+the commit before your changes and running with ``--save-baseline``) and then compare against it.
+
+.. codeauthor:: Raymond Ehlers <raymond.ehlers@cern.ch>, Yale University
+"""
+
+import argparse
+from dataclasses import dataclass
+import enum
+import gc
+import io
+import json
+import numpy as np
+import sys
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from pachyderm import generic_config
+from pachyderm import histogram
+from pachyderm import projectors
+from pachyderm import yaml
+
+from stand_ins import Hist
+
+# Results are stored as {scenario: {size: {metric: value}}}. The sizes are strings so that they can be
+# stored in JSON.
+Results = Dict[str, Dict[str, Dict[str, float]]]
+
+@dataclass
+class Scenario:
+    """ Benchmark scenario.
+
+    Attributes:
+        name: Name of the scenario.
+        setup: Function which takes the data size and returns the function to be measured. The setup
+            itself isn't measured.
+        sizes: Data sizes at which the scenario is measured.
+        requires_root: True if the scenario requires ROOT.
+    """
+    name: str
+    setup: Callable[[int], Callable[[], Any]]
+    sizes: Sequence[int]
+    requires_root: bool = False
+
+_scenarios: Dict[str, Scenario] = {}
+
+def scenario(name: str, sizes: Sequence[int], requires_root: bool = False) -> Callable[..., Any]:
+    """ Register a benchmark scenario.
+
+    Args:
+        name: Name of the scenario.
+        sizes: Data sizes at which the scenario is measured.
+        requires_root: True if the scenario requires ROOT. Default: False.
+    Returns:
+        Decorator which registers the setup function.
+    """
+    def wrap(setup: Callable[[int], Callable[[], Any]]) -> Callable[[int], Callable[[], Any]]:
+        _scenarios[name] = Scenario(name = name, setup = setup, sizes = sizes, requires_root = requires_root)
+        return setup
+    return wrap
+
+def _root_available() -> bool:
+    """ Check whether ROOT is available. """
+    try:
+        import ROOT  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+###########
+# Scenarios
+###########
+@scenario("histogram_arithmetic", sizes = [100, 10000, 1000000])
+def _histogram_arithmetic(n_bins: int) -> Callable[[], Any]:
+    """ Arithmetic and integrals of ``Histogram1D``, with the number of bins as the size. """
+    bin_edges = np.linspace(0, 1, n_bins + 1)
+    h1 = histogram.Histogram1D(bin_edges = bin_edges, y = np.random.random(n_bins), errors_squared = np.ones(n_bins))
+    h2 = histogram.Histogram1D(bin_edges = bin_edges, y = np.random.random(n_bins), errors_squared = np.ones(n_bins))
+
+    def run() -> Any:
+        result = (h1 + h2) * h2 / h1 - h2
+        return result.integral(min_value = 0.25, max_value = 0.75)
+    return run
+
+def _setup_projector(observables: Dict[str, Any]) -> projectors.HistProjector:
+    """ Setup a projector with an additional cut on the y axis, projecting to the x axis. """
+    projector = projectors.HistProjector(
+        observable_to_project_from = observables,
+        output_observable = {},
+        projection_name_format = "{input_key}_proj",
+    )
+    projector.additional_axis_cuts.append(projectors.HistAxisRange(
+        axis_type = projectors.TH1AxisType.y_axis, axis_range_name = "y",
+        min_val = projectors.HistAxisRange.apply_func_to_find_bin(None, 2),
+        max_val = projectors.HistAxisRange.apply_func_to_find_bin(None, 5),
+    ))
+    projector.projection_axes.append(projectors.HistAxisRange(
+        axis_type = projectors.TH1AxisType.x_axis, axis_range_name = "x",
+        min_val = projectors.HistAxisRange.apply_func_to_find_bin(None, 1),
+        max_val = projectors.HistAxisRange.apply_func_to_find_bin(None, 10),
+    ))
+    return projector
+
+@scenario("hist_projector_overhead", sizes = [10, 100, 1000])
+def _hist_projector_overhead(n_observables: int) -> Callable[[], Any]:
+    """ ``HistProjector.project`` with stand in hists, with the number of observables as the size. """
+    projector = _setup_projector({f"hist_{i}": Hist(f"hist_{i}") for i in range(n_observables)})
+    return projector.project
+
+@scenario("hist_projector_root", sizes = [100, 1000], requires_root = True)
+def _hist_projector_root(n_bins: int) -> Callable[[], Any]:
+    """ ``HistProjector.project`` for 10 ROOT ``TH2D``, with the number of bins per axis as the size. """
+    import ROOT
+
+    hists = {}
+    for i in range(10):
+        hist = ROOT.TH2D(f"hist_{i}", f"hist_{i}", n_bins, 0, 1, n_bins, 0, 1)
+        hist.SetDirectory(0)
+        hist.FillRandom("gaus", 10000)
+        hists[f"hist_{i}"] = hist
+    return _setup_projector(hists).project
+
+@scenario("outliers_removal", sizes = [100, 1000], requires_root = True)
+def _outliers_removal(n_bins: int) -> Callable[[], Any]:
+    """ ``OutliersRemovalManager.run`` on a ``TH2D``, with the number of bins per axis as the size.
+
+    The hist is modified in place, so the measured time includes cloning the hist.
+    """
+    import ROOT
+    from pachyderm import remove_outliers
+
+    hist = ROOT.TH2D("outliers", "outliers", n_bins, 0, 1, n_bins, 0, 1)
+    hist.SetDirectory(0)
+    # Keep a reference to the function so that it isn't deleted before filling.
+    func = ROOT.TF2("outliers_func", "exp(-5 * y)", 0, 1, 0, 1)
+    hist.FillRandom(func.GetName(), 100000)
+    manager = remove_outliers.OutliersRemovalManager()
+
+    def run() -> Any:
+        return manager.run(outliers_removal_axis = projectors.TH1AxisType.y_axis, hist = hist.Clone("outliers_clone"))
+    return run
+
+def _large_config(n_entries: int) -> Dict[str, Any]:
+    """ Create a configuration with formatting placeholders, similar to an analysis configuration. """
+    return {
+        f"entry_{i}": {
+            "name": "{a}_{b}_" + str(i),
+            "values": [i, i * 2.5, None],
+            "label": r"$p_{\mathrm{T}}$",
+            "nested": {"path": "output/{a}/{b}", "n": i},
+        }
+        for i in range(n_entries)
+    }
+
+class _AnalysisObject:
+    """ Simple analysis object which stores its arguments. """
+    def __init__(self, **kwargs: Any):
+        self.__dict__.update(kwargs)
+
+@scenario("create_objects_from_iterables", sizes = [10, 100, 1000])
+def _create_objects_from_iterables(n_objects: int) -> Callable[[], Any]:
+    """ ``create_objects_from_iterables`` with a 100 entry config, with the number of objects as the size. """
+    config = _large_config(100)
+    iterables = {"a": list(range(n_objects // 2)), "b": ["x", "y"]}
+
+    def run() -> Any:
+        return generic_config.create_objects_from_iterables(
+            obj = _AnalysisObject, args = {"config": config, "output_prefix": "{a}/{b}"},
+            iterables = iterables, formatting_options = {},
+        )
+    return run
+
+@scenario("apply_formatting_dict", sizes = [100, 1000, 10000])
+def _apply_formatting_dict(n_entries: int) -> Callable[[], Any]:
+    """ ``apply_formatting_dict`` on a config, with the number of config entries as the size. """
+    config = _large_config(n_entries)
+    formatting = {"a": "a1", "b": "b1"}
+    return lambda: generic_config.apply_formatting_dict(config, formatting)
+
+class _Selection(enum.Enum):
+    a = 1
+    b = 2
+
+    def __str__(self) -> str:
+        return self.name
+
+    to_yaml = classmethod(yaml.enum_to_yaml)
+    from_yaml = classmethod(yaml.enum_from_yaml)
+
+@scenario("yaml_numpy_round_trip", sizes = [100, 1000, 10000])
+def _yaml_numpy_round_trip(n_values: int) -> Callable[[], Any]:
+    """ Dump and load numpy arrays (and enums) via YAML, with the array size as the size. """
+    y = yaml.yaml(classes_to_register = [_Selection])
+    data = {"array": np.random.random(n_values), "selection": _Selection.a, "hists": [np.arange(10)] * 10}
+
+    def run() -> Any:
+        s = io.StringIO()
+        y.dump(data, s)
+        s.seek(0)
+        return y.load(s)
+    return run
+
+def _setup_yaml_load(n_entries: int, fast: bool) -> Callable[[], Any]:
+    """ Load a large configuration (with anchors, enums and numpy arrays) from a string. """
+    y = yaml.yaml(classes_to_register = [_Selection], fast = fast)
+    data = _large_config(n_entries)
+    for value in data.values():
+        value["selection"] = _Selection.a
+        value["array"] = np.arange(10)
+    s = io.StringIO()
+    yaml.yaml(classes_to_register = [_Selection]).dump(data, s)
+    # Add anchors and aliases, as are typical for a configuration.
+    text = "shared: &shared [1, 2, 3]\n" + "".join(f"alias_{i}: *shared\n" for i in range(n_entries)) + s.getvalue()
+
+    return lambda: y.load(text)
+
+@scenario("yaml_load_config", sizes = [100, 1000])
+def _yaml_load_config(n_entries: int) -> Callable[[], Any]:
+    """ Load a configuration with the round-trip YAML object, with the number of entries as the size. """
+    return _setup_yaml_load(n_entries, fast = False)
+
+@scenario("yaml_load_config_fast", sizes = [100, 1000])
+def _yaml_load_config_fast(n_entries: int) -> Callable[[], Any]:
+    """ Load a configuration with the fast YAML object, with the number of entries as the size. """
+    return _setup_yaml_load(n_entries, fast = True)
+
+########
+# Runner
+########
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """ Measure the time and peak memory of a function.
+
+    Args:
+        func: Function to be measured.
+        repeat: Number of times to repeat the timing measurement. The minimum is reported.
+    Returns:
+        Time in seconds (under "time") and peak memory allocated in bytes (under "peak_memory").
+    """
+    time = min(timeit.repeat(func, number = 1, repeat = repeat))
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"time": time, "peak_memory": float(peak)}
+
+def run(selected_scenarios: Optional[Sequence[str]] = None, repeat: int = 5) -> Results:
+    """ Run the benchmark scenarios.
+
+    Args:
+        selected_scenarios: Names of the scenarios to run. Default: None, which runs all scenarios.
+        repeat: Number of times to repeat each timing measurement. Default: 5.
+    Returns:
+        Results for each scenario and size.
+    """
+    root_available = _root_available()
+    results: Results = {}
+    for name in selected_scenarios if selected_scenarios else _scenarios:
+        s = _scenarios[name]
+        if s.requires_root and not root_available:
+            print(f"Skipping {name} because ROOT isn't available.")
+            continue
+        results[name] = {}
+        for size in s.sizes:
+            results[name][str(size)] = measure(s.setup(size), repeat = repeat)
+    return results
+
+def compare(results: Results, baseline: Results, tolerance: float) -> List[str]:
+    """ Compare results against a baseline.
+
+    Args:
+        results: Benchmark results.
+        baseline: Baseline results.
+        tolerance: Relative increase beyond which a metric is considered to have regressed.
+    Returns:
+        Descriptions of the regressions.
+    """
+    regressions = []
+    for name, sizes in results.items():
+        for size, metrics in sizes.items():
+            baseline_metrics = baseline.get(name, {}).get(size)
+            if baseline_metrics is None:
+                continue
+            for metric, value in metrics.items():
+                reference = baseline_metrics.get(metric)
+                if reference and value > reference * (1 + tolerance):
+                    regressions.append(
+                        f"{name} (size {size}): {metric} increased from {reference:.4g} to {value:.4g}"
+                        f" ({value / reference - 1:+.0%})"
+                    )
+    return regressions
+
+def main(args: Optional[Sequence[str]] = None) -> int:
+    """ Entry point for running the benchmark suite.
+
+    Args:
+        args: Command line arguments. Default: None, which uses ``sys.argv``.
+    Returns:
+        Exit code, which is 1 if there were regressions relative to the baseline.
+    """
+    parser = argparse.ArgumentParser(description = "pachyderm benchmark suite.")
+    parser.add_argument("--scenarios", nargs = "*", choices = list(_scenarios), help = "Scenarios to run. Default: all.")
+    parser.add_argument("--repeat", type = int, default = 5, help = "Number of repetitions of each timing measurement.")
+    parser.add_argument("--save-baseline", help = "Filename under which the results should be stored as a baseline.")
+    parser.add_argument("--baseline", help = "Filename of the baseline to compare against.")
+    parser.add_argument("--tolerance", type = float, default = 0.2, help = "Relative tolerance for regressions.")
+    parsed_args = parser.parse_args(args)
+
+    results = run(selected_scenarios = parsed_args.scenarios, repeat = parsed_args.repeat)
+    for name, sizes in results.items():
+        for size, metrics in sizes.items():
+            print(f"{name:>32} {size:>8}: {metrics['time'] * 1e3:10.3f} ms, {metrics['peak_memory'] / 1024:10.1f} KiB")
+
+    if parsed_args.save_baseline:
+        with open(parsed_args.save_baseline, "w") as f:
+            json.dump(results, f, indent = 2, sort_keys = True)
+
+    if parsed_args.baseline:
+        with open(parsed_args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, tolerance = parsed_args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,14 +7,18 @@ For usage information, see ``jet_hadron.base.analysis_config``.
 .. codeauthor:: Raymond Ehlers <raymond.ehlers@cern.ch>, Yale University
 """
 
+import collections.abc
+import concurrent.futures
 import copy
 import dataclasses
 import enum
 import itertools
+import keyword
 import logging
 import string
-from typing import Any, Dict, Iterator, List, Mapping, Sequence, Tuple, Type, Union
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Set, Tuple, Type, Union
 
+from pachyderm import instrumentation
 from pachyderm import yaml
 from pachyderm.yaml import DictLike
 
@@ -86,25 +90,8 @@ def override_options(config: DictLike, selected_options: Tuple[Any, ...], set_of
                 # has an anchor, then we want to preserve the anchor information.
                 config[k].anchor
                 logger.debug(f"type: {type(config[k])}, k: {k}")
-                if isinstance(config[k], list):
-                    # Clear out the existing list entries
-                    del config[k][:]
-                    if isinstance(override_dict[k], (str, int, float, bool)):
-                        # We have to treat str carefully because it is an iterable, but it will be expanded as
-                        # individual characters if it's treated the same as a list, which is not the desired
-                        # behavior! If we wrap it in [], then it will be treated as the only entry in the list
-                        # NOTE: We also treat the basic types this way because they will be passed this way if
-                        #       overriding indirectly with anchors (since the basic scalar types don't yet support
-                        #       reassignment while maintaining their anchors).
-                        config[k].append(override_dict[k])
-                    else:
-                        # Here we just assign all entries of the list to all entries of override_dict[k]
-                        config[k].extend(override_dict[k])
-                elif isinstance(config[k], dict):
-                    # Clear out the existing entries because we are trying to replace everything
-                    # Then we can simply update the dict with our new values
-                    config[k].clear()
-                    config[k].update(override_dict[k])
+                if isinstance(config[k], (list, dict)):
+                    _override_anchored_container(config[k], v)
                 elif isinstance(config[k], (int, float, bool)):
                     # This isn't really very good (since we lose information), but there's nothing that can be done
                     # about it at the moment (Dec 2018)
@@ -118,9 +105,189 @@ def override_options(config: DictLike, selected_options: Tuple[Any, ...], set_of
                 config[k] = v
         else:
             raise KeyError(k, f"Trying to override key \"{k}\" that it is not in the config.")
+    instrumentation.increment("override_keys_applied", len(override_dict))
 
     return config
 
+def _override_anchored_container(container: Union[list, dict], value: Any) -> None:
+    """ Override the contents of an anchored list or dict in place, such that the anchor is preserved.
+
+    Args:
+        container: Anchored list or dict to be overridden.
+        value: Override value.
+    Returns:
+        None. The container is modified in place.
+    """
+    if isinstance(container, list):
+        # Clear out the existing list entries
+        del container[:]
+        if isinstance(value, (str, int, float, bool)):
+            # We have to treat str carefully because it is an iterable, but it will be expanded as
+            # individual characters if it's treated the same as a list, which is not the desired
+            # behavior! If we wrap it in [], then it will be treated as the only entry in the list
+            # NOTE: We also treat the basic types this way because they will be passed this way if
+            #       overriding indirectly with anchors (since the basic scalar types don't yet support
+            #       reassignment while maintaining their anchors).
+            container.append(value)
+        else:
+            # Here we just assign all entries of the list to all entries of the override value
+            container.extend(value)
+    else:
+        # Clear out the existing entries because we are trying to replace everything
+        # Then we can simply update the dict with our new values
+        container.clear()
+        container.update(value)
+
+def _find_paths(obj: Any, ids: Set[int], path: Tuple[Any, ...], paths: Dict[int, List[Tuple[Any, ...]]],
+                parents: Set[int]) -> None:
+    """ Recursively find every path to the given objects within a configuration (including via aliases).
+
+    Args:
+        obj: Configuration object to search.
+        ids: ``id(...)`` of the objects to find.
+        path: Path (keys and indices) to obj.
+        paths: Paths to each object, keyed by the object id. Updated with the found paths.
+        parents: ``id(...)`` of the containers which contain obj, to avoid infinite recursion.
+    Returns:
+        None. The paths are stored in ``paths``.
+    """
+    if id(obj) in ids:
+        paths.setdefault(id(obj), []).append(path)
+    if isinstance(obj, dict):
+        items: Iterator[Tuple[Any, Any]] = iter(obj.items())
+    elif isinstance(obj, list):
+        items = enumerate(obj)
+    else:
+        return
+    if id(obj) in parents:
+        return
+    parents.add(id(obj))
+    for k, v in items:
+        _find_paths(v, ids, path + (k,), paths, parents)
+    parents.remove(id(obj))
+
+class OverrideOverlays:
+    """ Derive configurations with the override options applied for many selections of options.
+
+    ``override_options(...)`` modifies the configuration in place, so the configuration needs to be reloaded
+    for each selection of options. Instead, the base configuration is resolved once here, and a configuration
+    is derived for each selection. A derived configuration only copies the values which are overridden, as well
+    as the lists and dicts which contain them. All other values are shared with the base configuration (and
+    therefore between the derived configurations), so the derived configurations shouldn't be modified in place
+    (aside from replacing top level values, as in ``simplify_data_representations(...)``).
+
+    As for ``override_options(...)``, overriding an anchored list or dict updates every reference (alias)
+    to it within the derived configuration, so the anchors are preserved.
+
+    .. code-block:: python
+
+        >>> overlays = OverrideOverlays(config, set_of_possible_options = possible_options)
+        >>> configs = {
+        ...     selected_options: simplify_data_representations(overlays.overlay(selected_options))
+        ...     for selected_options in itertools.product(*possible_options)
+        ... }
+
+    Args:
+        config: The dict-like configuration from ruamel.yaml which should be overridden. It isn't modified.
+        set_of_possible_options (tuple of enums): Possible options for the override value categories.
+        config_containing_override: The dict-like config containing the override options in a map called
+            "override". If it is not specified, it will look for it in the main config.
+
+    Attributes:
+        config: Base configuration (without the override options).
+        override_opts: Override options.
+        set_of_possible_options (tuple of enums): Possible options for the override value categories.
+    """
+    def __init__(self, config: DictLike, set_of_possible_options: Tuple[enum.Enum, ...],
+                 config_containing_override: Optional[DictLike] = None):
+        if config_containing_override is None:
+            config_containing_override = config
+        self.override_opts = config_containing_override["override"]
+        # Remove the override options without modifying the original config.
+        self.config = copy.copy(config)
+        if "override" in self.config and self.config["override"] is self.override_opts:
+            del self.config["override"]
+        self.set_of_possible_options = set_of_possible_options
+
+        # Find all references to the anchored lists and dicts, which we need to update together to maintain
+        # the anchors when they are overridden.
+        anchored = {
+            id(v) for v in self.config.values()
+            if isinstance(v, (list, dict)) and getattr(getattr(v, "anchor", None), "value", None)
+        }
+        self._anchored_paths: Dict[int, List[Tuple[Any, ...]]] = {}
+        _find_paths(self.config, anchored, (), self._anchored_paths, set())
+
+    def overlay(self, selected_options: Tuple[Any, ...]) -> DictLike:
+        """ Derive the configuration with the override options applied for the selected options.
+
+        Args:
+            selected_options: The selected analysis options. They will be checked in the order with which
+                they are passed, so make certain that it matches the order in the configuration file!
+        Returns:
+            dict-like object: The derived configuration.
+        Raises:
+            KeyError: If an override key isn't in the configuration.
+            ValueError: If an anchored value other than a list, dict, or basic scalar is overridden.
+        """
+        override_dict = determine_override_options(selected_options, self.override_opts, self.set_of_possible_options)
+        config = copy.copy(self.config)
+        # Copies of the containers in the derived config, keyed by the id of the original container.
+        copies: Dict[int, Any] = {id(self.config): config}
+        overridden_ids: Set[int] = set()
+        for k, v in override_dict.items():
+            if k not in self.config:
+                raise KeyError(k, f"Trying to override key \"{k}\" that it is not in the config.")
+            existing = self.config[k]
+            if id(existing) in self._anchored_paths:
+                # Override a copy of the anchored value (which preserves the anchor), and then replace
+                # every reference to it with the copy.
+                overridden = copy.copy(existing)
+                _override_anchored_container(overridden, v)
+                overridden_ids.add(id(existing))
+                for path in self._anchored_paths[id(existing)]:
+                    self._replace(path, overridden, copies, overridden_ids)
+            elif hasattr(existing, "anchor") and isinstance(existing, (list, dict)):
+                # As in ``override_options(...)``, the contents of the list or dict are overridden (rather than
+                # assigning the value directly), so the type is preserved.
+                overridden = copy.copy(existing)
+                _override_anchored_container(overridden, v)
+                overridden_ids.add(id(existing))
+                config[k] = overridden
+            elif hasattr(existing, "anchor") and not isinstance(existing, (int, float, bool)):
+                raise ValueError(f"Object {k} (type {type(existing)}) somehow has an anchor, but is something other than a list or dict. Attempting to assign directly to it.")
+            else:
+                config[k] = v
+        instrumentation.increment("override_keys_applied", len(override_dict))
+
+        return config
+
+    def _replace(self, path: Tuple[Any, ...], value: Any, copies: Dict[int, Any], overridden: Set[int]) -> None:
+        """ Replace the value at the path in the derived configuration, copying the containers along the path.
+
+        Args:
+            path: Path (keys and indices) to the value in the base configuration.
+            value: New value.
+            copies: Copies of the containers in the derived config, keyed by the id of the original container.
+                Updated with any newly copied containers.
+            overridden: ``id(...)`` of the overridden containers.
+        Returns:
+            None.
+        """
+        original = self.config
+        derived = copies[id(self.config)]
+        for key in path[:-1]:
+            original = original[key]
+            # If the container is overridden, its contents are determined by the override options rather
+            # than the base configuration, so there's nothing to replace.
+            if id(original) in overridden:
+                return
+            if id(original) not in copies:
+                copies[id(original)] = copy.copy(original)
+            derived[key] = copies[id(original)]
+            derived = derived[key]
+        derived[path[-1]] = value
+
 def simplify_data_representations(config: DictLike) -> DictLike:
     """ Convert one entry lists to the scalar value
 
@@ -233,18 +400,62 @@ def determine_selection_of_iterable_values_from_config(config: DictLike, possibl
 
     return iterables
 
-def _key_index_iter(self) -> Iterator[Tuple[str, Any]]:
-    """ Allows for iteration over the ``KeyIndex`` values.
+def _create_key_index_init(names: Tuple[str, ...]) -> Any:
+    """ Create the ``__init__`` for a ``KeyIndex`` with the given field names.
 
-    This function is intended to be assigned to a newly created KeyIndex class. It enables iteration
-    over the ``KeyIndex`` names and values. We don't use a mixin to avoid issues with YAML.
+    As for dataclasses, the function is generated so that it has the proper signature (and so supports
+    positional and keyword arguments) without having to bind the arguments by hand, which would be slow.
+
+    Args:
+        names: Names of the fields of the ``KeyIndex``.
+    Returns:
+        The ``__init__`` function.
+    """
+    args = ", ".join(names)
+    lines = [f"def __init__(self, {args}):"]
+    lines.extend(f"    _setattr(self, {name!r}, {name})" for name in names)
+    lines.append(f"    values = ({''.join(f'{name}, ' for name in names)})")
+    lines.append("    _setattr(self, '_values', values)")
+    lines.append("    _setattr(self, '_hash', hash(values))")
+    namespace: Dict[str, Any] = {"_setattr": object.__setattr__}
+    exec("\n".join(lines), namespace)
+    return namespace["__init__"]
+
+def _key_index_eq(self, other: Any) -> Any:
+    """ Compare ``KeyIndex`` values. They are only equal to a ``KeyIndex`` of the same class. """
+    if other.__class__ is self.__class__:
+        return self._values == other._values
+    return NotImplemented
+
+def _key_index_hash(self) -> int:
+    """ Retrieve the precomputed hash. """
+    return self._hash
+
+def _key_index_repr(self) -> str:
+    """ Representation of the ``KeyIndex``, in the same format as a dataclass. """
+    values = ", ".join(f"{k}={v!r}" for k, v in zip(self._fields, self._values))
+    return f"{type(self).__name__}({values})"
+
+def _key_index_values_iter(self) -> Iterator[Tuple[str, Any]]:
+    """ Allows for iteration over the ``KeyIndex`` names and values.
 
     Note:
         This isn't recursive like ``dataclasses.asdict(...)``. Generally, we don't want those recursive
         conversion properties. Plus, this approach is much faster.
     """
-    for k, v in vars(self).items():
-        yield k, v
+    return zip(self._fields, self._values)
+
+def _key_index_getstate(self) -> Dict[str, Any]:
+    """ Retrieve the state as a dict of the names and values (for pickle and YAML). """
+    return dict(zip(self._fields, self._values))
+
+def _key_index_setstate(self, state: Mapping[str, Any]) -> None:
+    """ Restore the state from a dict of the names and values (for pickle and YAML).
+
+    Note:
+        The hash needs to be recalculated because str hashes vary between python processes.
+    """
+    self.__init__(*(state[name] for name in self._fields))
 
 def create_key_index_object(key_index_name: str, iterables: Dict[str, Any]) -> Any:
     """ Create a ``KeyIndex`` class based on the passed attributes.
@@ -252,6 +463,13 @@ def create_key_index_object(key_index_name: str, iterables: Dict[str, Any]) -> A
     This is wrapped into a helper function to allow for the ``__itter__`` to be specified for the object.
     Further, this allows it to be called outside the package when it is needed in analysis tasks..
 
+    The ``KeyIndex`` is a frozen dataclass, so the ``dataclasses`` functions (such as ``fields(...)``,
+    ``replace(...)``, and ``asdict(...)``) are supported. However, since it is used as a dictionary key
+    in analysis loops, it is optimized for lookup: the values are stored in slots and a tuple, and the
+    hash is computed once when the object is created (rather than on each lookup). The ``__init__``,
+    comparison, and ``repr`` are provided here instead of by the dataclass so that they can use the
+    stored values. The names and values are available via iteration.
+
     Args:
         key_index_name: Name of the iterable key index.
         iterables: Iterables which will be specified by this ``KeyIndex``. The keys should be the names of
@@ -275,32 +493,239 @@ def create_key_index_object(key_index_name: str, iterables: Dict[str, Any]) -> A
                 f" in a container that can recreate the iterable. See the comments here for more info."
             )
 
-    # We need the types of the fields to create the dataclass. However, we are provided with iterables
+    # We need the types of the fields to create the class. However, we are provided with iterables
     # in the values of the iterables dict. Thus, we need to look at one value of each iterable, and use
     # that to determine the type of that particular iterable. This is safe to do because the iterables
     # must always have at least one entry (or else they wouldn't be one of the iterables).
     # NOTE: The order here matters when we create the ``KeyIndex`` later, so we cannot just take all
     #       objects from the iterables and blindly use set because set won't preserve the order.
-    fields = [(name, type(next(iter(iterable)))) for name, iterable in iterables.items()]
+    fields = {name: type(next(iter(iterable))) for name, iterable in iterables.items()}
+    names = tuple(fields)
+    # The names are used as attributes, so they must be valid identifiers.
+    for name in names:
+        if not name.isidentifier() or keyword.iskeyword(name) or name in ("_values", "_hash"):
+            raise TypeError(f"Iterable name {name} is not a valid field name for the KeyIndex.")
+    # NOTE: We assign the methods directly rather than via a base class or mixin to avoid issues with YAML.
     KeyIndex = dataclasses.make_dataclass(
         key_index_name,
-        fields,
-        frozen = True
+        list(fields.items()),
+        namespace = {
+            "__slots__": names + ("_values", "_hash"),
+            "_fields": names,
+            "__init__": _create_key_index_init(names),
+            "__eq__": _key_index_eq,
+            "__hash__": _key_index_hash,
+            "__repr__": _key_index_repr,
+            # Allow for iteration over the key index values
+            "__iter__": _key_index_values_iter,
+            "__getstate__": _key_index_getstate,
+            "__setstate__": _key_index_setstate,
+        },
+        init = False,
+        repr = False,
+        eq = False,
+        frozen = True,
     )
-    # Allow for iteration over the key index values
-    KeyIndex.__iter__ = _key_index_iter
 
     return KeyIndex
 
-def create_objects_from_iterables(obj, args: dict, iterables: Dict[str, Any], formatting_options: Dict[str, Any], key_index_name: str = "KeyIndex") -> Tuple[Any, Dict[str, Any], dict]:
+class _ObjectArgsFormatter:
+    """ Determine the arguments to construct an object for each set of iterable values.
+
+    Formatting the full arguments (which often include the entire configuration) for every object would
+    rebuild every nested dict and list for each object. Instead, we determine once which parts of the
+    arguments contain strings which need to be formatted (the formatting plan). Only those parts are
+    rebuilt for each object, while everything else is shared by reference between all of the objects.
+    Consequently, the objects shouldn't modify their arguments in place.
+
+    Args:
+        args: Arguments to be passed to the object to create it.
+        formatting_options: Values to be used in formatting strings in the arguments.
+        names: Names of the iterables.
+    """
+    def __init__(self, args: Dict[str, Any], formatting_options: Dict[str, Any], names: Sequence[str]):
+        # We copy the args and formatting options so they aren't impacted by changes from outside
+        # (for example, before lazily constructed objects are created).
+        self.args = copy.copy(args)
+        self.formatting_options = copy.copy(formatting_options)
+        self.names = list(names)
+        # The iterable values change for each object, so they are formatted separately.
+        self.plan = _compile_formatting_plan({k: v for k, v in self.args.items() if k not in self.names}) or {}
+
+    def __call__(self, values: Tuple[Any, ...]) -> Dict[str, Any]:
+        """ Determine the formatted arguments for one set of iterable values.
+
+        Args:
+            values: Values of the iterables for this object.
+        Returns:
+            Formatted arguments to construct the object.
+        """
+        # Only build the log messages if they will actually be logged, since this function is often called
+        # with large configurations and many iterables.
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug(f"Values: {values}")
+
+        # Add in the values into the arguments and formatting options.
+        # NOTE: We don't need a copy for the iterable values in the args and formatting options
+        #       because the values will be overwritten for each object.
+        for name, val in zip(self.names, values):
+            # We want to keep the original value for the arguments.
+            self.args[name] = val
+            # Here, we convert the value, regardless of type, into a string that can be displayed.
+            self.formatting_options[name] = str(val)
+
+        # Apply formatting options
+        # We format into new objects (rather than in place) so we don't need to deepcopy the args. Further,
+        # only the values which need formatting are recreated.
+        with instrumentation.timer("apply_formatting_dict"):
+            object_args = {
+                k: apply_formatting_dict(v, self.formatting_options) if k in self.names
+                else _apply_formatting_plan(v, self.plan.get(k), self.formatting_options)
+                for k, v in self.args.items()
+            }
+        if debug:
+            # Print our results for debugging purposes. However, we skip printing the full
+            # config because it is quite long
+            print_args = {k: v for k, v in object_args.items() if k != "config"}
+            print_args["config"] = "..."
+            logger.debug(f"Constructing obj with args: \"{print_args}\"")
+
+        return object_args
+
+def _construct_object(obj: Any, format_args: _ObjectArgsFormatter, values: Tuple[Any, ...]) -> Any:
+    """ Construct an object for one set of iterable values.
+
+    Args:
+        obj: The object to be constructed.
+        format_args: Formatter for the arguments to be passed to the object to create it.
+        values: Values of the iterables for this object.
+    Returns:
+        The newly constructed object.
+    """
+    object_args = format_args(values)
+    with instrumentation.timer("object_construction"):
+        new_obj = obj(**object_args)
+    instrumentation.increment("objects_created")
+    return new_obj
+
+def _construct_object_from_args(obj: Any, object_args: Dict[str, Any]) -> Any:
+    """ Construct an object from already formatted arguments.
+
+    This is a module level function so it can be pickled and passed to worker processes.
+    """
+    return obj(**object_args)
+
+def _construct_objects_in_parallel(obj: Any, format_args: _ObjectArgsFormatter, KeyIndex: Any,
+                                   combinations: Sequence[Tuple[Any, ...]],
+                                   max_workers: int, use_threads: bool) -> Dict[Any, Any]:
+    """ Construct the objects for each set of iterable values using a pool of workers.
+
+    The arguments for each object are formatted up front in the main process, so the workers only receive
+    the object and its formatted arguments (rather than the full formatting options and iterables).
+
+    Args:
+        obj: The object to be constructed.
+        format_args: Formatter for the arguments to be passed to the object to create it.
+        KeyIndex: Key index class used to index the objects.
+        combinations: Values of the iterables for each object.
+        max_workers: Number of workers.
+        use_threads: If True, use a pool of threads instead of processes.
+    Returns:
+        Objects indexed by their ``KeyIndex``, in the same order as ``combinations``.
+    """
+    objects_args = [format_args(values) for values in combinations]
+
+    pool_executor = concurrent.futures.ThreadPoolExecutor if use_threads else concurrent.futures.ProcessPoolExecutor
+    with instrumentation.timer("parallel_object_construction"):
+        with pool_executor(max_workers = max_workers) as executor:
+            chunksize = max(1, len(objects_args) // (4 * max_workers))
+            # NOTE: map(...) returns the results in the order of the inputs, so the result is deterministic.
+            objects = list(executor.map(
+                _construct_object_from_args, itertools.repeat(obj, len(objects_args)), objects_args,
+                chunksize = chunksize,
+            ))
+    instrumentation.increment("objects_created", len(objects))
+
+    return {KeyIndex(*values): o for values, o in zip(combinations, objects)}
+
+class LazyObjects(collections.abc.Mapping):
+    """ Mapping from ``KeyIndex`` to objects, where each object is only constructed when it is first accessed.
+
+    The keys (and their order) are the same as for the dict created by ``create_objects_from_iterables(...)``.
+    Note that iterating over the values or items will construct all of the objects.
+
+    Args:
+        obj: The object to be constructed.
+        args: Arguments to be passed to the object to create it.
+        formatting_options: Values to be used in formatting strings in the arguments.
+        names: Names of the iterables.
+        KeyIndex: Key index class used to index the objects.
+        combinations: Values of the iterables for each object.
+    """
+    def __init__(self, obj: Any, args: Dict[str, Any], formatting_options: Dict[str, Any],
+                 names: Sequence[str], KeyIndex: Any, combinations: Sequence[Tuple[Any, ...]]):
+        self.obj = obj
+        self._format_args = _ObjectArgsFormatter(args, formatting_options, names)
+        self._combinations = {KeyIndex(*values): values for values in combinations}
+        self._objects: Dict[Any, Any] = {}
+
+    def __getitem__(self, key: Any) -> Any:
+        try:
+            return self._objects[key]
+        except KeyError:
+            pass
+        # Raises a KeyError if the key isn't valid.
+        values = self._combinations[key]
+        new_obj = _construct_object(self.obj, self._format_args, values)
+        self._objects[key] = new_obj
+        return new_obj
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._combinations)
+
+    def __len__(self) -> int:
+        return len(self._combinations)
+
+    def is_constructed(self, key: Any) -> bool:
+        """ Check whether the object corresponding to the key has already been constructed.
+
+        Args:
+            key: Key index of the object.
+        Returns:
+            True if the object has been constructed.
+        """
+        return key in self._objects
+
+def create_objects_from_iterables(obj, args: dict, iterables: Dict[str, Any], formatting_options: Dict[str, Any],
+                                  key_index_name: str = "KeyIndex", lazy: bool = False,
+                                  max_workers: int = 1, use_threads: bool = False) -> Tuple[Any, Dict[str, Any], Mapping[Any, Any]]:
     """ Create objects for each set of values based on the given arguments.
 
-    The iterable values are available under a key index ``dataclass`` which is used to index the returned
-    dictionary. The names of the fields are determined by the keys of iterables dictionary. The values are
+    The iterable values are available under a key index (which behaves as a frozen ``dataclass``) which is
+    used to index the returned dictionary. The names of the fields are determined by the keys of iterables dictionary. The values are
     the newly created object. Note that the iterable values must be convertible to a str() so they can be
     included in the formatting dictionary.
 
-    Each set of values is also included in the object args.
+    Each set of values is also included in the object args. Parts of the args which don't contain any strings
+    to be formatted (for example, most of the configuration) are shared by reference between all of the objects
+    (and with the passed ``args``), rather than being deep copied for each object. Only the dicts and lists which
+    contain strings to be formatted (and those containing them) are new for each object.
+
+    Note:
+        Since they are shared, modifying the unformatted parts of the args in place (for example,
+        ``self.config["option"] = value`` in the ``__init__`` of the object) will also modify them for all of
+        the other objects. If an object needs to modify its args, it should copy them first (for example, via
+        ``copy.deepcopy(...)``).
+
+    If ``lazy`` is True, the objects aren't constructed immediately. Instead, a ``LazyObjects`` mapping
+    is returned, which constructs each object (with the same args and formatting) the first time that it is
+    accessed. This is useful for large sets of iterables where only some of the objects are actually used.
+
+    If the objects are expensive to construct (for example, if they open files when they are created), they can
+    instead be constructed by a pool of worker processes (or threads) by setting ``max_workers``. The objects
+    (and therefore their arguments) must be picklable to use worker processes. The returned dict is in the
+    same order as for serial construction.
 
     As a basic example,
 
@@ -330,17 +755,30 @@ def create_objects_from_iterables(obj, args: dict, iterables: Dict[str, Any], fo
             ``"name_of_iterable": iterable``.
         formatting_options: Values to be used in formatting strings in the arguments.
         key_index_name: Name of the iterable key index.
+        lazy: If True, only construct each object when it is first accessed. Default: False.
+        max_workers: Number of workers to use to construct the objects. If 1, the objects are constructed
+            serially. Cannot be used with ``lazy``. Default: 1.
+        use_threads: If True, use a pool of threads rather than processes to construct the objects.
+            Default: False.
     Returns:
         (object, list, dict, dict): Roughly, (KeyIndex, iterables, objects). Specifically, the
-            key_index is a new dataclass which defines the parameters used to create the object, iterables
-            are the iterables used to create the objects, which names as keys and the iterables as values.
+            key_index is a new class (which behaves as a frozen dataclass) which defines the parameters used
+            to create the object, iterables are the iterables used to create the objects, which names as keys and the iterables as values.
             The objects dictionary keys are KeyIndex objects which describe the iterable arguments passed to the
-            object, while the values are the newly constructed arguments. See the example above.
+            object, while the values are the newly constructed arguments. See the example above. If ``lazy``
+            is True, the objects are stored in a ``LazyObjects`` mapping rather than a dict.
+    Raises:
+        ValueError: If there are no iterables to use in creating objects, or if both ``lazy`` and
+            ``max_workers`` are requested.
     """
+    # Validation
+    if lazy and max_workers > 1:
+        raise ValueError(max_workers, "Lazy object creation cannot be combined with parallel construction.")
+
     # Setup
-    objects = {}
     names = list(iterables)
-    logger.debug(f"iterables: {iterables}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"iterables: {iterables}")
     # Create the key index object, where the name of each field is the name of each iterable.
     KeyIndex = create_key_index_object(
         key_index_name = key_index_name,
@@ -349,44 +787,27 @@ def create_objects_from_iterables(obj, args: dict, iterables: Dict[str, Any], fo
     # ``itertools.product`` produces all possible permutations of the iterables values.
     # NOTE: Product preserves the order of the iterables values, which is important for properly
     #       assigning the values to the ``KeyIndex``.
-    for values in itertools.product(*iterables.values()):
-        logger.debug(f"Values: {values}")
-        # Skip if we don't have a sufficient set of values to create an object.
-        if not values:
-            continue
-
-        # Add in the values into the arguments and formatting options.
-        # NOTE: We don't need a deep copy for the iterable values in the args and formatting options
-        #       because the values will be overwritten for each object.
-        for name, val in zip(names, values):
-            # We want to keep the original value for the arguments.
-            args[name] = val
-            # Here, we convert the value, regardless of type, into a string that can be displayed.
-            formatting_options[name] = str(val)
+    # NOTE: We skip if we don't have a sufficient set of values to create an object.
+    combinations = [values for values in itertools.product(*iterables.values()) if values]
 
-        # Apply formatting options
-        # If we formatted in place, we would need to deepcopy the args to ensure that the iterable dependent
-        # values in the formatted values are properly set for each iterable object individually.
-        # However, by formatting into new variables, we can avoid a deepcopy, which greatly improves performance!
-        # NOTE: We don't need a deep copy do this for iterable value names themselves because they will be overwritten
-        #       for each object. They are set in the block above.
-        object_args = copy.copy(args)
-        logger.debug(f"object_args pre format: {object_args}")
-        object_args = apply_formatting_dict(object_args, formatting_options)
-        # Print our results for debugging purposes. However, we skip printing the full
-        # config because it is quite long
-        print_args = {k: v for k, v in object_args.items() if k != "config"}
-        print_args["config"] = "..."
-        logger.debug(f"Constructing obj \"{obj}\" with args: \"{print_args}\"")
-
-        # Finally create the object.
-        objects[KeyIndex(*values)] = obj(**object_args)
-
-    # If nothing has been created at this point, then we are didn't iterating over anything and something
+    # If there are no combinations at this point, then we aren't iterating over anything and something
     # has gone wrong.
-    if not objects:
+    if not combinations:
         raise ValueError(iterables, "There appear to be no iterables to use in creating objects.")
 
+    objects: Mapping[Any, Any]
+    if lazy:
+        objects = LazyObjects(obj, args, formatting_options, names, KeyIndex, combinations)
+    else:
+        format_args = _ObjectArgsFormatter(args, formatting_options, names)
+        if max_workers > 1:
+            objects = _construct_objects_in_parallel(
+                obj, format_args, KeyIndex, combinations,
+                max_workers = max_workers, use_threads = use_threads,
+            )
+        else:
+            objects = {KeyIndex(*values): _construct_object(obj, format_args, values) for values in combinations}
+
     return (KeyIndex, iterables, objects)
 
 class formatting_dict(dict):
@@ -397,6 +818,53 @@ class formatting_dict(dict):
     def __missing__(self, key: str) -> str:
         return "{" + key + "}"
 
+def _compile_formatting_plan(obj: Any) -> Any:
+    """ Determine which parts of a configuration object contain strings which need to be formatted.
+
+    Args:
+        obj: Some configuration object to be formatted.
+    Returns:
+        None if nothing needs to be formatted, True if obj is a string which needs to be formatted, or a dict
+            of the plans of the keys (for a dict) or indices (for a list) which need to be formatted.
+    """
+    if isinstance(obj, str):
+        # Strings without braces are unchanged by the formatting, and latex like strings are skipped.
+        # See ``apply_formatting_dict(...)``.
+        return True if "$" not in obj and ("{" in obj or "}" in obj) else None
+    if isinstance(obj, dict):
+        items: Iterator[Tuple[Any, Any]] = iter(obj.items())
+    elif isinstance(obj, list):
+        items = enumerate(obj)
+    else:
+        return None
+    plan = {}
+    for k, v in items:
+        sub_plan = _compile_formatting_plan(v)
+        if sub_plan is not None:
+            plan[k] = sub_plan
+    return plan if plan else None
+
+def _apply_formatting_plan(obj: Any, plan: Any, formatting: Dict[str, Any]) -> Any:
+    """ Apply a formatting dict to the parts of a configuration object which need formatting.
+
+    It's equivalent to ``apply_formatting_dict(...)``, except that objects which don't need formatting
+    according to the plan are returned as is rather than copied.
+
+    Args:
+        obj: Some configuration object to apply the formatting to.
+        plan: Formatting plan for the object, from ``_compile_formatting_plan(...)``.
+        formatting: String formatting options to apply.
+    Returns:
+        Configuration with formatting applied.
+    """
+    if plan is None:
+        return obj
+    if plan is True:
+        return apply_formatting_dict(obj, formatting)
+    if isinstance(obj, dict):
+        return {k: _apply_formatting_plan(v, plan.get(k), formatting) for k, v in obj.items()}
+    return [_apply_formatting_plan(el, plan.get(i), formatting) for i, el in enumerate(obj)]
+
 def apply_formatting_dict(obj: Any, formatting: Dict[str, Any]) -> Any:
     """ Recursively apply a formatting dict to all strings in a configuration.
 
@@ -422,6 +890,7 @@ def apply_formatting_dict(obj: Any, formatting: Dict[str, Any]) -> Any:
         # The solution below works in py 2/3
         if "$" not in obj:
             new_obj = string.Formatter().vformat(obj, (), formatting_dict(**formatting))
+            instrumentation.increment("strings_formatted")
         #else:
         #    logger.debug("Skipping str {} since it appears to be a latex string, which may break the formatting.".format(obj))
     elif isinstance(obj, dict):
@@ -444,7 +913,9 @@ def apply_formatting_dict(obj: Any, formatting: Dict[str, Any]) -> Any:
         pass
     else:
         # This may or may not be expected, depending on the particular value.
-        logger.debug(f"Unrecognized obj '{obj}' of type '{type(obj)}'")
+        # NOTE: Formatting the object may be expensive, so we only do so if it will actually be logged.
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Unrecognized obj '{obj}' of type '{type(obj)}'")
 
     return new_obj
 
@@ -8,7 +8,8 @@
 from dataclasses import dataclass
 import logging
 import numpy as np
-from typing import Any, Dict, Tuple, TypeVar, Union
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Type, TypeVar, Union
+import weakref
 
 from pachyderm.typing_helpers import Hist
 
@@ -85,6 +86,56 @@ def get_histograms_in_list(filename: str, list_name: str = None) -> Dict[str, An
 
     return hists
 
+def write_histograms_to_file(filename: str, hists: Mapping[str, Any], mode: str = "RECREATE") -> None:
+    """ Write a nested dict of hists to a ROOT file.
+
+    This is the inverse of ``get_histograms_in_file(...)``: nested dicts are stored as ``TList`` objects (with
+    a single key), and ``Histogram1D`` objects are converted to ``TH1D`` hists. All of the objects are written
+    with one opening of the file.
+
+    Args:
+        filename: Filename of the ROOT file.
+        hists: Nested dict of hists (ROOT hists or ``Histogram1D``) to write, with the keys as the names.
+        mode: Mode in which the file should be opened. Default: "RECREATE".
+    Returns:
+        None.
+    """
+    # Keep references to the created objects until they are written, since the lists don't own them.
+    keep_alive: List[Any] = []
+    with RootOpen(filename = filename, mode = mode) as f:
+        for key, value in hists.items():
+            obj = _to_root_object(key, value, keep_alive)
+            if isinstance(value, Mapping):
+                f.WriteTObject(obj, key, "SingleKey")
+            else:
+                f.WriteTObject(obj, key)
+
+def _to_root_object(name: str, value: Any, keep_alive: List[Any]) -> Any:
+    """ Recursively convert a value to a ROOT object which can be written to a file.
+
+    Args:
+        name: Name of the object.
+        value: Value to be converted. It may be a (nested) dict, a ``Histogram1D``, or a ROOT object.
+        keep_alive: List in which the created objects are stored so that they aren't deleted before
+            they're written.
+    Returns:
+        The ROOT object.
+    """
+    import ROOT
+
+    if isinstance(value, Mapping):
+        obj = ROOT.TList()
+        obj.SetName(name)
+        for key, v in value.items():
+            obj.Add(_to_root_object(key, v, keep_alive))
+    elif isinstance(value, Histogram1DBase):
+        obj = value.to_root(name = name)
+    else:
+        # Ensure that the name matches the key, so that it can be retrieved under the same key.
+        obj = value if value.GetName() == name else value.Clone(name)
+    keep_alive.append(obj)
+    return obj
+
 def _retrieve_object(output_dict: Dict[str, Any], obj: Any) -> None:
     """ Function to recursively retrieve histograms from a list in a ROOT file.
 
@@ -123,44 +174,233 @@ def _retrieve_object(output_dict: Dict[str, Any], obj: Any) -> None:
         for obj_temp in list(obj):
             _retrieve_object(output_dict[obj.GetName()], obj_temp)
 
-# Typing helpers
-_T = TypeVar("_T", bound = "Histogram1D")
+def _convert_if_1D_hist(obj: Any, copy: bool = False) -> Any:
+    """ Convert an object to a ``Histogram1D`` if it's a 1D histogram.
 
-@dataclass
-class Histogram1D:
-    """ Contains histogram data.
+    This is equivalent to ``Histogram1D.from_existing_hist(...)``, but the type of the object is only
+    determined once, which matters when converting many small hists.
+
+    Args:
+        obj: Object to be converted.
+        copy: If True, copy the arrays of UHI histograms. Default: False.
+    Returns:
+        The converted hist if the object is a 1D ROOT hist or a 1D histogram implementing the UHI protocol
+            (or a histogram container holding one), or otherwise the unchanged object.
+    """
+    # Convert a histogram containing object -> TH1 or uproot hist, as in ``from_existing_hist(...)``.
+    hist = getattr(obj, "hist", obj)
+    # UHI protocol (uproot4+, boost-histogram, etc).
+    if callable(getattr(hist, "values", None)) and hasattr(hist, "axes"):
+        if len(hist.axes) != 1:
+            return obj
+        (bin_edges, y, errors_squared) = Histogram1D._from_uhi(hist, copy = copy)
+    # ROOT TH1 derived hists. THn derived hists don't define ``GetDimension()``.
+    elif callable(getattr(hist, "GetDimension", None)):
+        if hist.GetDimension() != 1:
+            return obj
+        (bin_edges, y, errors_squared) = Histogram1D._from_th1(hist)
+    else:
+        return obj
+    return Histogram1D(bin_edges = bin_edges, y = y, errors_squared = errors_squared)
+
+def convert_histograms(hists: Union[str, Mapping[str, Any]], copy: bool = False) -> Dict[str, Any]:
+    """ Convert all of the 1D hists in a nested dict (or file) to ``Histogram1D`` objects.
+
+    The nesting of the input is preserved in the output. Objects which can't be converted to a
+    ``Histogram1D`` (such as higher dimensional hists) are stored in the output unchanged.
+
+    Args:
+        hists: Nested dict of hists (as from ``get_histograms_in_list(...)``), or the filename of a ROOT
+            file, in which case all of the hists in the file will be converted.
+        copy: If True, copy the arrays of UHI histograms. See ``Histogram1D.from_existing_hist(...)``.
+            Default: False.
+    Returns:
+        Nested dict containing the converted hists.
+    """
+    if isinstance(hists, str):
+        hists = get_histograms_in_file(filename = hists)
+
+    output: Dict[str, Any] = {}
+    for key, value in hists.items():
+        # Empty dicts are stored as is, so that they are also available in the output.
+        if isinstance(value, Mapping) and value:
+            output[key] = convert_histograms(value, copy = copy)
+        else:
+            output[key] = _convert_if_1D_hist(value, copy = copy)
+    return output
+
+def _uniform_bin_width(bin_edges: np.ndarray) -> Optional[float]:
+    """ Determine the bin width if the bins are uniform.
+
+    Args:
+        bin_edges: Bin edges to check.
+    Returns:
+        The bin width if all of the bins have the same width (within floating point precision), or None
+            if the binning is variable.
+    """
+    bin_widths = bin_edges[1:] - bin_edges[:-1]
+    if len(bin_widths) == 0:
+        return None
+    width = bin_widths[0]
+    if width > 0 and np.allclose(bin_widths, width, rtol = 1e-9, atol = 0):
+        return float(width)
+    return None
+
+def find_bins(bin_edges: np.ndarray, values: np.ndarray,
+              uniform_bin_width: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ Find the bins corresponding to an array of values.
+
+    The bins follow the ROOT convention, such that a value is in bin ``i`` if
+    ``bin_edges[i] <= value < bin_edges[i + 1]``. Values which are below the first bin edge are
+    assigned to bin -1 and marked as underflow, while values which are at or above the last bin edge
+    (as well as NaN) are assigned to bin ``n_bins`` and marked as overflow. This matches the values
+    returned by ``Histogram1D.find_bin(...)``.
+
+    For uniform binning, the bins are determined arithmetically rather than via a binary search over the
+    bin edges, which is substantially faster for large arrays. Values which are within floating point
+    precision of a bin edge are corrected so that the result is identical to the binary search.
 
     Note:
-        Underflow and overflow bins are excluded!
+        Bins are 0-indexed here, while in ROOT they are 1-indexed.
 
     Args:
-        bin_edges (np.ndarray): The histogram bin edges.
-        y (np.ndarray): The histogram bin values.
-        errors_squared (np.ndarray): The bin sum weight squared errors.
+        bin_edges: Bin edges of the histogram.
+        values: Values for which we want the corresponding bins.
+        uniform_bin_width: Bin width of uniform binning. If it is not specified, the binning will be
+            checked to determine whether it is uniform. Default: None.
+    Returns:
+        (bins, underflow, overflow): 0-indexed bins corresponding to the values, mask of the values
+            which are in the underflow, and mask of the values which are in the overflow.
+    """
+    values = np.asarray(values)
+    n_bins = len(bin_edges) - 1
+    if uniform_bin_width is None:
+        uniform_bin_width = _uniform_bin_width(bin_edges)
+
+    if uniform_bin_width is None:
+        # Variable binning, so we need to search through the bin edges.
+        # See ``Histogram1D.find_bin(...)`` for why we use ``side = "right"`` and subtract one.
+        bins = np.searchsorted(bin_edges, values, side = "right") - 1
+    else:
+        # Uniform binning, so we can calculate the bins directly.
+        # We clip to one bin beyond the edges on either side before converting to int so that we
+        # don't overflow when the values are far outside of the bin edges. NaN is sent to the overflow,
+        # as it is with ``np.searchsorted``.
+        float_bins = np.floor((values - bin_edges[0]) / uniform_bin_width)
+        float_bins = np.where(np.isnan(float_bins), n_bins, float_bins)
+        bins = np.clip(float_bins, -1, n_bins).astype(np.int64)
+        # Correct for floating point rounding near the bin edges. In the vast majority of cases,
+        # these are no-ops, but they ensure that we agree with the binary search.
+        lower_edges = bin_edges[np.clip(bins, 0, n_bins)]
+        bins = np.where((bins >= 0) & (values < lower_edges), bins - 1, bins)
+        upper_edges = bin_edges[np.clip(bins + 1, 0, n_bins)]
+        bins = np.where((bins < n_bins) & (values >= upper_edges), bins + 1, bins)
+
+    underflow = bins < 0
+    overflow = bins >= n_bins
+
+    return bins, underflow, overflow
+
+def _accumulate_unbinned_data(bin_edges: np.ndarray, values: np.ndarray, weights: Optional[np.ndarray] = None,
+                              uniform_bin_width: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """ Bin unbinned data, calculating the sum of the weights and the sum of the weights squared.
+
+    Values in the underflow or overflow are dropped. Uniform binning takes advantage of the fast path
+    in ``find_bins(...)``, while the accumulation is performed with ``np.bincount``.
 
-    Attributes:
-        x (np.ndarray): The bin centers.
-        y (np.ndarray): The bin values.
-        bin_edges (np.ndarray): The bin edges.
-        errors (np.ndarray): The bin errors.
-        errors_squared (np.ndarray): The bin sum weight squared errors.
+    Args:
+        bin_edges: Bin edges of the histogram.
+        values: Values to be binned.
+        weights: Weights of the values. Default: None, in which case each value has a weight of 1.
+        uniform_bin_width: Bin width of uniform binning. See ``find_bins(...)``. Default: None.
+    Returns:
+        (sumw, sumw2): Sum of the weights and sum of the weights squared in each bin.
+    Raises:
+        ValueError: If the shape of the weights doesn't match the shape of the values.
+    """
+    values = np.asarray(values)
+    n_bins = len(bin_edges) - 1
+    if weights is not None:
+        weights = np.asarray(weights)
+        if weights.shape != values.shape:
+            raise ValueError(
+                f"Shape of the weights {weights.shape} doesn't match the shape of the values {values.shape}."
+            )
+
+    bins, underflow, overflow = find_bins(bin_edges, values, uniform_bin_width = uniform_bin_width)
+    in_range = ~(underflow | overflow)
+    bins = bins[in_range]
+
+    if weights is None:
+        # Each value has a weight of 1, so the sum of the weights squared is the same as the sum of the weights.
+        counts = np.bincount(bins, minlength = n_bins).astype(np.float64)
+        return counts, counts.copy()
+
+    selected_weights = weights[in_range]
+    sumw = np.bincount(bins, weights = selected_weights, minlength = n_bins)
+    sumw2 = np.bincount(bins, weights = selected_weights ** 2, minlength = n_bins)
+    return sumw, sumw2
+
+# Typing helpers
+_T = TypeVar("_T", bound = "Histogram1DBase")
+
+class Histogram1DBase:
+    """ Shared implementation of a 1D histogram.
+
+    This class implements all of the histogram functionality in terms of the stored ``bin_edges``, ``y``,
+    and ``errors_squared`` arrays. Subclasses determine how the arrays are stored, as well as how the
+    derived quantities are cached (via ``_cached(...)``). See ``Histogram1D`` (the standard histogram)
+    and ``CompactHistogram1D`` (a memory efficient histogram).
+
+    Note:
+        Underflow and overflow bins are excluded!
     """
+    __slots__: Tuple[str, ...] = ()
+    # Names of the arrays which define the histogram.
+    _fields = ("bin_edges", "y", "errors_squared")
+
     bin_edges: np.ndarray
     y: np.ndarray
     errors_squared: np.ndarray
 
+    def __init__(self, bin_edges: np.ndarray, y: np.ndarray, errors_squared: np.ndarray):
+        # NOTE: The storage for these attributes is provided by the subclasses, which mypy can't see.
+        self.bin_edges = bin_edges  # type: ignore
+        self.y = y  # type: ignore
+        self.errors_squared = errors_squared  # type: ignore
+
+    def _cached(self, key: str, calculate: Callable[[], Any]) -> Any:
+        """ Retrieve a derived quantity, which may be cached by the subclass.
+
+        Args:
+            key: Name of the derived quantity.
+            calculate: Function to calculate the derived quantity if it's not available in the cache.
+        Returns:
+            The derived quantity.
+        """
+        raise NotImplementedError("Must be implemented by the subclass.")
+
     @property
     def errors(self) -> np.ndarray:
-        return np.sqrt(self.errors_squared)
+        """ The bin errors, calculated from the errors squared.
+
+        This property caches the errors so we don't have to calculate them every time.
+
+        Returns:
+            Array of the bin errors.
+        """
+        return self._cached("errors", lambda: np.sqrt(self.errors_squared))
 
     @property
     def bin_widths(self) -> np.ndarray:
         """ Bin widths calculated from the bin edges.
 
+        This property caches the bin widths so we don't have to calculate them every time.
+
         Returns:
             Array of the bin widths.
         """
-        return self.bin_edges[1:] - self.bin_edges[:-1]
+        return self._cached("bin_widths", lambda: self.bin_edges[1:] - self.bin_edges[:-1])
 
     @property
     def x(self) -> np.ndarray:
@@ -173,14 +413,12 @@ class Histogram1D:
         Returns:
             Array of center of bins.
         """
-        try:
-            return self._x
-        except AttributeError:
-            half_bin_widths = self.bin_widths / 2
-            x = self.bin_edges[:-1] + half_bin_widths
-            self._x: np.ndarray = x
+        return self._cached("x", lambda: self.bin_edges[:-1] + self.bin_widths / 2)
 
-        return self._x
+    @property
+    def _uniform_width(self) -> Optional[float]:
+        """ The bin width if the binning is uniform, or None if it's variable. Cached. """
+        return self._cached("uniform_bin_width", lambda: _uniform_bin_width(self.bin_edges))
 
     def find_bin(self, value: float) -> int:
         """ Find the bin corresponding to the specified value.
@@ -188,6 +426,11 @@ class Histogram1D:
         Note:
             Bins are 0-indexed here, while in ROOT they are 1-indexed.
 
+        Note:
+            Values below the first bin edge return -1, while values at or above the last bin edge
+            return the number of bins. To find the bins for an array of values (including explicit
+            masks for the underflow and overflow), see ``find_bins(...)``.
+
         Args:
             value: Value for which we want want the corresponding bin.
         Returns:
@@ -200,7 +443,104 @@ class Histogram1D:
         #       which matches the ROOT convention.
         return np.searchsorted(self.bin_edges, value, side = "right") - 1
 
-    def copy(self):
+    def find_bins(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """ Find the bins corresponding to an array of values.
+
+        This is the batch version of ``find_bin(...)``. See ``histogram.find_bins(...)`` for the
+        full description of the return values and of the fast path for uniform binning.
+
+        Args:
+            values: Values for which we want the corresponding bins.
+        Returns:
+            (bins, underflow, overflow): 0-indexed bins corresponding to the values, mask of the values
+                which are in the underflow, and mask of the values which are in the overflow.
+        """
+        return find_bins(self.bin_edges, values, uniform_bin_width = self._uniform_width)
+
+    def fill(self: _T, values: np.ndarray, weights: Optional[np.ndarray] = None) -> _T:
+        """ Fill the histogram with an array of unbinned values.
+
+        The values and errors squared are accumulated into the existing histogram, so this can be called
+        repeatedly to fill the histogram in chunks (for example, when streaming input). Values which are
+        in the underflow or overflow are ignored, since ``Histogram1D`` doesn't store them.
+
+        Args:
+            values: Values to be filled.
+            weights: Weights of the values. Default: None, in which case each value has a weight of 1.
+        Returns:
+            The histogram, which has been filled in place.
+        """
+        sumw, sumw2 = _accumulate_unbinned_data(
+            bin_edges = self.bin_edges, values = values, weights = weights,
+            uniform_bin_width = self._uniform_width,
+        )
+        # We assign rather than add in place so that integer valued hists are properly promoted.
+        self.y = self.y + sumw
+        self.errors_squared = self.errors_squared + sumw2
+        return self
+
+    def rebin(self: _T, bins: Union[int, np.ndarray]) -> _T:
+        """ Rebin the histogram, either by an integer factor or to a new set of bin edges.
+
+        The values and the errors squared are summed over the merged bins using ``np.add.reduceat``,
+        so the rebinning is vectorized. This is equivalent to ``TH1::Rebin(...)``.
+
+        Note:
+            New bin edges must be a subset of the existing bin edges (up to floating point precision), since
+            we can't split existing bins. If the new bin edges only cover a subset of the existing range, the
+            bins outside of the new range are dropped (in ROOT, they would go into the underflow or overflow,
+            which we don't store).
+
+        Args:
+            bins: Either the number of existing bins to merge into each new bin, or the new bin edges.
+        Returns:
+            New histogram with the updated binning. The existing histogram is not modified.
+        Raises:
+            ValueError: If the rebin factor doesn't divide the number of bins, or if the new bin edges
+                aren't strictly increasing or aren't a subset of the existing bin edges.
+        """
+        n_bins = len(self.bin_edges) - 1
+        if isinstance(bins, (int, np.integer)):
+            if bins < 1 or n_bins % bins != 0:
+                raise ValueError(
+                    f"Rebin factor {bins} must be a positive divisor of the number of bins ({n_bins})."
+                )
+            edge_indices = np.arange(0, n_bins + 1, bins)
+        else:
+            new_bin_edges = np.asarray(bins, dtype = np.float64)
+            if new_bin_edges.ndim != 1 or len(new_bin_edges) < 2 or np.any(np.diff(new_bin_edges) <= 0):
+                raise ValueError(f"New bin edges must be strictly increasing. Given: {new_bin_edges}")
+            # Match each new bin edge to an existing bin edge. We need to check the existing edges on both
+            # sides of the insertion point because the new edges may be slightly above or below due to
+            # floating point precision.
+            # NOTE: The tolerance is relative to the width of the neighboring bins (rather than absolute), so
+            #       that new edges which fall within small bins aren't matched to the closest existing edge.
+            upper = np.clip(np.searchsorted(self.bin_edges, new_bin_edges), 0, n_bins)
+            lower = np.clip(upper - 1, 0, n_bins)
+            widths = np.diff(self.bin_edges)
+            tolerances = 1e-6 * np.minimum(np.append(widths, widths[-1]), np.insert(widths, 0, widths[0]))
+
+            def matches(indices: np.ndarray) -> np.ndarray:
+                return np.abs(self.bin_edges[indices] - new_bin_edges) <= tolerances[indices]
+
+            edge_indices = np.where(matches(upper), upper, lower)
+            if not np.all(matches(edge_indices)) or np.any(np.diff(edge_indices) <= 0):
+                raise ValueError(
+                    f"New bin edges must be a subset of the existing bin edges."
+                    f" New bin edges: {new_bin_edges}, existing bin edges: {self.bin_edges}"
+                )
+
+        # Sum the merged bins. ``reduceat`` sums from each index up to the next index, with the last
+        # group extending to the end of the array, so we restrict the arrays to the upper edge.
+        start_indices = edge_indices[:-1]
+        stop = edge_indices[-1]
+        return type(self)(
+            bin_edges = np.array(self.bin_edges[edge_indices], copy = True),
+            y = np.add.reduceat(self.y[:stop], start_indices),
+            errors_squared = np.add.reduceat(self.errors_squared[:stop], start_indices),
+        )
+
+    def copy(self: _T) -> _T:
         """ Copies the object.
 
         In principle, this should be the same as ``copy.deepcopy(...)``, at least when this was written in
@@ -208,10 +548,8 @@ class Histogram1D:
         implicit copying), so we copy these numpy arrays by hand.
         """
         # We want to copy bin_edges, y, and errors_squared, but not anything else.
-        # Namely, we skip _x here. In principle, it wouldn't really be a problem to
-        # copy, but there may be other "_" fields that we want to skip later, so we
-        # do the right thing now.
-        kwargs = {k: np.array(v, copy = True) for k, v in vars(self).items() if not k.startswith("_")}
+        # Namely, we skip any cached derived quantities, which will be recalculated when needed.
+        kwargs = {k: np.array(getattr(self, k), copy = True) for k in self._fields}
         return type(self)(**kwargs)
 
     def counts_in_interval(self,
@@ -317,19 +655,22 @@ class Histogram1D:
                 f"Passed min_bin {min_bin} which is greater than the max_bin {max_bin}. The min bin must be smaller."
             )
 
-        # Provide the opportunity to scale by bin width
-        widths = np.ones(len(self.y))
-        if multiply_by_bin_width:
-            widths = self.bin_widths
-
         # Integrate by summing up all of the bins and the errors.
         # Perform the integral.
+        # NOTE: We sum the selected bins directly (rather than taking the difference of cumulative sums) to avoid
+        #       losing precision when the values span a large dynamic range.
         # NOTE: We set the upper limits to + 1 from the found value because we want to include the bin
         #       where the upper limit resides. This matches the ROOT convention. Practically, this means
         #       that if the user wants to integrate over 1 bin, then the min bin and max bin should be the same.
         logger.debug(f"Integrating from {min_bin} - {max_bin + 1}")
-        value = np.sum(self.y[min_bin:max_bin + 1] * widths[min_bin:max_bin + 1])
-        error_squared = np.sum(self.errors_squared[min_bin:max_bin + 1] * widths[min_bin:max_bin + 1] ** 2)
+        selected = slice(min_bin, max_bin + 1)
+        if multiply_by_bin_width:
+            widths = self.bin_widths[selected]
+            value = np.sum(self.y[selected] * widths)
+            error_squared = np.sum(self.errors_squared[selected] * widths ** 2)
+        else:
+            value = np.sum(self.y[selected])
+            error_squared = np.sum(self.errors_squared[selected])
 
         return value, np.sqrt(error_squared)
 
@@ -428,22 +769,60 @@ class Histogram1D:
         return self
 
     def __eq__(self, other):
-        """ Check for equality. """
-        attributes = [k for k in vars(self) if not k.startswith("_")]
-        other_attributes = [k for k in vars(other) if not k.startswith("_")]
+        """ Check for equality.
 
-        # As a beginning check, they must have the same attributes available.
-        if attributes != other_attributes:
-            return False
+        Histograms are equal if all of the stored arrays agree (via ``np.allclose``), regardless of how
+        they are stored (ie. a ``Histogram1D`` and a ``CompactHistogram1D`` can be equal).
+        """
+        if not isinstance(other, Histogram1DBase):
+            return NotImplemented
 
         # All attributes are np arrays, so we compare the arrays using ``np.allclose``
-        agreement = [np.allclose(getattr(self, a), getattr(other, a)) for a in attributes]
-        # All arrays must agree.
-        return all(agreement)
+        for attribute in self._fields:
+            value, other_value = getattr(self, attribute), getattr(other, attribute)
+            if np.shape(value) != np.shape(other_value) or not np.allclose(value, other_value):
+                return False
+        return True
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """ Retrieve the state of the object for pickling or writing to YAML.
+
+        We only store the arrays which define the histogram. Derived quantities (such as those
+        which are cached) will be recalculated when needed.
+        """
+        return {k: getattr(self, k) for k in self._fields}
+
+    def to_root(self, name: str, title: str = "") -> Hist:
+        """ Convert the histogram to a ROOT ``TH1D``.
+
+        The binning (including variable binning) is preserved, and the bin contents and the errors
+        squared are copied in bulk. The under- and overflow bins are empty, and the statistics
+        (including the number of entries) are recalculated from the bin contents.
+
+        Args:
+            name: Name of the ROOT hist.
+            title: Title of the ROOT hist. Default: "".
+        Returns:
+            ROOT.TH1D: The ROOT hist.
+        """
+        import ROOT
+
+        bin_edges = np.array(self.bin_edges, dtype = np.float64)
+        hist = ROOT.TH1D(name, title, len(bin_edges) - 1, bin_edges)
+        hist.SetDirectory(0)
+        # Include the under- and overflow bins.
+        contents = np.zeros(len(self.y) + 2)
+        contents[1:-1] = self.y
+        errors_squared = np.zeros(len(self.errors_squared) + 2)
+        errors_squared[1:-1] = self.errors_squared
+        _set_hist_buffers(hist, contents = contents, errors_squared = errors_squared)
+        hist.ResetStats()
+
+        return hist
 
     @staticmethod
     def _from_uproot(hist) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
-        """ Convert a uproot histogram to a set of array for creating a Histogram.
+        """ Convert a uproot3 histogram to a set of array for creating a Histogram.
 
         Note:
             Underflow and overflow bins are excluded!
@@ -464,6 +843,41 @@ class Histogram1D:
 
         return (bin_edges, y, errors)
 
+    @staticmethod
+    def _from_uhi(hist: Any, copy: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """ Convert a histogram implementing the UHI ``PlottableHistogram`` protocol.
+
+        This supports uproot4+, boost-histogram, hist, etc. The values and variances are used without
+        copying them where possible.
+
+        Note:
+            Underflow and overflow bins are excluded!
+
+        Args:
+            hist: Input histogram.
+            copy: If True, copy the arrays. Otherwise, the arrays may be views of the arrays stored in the
+                input histogram. Default: False.
+        Returns:
+            tuple: (bin_edges, y, errors_squared)
+        """
+        (axis,) = hist.axes
+        bin_edges = getattr(axis, "edges", None)
+        if callable(bin_edges):
+            # uproot provides the edges via a method.
+            bin_edges = bin_edges()
+        if bin_edges is None:
+            # The protocol only guarantees that the axis is a sequence of (lower, upper) bin edges.
+            bin_edges = np.array([axis[0][0]] + [axis[i][1] for i in range(len(axis))], dtype = np.float64)
+
+        y = hist.values()
+        errors_squared = hist.variances()
+        if errors_squared is None:
+            # Variances aren't available, so we use the Poisson errors (as is also done by ROOT).
+            errors_squared = np.abs(y)
+
+        convert = np.array if copy else np.asarray
+        return (convert(bin_edges), convert(y), convert(errors_squared))
+
     @staticmethod
     def _from_th1(hist) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """ Convert a TH1 histogram to a Histogram.
@@ -484,23 +898,53 @@ class Histogram1D:
         # Don't include overflow
         bin_edges = get_bin_edges_from_axis(hist.GetXaxis())
         # NOTE: The y value and bin error are stored with the hist, not the axis.
-        y = np.array([hist.GetBinContent(i) for i in range(1, hist.GetXaxis().GetNbins() + 1)])
-        errors = np.array(hist.GetSumw2())
+        y, errors = _get_hist_buffers(hist)
         # Exclude the under/overflow bins
+        y = y[1:-1]
         errors = errors[1:-1]
 
         return (bin_edges, y, errors)
 
     @classmethod
-    def from_existing_hist(cls, hist: Union[Hist, Any]):
+    def from_unbinned_data(cls: Type[_T], bin_edges: np.ndarray,
+                           values: Optional[np.ndarray] = None, weights: Optional[np.ndarray] = None) -> _T:
+        """ Create a histogram from unbinned data.
+
+        This is equivalent to creating a ROOT hist and calling ``TH1::Fill(value, weight)`` for each value,
+        but the values and the errors squared are calculated together in a single vectorized pass.
+        The histogram can be filled further via ``fill(...)``.
+
+        Args:
+            bin_edges: The histogram bin edges.
+            values: Values to be filled. Default: None, which will create an empty histogram.
+            weights: Weights of the values. Default: None, in which case each value has a weight of 1.
+        Returns:
+            Histogram filled with the given values.
+        """
+        bin_edges = np.asarray(bin_edges, dtype = np.float64)
+        if values is None:
+            sumw = np.zeros(len(bin_edges) - 1)
+            sumw2 = np.zeros(len(bin_edges) - 1)
+        else:
+            sumw, sumw2 = _accumulate_unbinned_data(bin_edges = bin_edges, values = values, weights = weights)
+
+        return cls(bin_edges = bin_edges, y = sumw, errors_squared = sumw2)
+
+    @classmethod
+    def from_existing_hist(cls, hist: Union[Hist, Any], copy: bool = False):
         """ Convert an existing histogram.
 
+        Histograms implementing the UHI ``PlottableHistogram`` protocol (such as uproot4+ and boost-histogram)
+        are converted without copying the arrays unless requested. In that case, modifying the arrays in
+        place (including via in-place arithmetic) will also modify the input histogram.
+
         Note:
-            Underflow and overflow bins are excluded! Bins are assumed to be fixed
-            size.
+            Underflow and overflow bins are excluded!
 
         Args:
-            hist (uproot.rootio.TH1* or ROOT.TH1): Histogram to be converted.
+            hist (uproot.rootio.TH1*, UHI PlottableHistogram, or ROOT.TH1): Histogram to be converted.
+            copy: If True, copy the arrays from UHI histograms. ROOT and uproot3 hists are always copied.
+                Default: False.
         Returns:
             Histogram: Dataclass with x, y, and errors
         """
@@ -512,9 +956,12 @@ class Histogram1D:
         except AttributeError:
             # Just use the existing histogram
             pass
-        # "values" is a proxy for if we have an uproot hist.
+        # "values" is a proxy for if we have an uproot hist. For the UHI protocol (which includes uproot4+),
+        # it's a method, while for uproot3, it's a property.
         logger.debug(f"{hist}, {type(hist)}")
-        if hasattr(hist, "values"):
+        if callable(getattr(hist, "values", None)) and hasattr(hist, "axes"):
+            (bin_edges, y, errors_squared) = cls._from_uhi(hist, copy = copy)
+        elif hasattr(hist, "values"):
             (bin_edges, y, errors_squared) = cls._from_uproot(hist)
         else:
             # Handle traditional ROOT hists
@@ -522,12 +969,524 @@ class Histogram1D:
 
         return cls(bin_edges = bin_edges, y = y, errors_squared = errors_squared)
 
-def get_array_from_hist2D(hist: Hist, set_zero_to_NaN: bool = True, return_bin_edges: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+# NOTE: We implement equality in the base class, so the dataclass must not generate it.
+@dataclass(eq = False)
+class Histogram1D(Histogram1DBase):
+    """ Contains histogram data.
+
+    Note:
+        Underflow and overflow bins are excluded!
+
+    Args:
+        bin_edges (np.ndarray): The histogram bin edges.
+        y (np.ndarray): The histogram bin values.
+        errors_squared (np.ndarray): The bin sum weight squared errors.
+
+    Attributes:
+        x (np.ndarray): The bin centers.
+        y (np.ndarray): The bin values.
+        bin_edges (np.ndarray): The bin edges.
+        errors (np.ndarray): The bin errors.
+        errors_squared (np.ndarray): The bin sum weight squared errors.
+    """
+    bin_edges: np.ndarray
+    y: np.ndarray
+    errors_squared: np.ndarray
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """ Set an attribute, invalidating the cache of derived quantities.
+
+        The derived quantities (errors, bin widths, bin centers, etc) depend on the stored arrays, so any
+        reassignment of a stored (ie. not "_" prefixed) attribute invalidates the cache. Note that the
+        arithmetic operators (``+=``, etc) reassign the arrays, so they also invalidate the cache.
+        """
+        if not name.startswith("_"):
+            self.__dict__.pop("_cache", None)
+        super().__setattr__(name, value)
+
+    def _cached(self, key: str, calculate: Callable[[], Any]) -> Any:
+        """ Retrieve a derived quantity from the cache, calculating it if it's not yet available.
+
+        Cached arrays are marked as read only so that they can't be inadvertently modified by the caller.
+
+        Args:
+            key: Name of the derived quantity in the cache.
+            calculate: Function to calculate the derived quantity if it's not in the cache.
+        Returns:
+            The derived quantity.
+        """
+        # We create the cache lazily (rather than in ``__init__``) so that it's also available for objects
+        # which were constructed without calling ``__init__`` (such as when loading from YAML).
+        cache = self.__dict__.setdefault("_cache", {})
+        try:
+            return cache[key]
+        except KeyError:
+            value = calculate()
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+            cache[key] = value
+            return value
+
+    def invalidate_cache(self) -> None:
+        """ Invalidate the cache of derived quantities.
+
+        The cache is invalidated automatically when the stored arrays are reassigned, but modifying
+        the elements of the arrays in place (ie. ``h.y[3] = 2``) can't be detected, so this must be called
+        after such a modification.
+
+        Args:
+            None.
+        Returns:
+            None.
+        """
+        self.__dict__.pop("_cache", None)
+
+class _SharedBinning:
+    """ Immutable bin edges, which are shared between all compact histograms with the same binning.
+
+    Since the bin edges can't change, quantities derived from them (bin widths, bin centers, etc) are
+    cached here, such that they are also shared between the histograms.
+
+    Args:
+        edges: Bin edges. They must already be read only.
+
+    Attributes:
+        edges: Bin edges.
+        cache: Derived quantities which only depend on the bin edges.
+    """
+    __slots__ = ("edges", "cache", "__weakref__")
+
+    def __init__(self, edges: np.ndarray):
+        self.edges = edges
+        self.cache: Dict[str, Any] = {}
+
+# Binnings are interned based on the values of the bin edges. They are only kept alive by the histograms
+# which use them, so unused binnings are automatically removed.
+_shared_binnings: "weakref.WeakValueDictionary[bytes, _SharedBinning]" = weakref.WeakValueDictionary()
+
+def _get_shared_binning(bin_edges: Union[np.ndarray, _SharedBinning]) -> _SharedBinning:
+    """ Retrieve the shared binning corresponding to the given bin edges, creating it if necessary.
+
+    Args:
+        bin_edges: Bin edges, or an existing shared binning (which will be returned directly).
+    Returns:
+        Shared binning with the given bin edges.
+    """
+    if isinstance(bin_edges, _SharedBinning):
+        return bin_edges
+    edges = np.array(bin_edges, dtype = np.float64)
+    key = edges.tobytes()
+    binning = _shared_binnings.get(key)
+    if binning is None:
+        edges.flags.writeable = False
+        binning = _SharedBinning(edges)
+        _shared_binnings[key] = binning
+    return binning
+
+class CompactHistogram1D(Histogram1DBase):
+    """ Memory efficient histogram, intended for keeping large numbers of (small) histograms in memory.
+
+    It provides the same interface as ``Histogram1D``, but:
+
+    - The histogram is stored in ``__slots__``, so there is no per instance ``__dict__``.
+    - The bin edges are stored as read only ``float64`` arrays, which are shared between all histograms
+      with the same binning. Consequently, the bin edges can be replaced, but not modified in place.
+    - The values and errors squared can optionally be stored with a reduced precision (ie. ``float32``).
+    - Only quantities derived from the bin edges (bin widths, bin centers) are cached (on the shared
+      binning). Other derived quantities (such as the errors) are recalculated when accessed.
+
+    Note:
+        Underflow and overflow bins are excluded!
+
+    Args:
+        bin_edges: The histogram bin edges.
+        y: The histogram bin values.
+        errors_squared: The bin sum weight squared errors.
+        dtype: Type used to store the values and errors squared. Default: None, which will store
+            the values as given.
+    """
+    __slots__ = ("_binning", "_dtype", "y", "errors_squared")
+    # Derived quantities which only depend on the bin edges, so they can be cached on the shared binning.
+    _binning_quantities = frozenset(["bin_widths", "x", "uniform_bin_width"])
+
+    def __init__(self, bin_edges: Union[np.ndarray, _SharedBinning], y: np.ndarray, errors_squared: np.ndarray,
+                 dtype: Optional[Union[str, np.dtype, type]] = None):
+        # The dtype must be set first so that it can be applied when setting the values.
+        self._dtype = None if dtype is None else np.dtype(dtype)
+        super().__init__(bin_edges = bin_edges, y = y, errors_squared = errors_squared)  # type: ignore
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """ Set an attribute, converting the values and errors squared to the stored dtype if necessary. """
+        if name in ("y", "errors_squared") and self._dtype is not None:
+            value = np.asarray(value, dtype = self._dtype)
+        super().__setattr__(name, value)
+
+    @property
+    def bin_edges(self) -> np.ndarray:
+        """ The histogram bin edges. They are shared between histograms, and therefore read only. """
+        return self._binning.edges
+
+    @bin_edges.setter
+    def bin_edges(self, bin_edges: Union[np.ndarray, _SharedBinning]) -> None:
+        self._binning = _get_shared_binning(bin_edges)
+
+    @property
+    def dtype(self) -> Optional[np.dtype]:
+        """ Type used to store the values and errors squared, or None if they're stored as given. """
+        return self._dtype
+
+    def _cached(self, key: str, calculate: Callable[[], Any]) -> Any:
+        """ Retrieve a derived quantity, using the shared binning cache if it only depends on the bin edges.
+
+        Args:
+            key: Name of the derived quantity.
+            calculate: Function to calculate the derived quantity if it's not available in the cache.
+        Returns:
+            The derived quantity.
+        """
+        if key not in self._binning_quantities:
+            return calculate()
+        cache = self._binning.cache
+        try:
+            return cache[key]
+        except KeyError:
+            value = calculate()
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+            cache[key] = value
+            return value
+
+    def copy(self) -> "CompactHistogram1D":
+        """ Copies the object, sharing the (immutable) binning. """
+        return type(self)(
+            bin_edges = self._binning, y = np.array(self.y, copy = True),
+            errors_squared = np.array(self.errors_squared, copy = True), dtype = self._dtype,
+        )
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """ Retrieve the state of the object for pickling or writing to YAML. """
+        state = super().__getstate__()
+        if self._dtype is not None:
+            state["dtype"] = self._dtype.name
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """ Restore the state of the object when unpickling or reading from YAML. """
+        self.__init__(**state)  # type: ignore
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(bin_edges={self.bin_edges!r}, y={self.y!r},"
+            f" errors_squared={self.errors_squared!r})"
+        )
+
+def _axis_range(axis: Any) -> Optional[Tuple[int, int]]:
+    """ Retrieve the range (in bins) which is set on an axis.
+
+    Args:
+        axis (ROOT.TAxis): Axis from which the range should be retrieved.
+    Returns:
+        (first, last) bins of the range, or None if no range is set.
+    """
+    if not axis.TestBit(axis.kAxisRange):
+        return None
+    return axis.GetFirst(), axis.GetLast()
+
+class SparseHistogram:
+    """ Sparse histogram contents, stored in a coordinate (COO) format.
+
+    The filled bins of a ``THnSparse`` are extracted once into arrays of the bin coordinates, the bin
+    contents, and the sum of the weights squared. Projections are then performed with vectorized masks
+    and ``np.bincount``, which is substantially faster than ``THnSparse::Projection(...)`` (which iterates
+    over all of the filled bins) when projecting the same hist many times.
+
+    To use it with a ``HistProjector``, convert the hist once (via ``from_existing_hist(...)``) and return
+    the ``SparseHistogram`` from ``get_hist(...)``. The axes are copies of the ``TAxis`` objects of the
+    original hist, so ``HistAxisRange`` cuts are applied to them as usual (via ``GetAxis(...)``). The
+    projection follows the ``THnBase::Projection(...)`` conventions: ranges on the axes select the bins
+    (including the under- and overflow if no range is set), and ranges on the projected axes also restrict
+    the output binning to the selected range.
+
+    Note:
+        Bin coordinates follow the ROOT convention, so they are 1-indexed, with 0 and ``n_bins + 1``
+        corresponding to the underflow and overflow, respectively.
+
+    Args:
+        name: Name of the histogram.
+        axes (list[ROOT.TAxis]): Axes of the histogram.
+        coordinates: Bin coordinates of the filled bins, with shape ``(n_filled_bins, n_dimensions)``.
+        y: Bin contents of the filled bins.
+        errors_squared: Sum of the weights squared of the filled bins.
+        entries: Number of entries in the histogram. Default: None, in which case, the sum of the bin contents
+            will be used.
+    """
+    def __init__(self, name: str, axes: List[Any], coordinates: np.ndarray, y: np.ndarray,
+                 errors_squared: np.ndarray, entries: Optional[float] = None):
+        self.name = name
+        self.axes = axes
+        self.coordinates = coordinates
+        self.y = y
+        self.errors_squared = errors_squared
+        if entries is None:
+            entries = np.sum(y)
+        self.entries = entries
+
+    @classmethod
+    def from_existing_hist(cls, hist: Hist) -> "SparseHistogram":
+        """ Extract the contents of a ``THnSparse`` (or ``THn``).
+
+        Args:
+            hist (ROOT.THnBase): Histogram to be converted.
+        Returns:
+            The sparse histogram.
+        """
+        n_dimensions = hist.GetNdimensions()
+        n_filled_bins = hist.GetNbins()
+        coordinates = np.zeros((n_filled_bins, n_dimensions), dtype = np.int32)
+        y = np.zeros(n_filled_bins)
+        errors_squared = np.zeros(n_filled_bins)
+        # ``GetBinContent(...)`` fills the coordinates of the bin into the passed array.
+        bin_coordinates = np.zeros(n_dimensions, dtype = np.int32)
+        for i in range(n_filled_bins):
+            y[i] = hist.GetBinContent(i, bin_coordinates)
+            coordinates[i] = bin_coordinates
+            errors_squared[i] = hist.GetBinError2(i)
+
+        axes = [hist.GetAxis(i).Clone() for i in range(n_dimensions)]
+        return cls(
+            name = hist.GetName(), axes = axes, coordinates = coordinates, y = y,
+            errors_squared = errors_squared, entries = hist.GetEntries(),
+        )
+
+    # ROOT like accessors, so that the sparse hist can be used in place of a THn with ``HistAxisRange``, etc.
+    def GetName(self) -> str:
+        return self.name
+
+    def GetNdimensions(self) -> int:
+        return len(self.axes)
+
+    def GetAxis(self, i: int) -> Any:
+        return self.axes[i]
+
+    def GetEntries(self) -> float:
+        return self.entries
+
+    def GetSumw(self) -> float:
+        return float(np.sum(self.y))
+
+    def GetSumw2(self) -> float:
+        return float(np.sum(self.errors_squared))
+
+    def selection_mask(self) -> np.ndarray:
+        """ Determine which filled bins are selected by the ranges which are set on the axes.
+
+        Args:
+            None.
+        Returns:
+            Mask of the selected filled bins.
+        """
+        mask = np.ones(len(self.y), dtype = bool)
+        for i, axis in enumerate(self.axes):
+            axis_range = _axis_range(axis)
+            if axis_range is not None:
+                first, last = axis_range
+                mask &= (self.coordinates[:, i] >= first) & (self.coordinates[:, i] <= last)
+        return mask
+
+    def project_to_arrays(self, projection_axes: Sequence[int],
+                          weights: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, List[np.ndarray]]:
+        """ Project the hist onto the given axes, returning arrays.
+
+        Args:
+            projection_axes: Axes onto which the projection will be performed. The first axis will be the
+                first dimension of the output, etc.
+            weights: Multiplicity of each filled bin in the projection (for example, to project the union
+                of several selections in one pass). It is combined with the selection from the ranges set
+                on the axes (via ``selection_mask()``). Default: None, which corresponds to a multiplicity
+                of one for each filled bin.
+        Returns:
+            (y, errors_squared, bin_edges), where y and errors_squared include the under- and overflow
+                bins (with shape ``(n_bins_axis_0 + 2, n_bins_axis_1 + 2, ...)``), and bin_edges contains
+                the bin edges for each projected axis.
+        """
+        multiplicity = self.selection_mask()
+        if weights is not None:
+            multiplicity = multiplicity * weights
+        selected = multiplicity != 0
+        weights = multiplicity[selected]
+        coordinates = self.coordinates[selected]
+
+        shape = []
+        output_coordinates = []
+        bin_edges = []
+        for i in projection_axes:
+            axis = self.axes[i]
+            n_bins = axis.GetNbins()
+            axis_bin_edges = get_bin_edges_from_axis(axis)
+            axis_coordinates = coordinates[:, i]
+            axis_range = _axis_range(axis)
+            if axis_range is not None:
+                # Restrict the output binning to the range. The clip only matters if the range includes
+                # the under- or overflow, in which case those values stay in the under- or overflow.
+                first, last = max(axis_range[0], 1), min(axis_range[1], n_bins)
+                axis_bin_edges = axis_bin_edges[first - 1:last + 1]
+                axis_coordinates = np.clip(axis_coordinates - (first - 1), 0, last - first + 2)
+                n_bins = last - first + 1
+            shape.append(n_bins + 2)
+            output_coordinates.append(axis_coordinates)
+            bin_edges.append(axis_bin_edges)
+
+        flat_indices = np.ravel_multi_index(output_coordinates, shape)
+        size = int(np.prod(shape))
+        y = np.bincount(flat_indices, weights = self.y[selected] * weights, minlength = size)
+        errors_squared = np.bincount(
+            flat_indices, weights = self.errors_squared[selected] * weights, minlength = size
+        )
+        return y.reshape(shape), errors_squared.reshape(shape), bin_edges
+
+    def project(self, projection_axes: Sequence[int], name: str,
+                weights: Optional[np.ndarray] = None) -> Hist:
+        """ Project the hist onto the given axes.
+
+        Args:
+            projection_axes: Axes onto which the projection will be performed. The first axis will be the
+                x axis of the output hist, etc.
+            name: Name of the projected hist.
+            weights: Multiplicity of each filled bin in the projection. See ``project_to_arrays(...)``.
+        Returns:
+            ROOT.TH1: The projected hist (TH1D, TH2D, or TH3D, depending on the number of projection axes).
+        """
+        import ROOT
+
+        hist_types = {1: ROOT.TH1D, 2: ROOT.TH2D, 3: ROOT.TH3D}
+        if len(projection_axes) not in hist_types:
+            raise ValueError(
+                f"Projecting onto {len(projection_axes)} axes is not supported for a sparse hist. Must be 1-3 axes."
+            )
+        y, errors_squared, bin_edges = self.project_to_arrays(projection_axes = projection_axes, weights = weights)
+
+        args: List[Any] = []
+        for axis_bin_edges in bin_edges:
+            args.extend([len(axis_bin_edges) - 1, np.array(axis_bin_edges, dtype = np.float64)])
+        hist = hist_types[len(projection_axes)](name, name, *args)
+        hist.SetDirectory(0)
+        # The arrays are indexed as [x][y][z], so we transpose them to match the ROOT convention.
+        _set_hist_buffers(hist, contents = y.T, errors_squared = errors_squared.T)
+        hist.SetEntries(self.entries)
+
+        output_axes = [hist.GetXaxis(), hist.GetYaxis(), hist.GetZaxis()]
+        for output_axis, i in zip(output_axes, projection_axes):
+            output_axis.SetTitle(self.axes[i].GetTitle())
+
+        return hist
+
+# Types of the arrays which store the bin contents of ROOT hists (via inheritance), along with the
+# corresponding numpy dtypes.
+_TArray_dtypes = [
+    ("TArrayD", np.float64),
+    ("TArrayF", np.float32),
+    ("TArrayI", np.int32),
+    ("TArrayS", np.int16),
+    ("TArrayC", np.int8),
+    ("TArrayL64", np.int64),
+]
+
+def _root_buffer_to_array(buffer: Any, size: int, dtype: Any) -> np.ndarray:
+    """ Copy the values of a buffer returned by ROOT (such as from ``TArrayD::GetArray()``) into an array.
+
+    PyROOT doesn't know the size of the underlying C array, so it must be set explicitly before the buffer is
+    read. The values are copied, so the array won't refer to memory owned by ROOT.
+
+    Args:
+        buffer: Buffer returned by ROOT. For ROOT 6.22+, this is a cppyy ``LowLevelView``.
+        size: Number of values in the buffer.
+        dtype: Type of the values stored in the buffer.
+    Returns:
+        Copy of the values in the buffer, converted to float64.
+    """
+    if hasattr(buffer, "reshape"):
+        # cppyy ``LowLevelView`` (ROOT 6.22+). ``reshape`` sets the size of the view.
+        reshaped = buffer.reshape((size,))
+        # Depending on the version, the view is either reshaped in place or a reshaped view is returned.
+        if reshaped is not None:
+            buffer = reshaped
+    else:
+        # PyROOT buffer (before ROOT 6.22).
+        buffer.SetSize(size)
+    return np.frombuffer(buffer, dtype = dtype).astype(np.float64)
+
+def _get_hist_buffers(hist: Hist) -> Tuple[np.ndarray, np.ndarray]:
+    """ Read the bin contents and the sum of the weights squared of a ROOT hist in bulk.
+
+    The arrays are read directly from the underlying buffers (rather than bin-by-bin), and then
+    reshaped according to the ROOT global bin convention.
+
+    Note:
+        The under- and overflow bins are included!
+
+    Args:
+        hist (ROOT.TH1): Histogram to be converted.
+    Returns:
+        (contents, errors_squared), each with shape ``(n_bins_z + 2, n_bins_y + 2, n_bins_x + 2)``, with
+            only the axes corresponding to the hist dimension (ie. ``(n_bins_x + 2,)`` for a TH1).
+    """
+    n_cells = hist.GetNcells()
+    axes = [hist.GetXaxis(), hist.GetYaxis(), hist.GetZaxis()][:hist.GetDimension()]
+    # ROOT stores the bins with the x axis varying the fastest, so the axes are reversed relative to numpy.
+    shape = tuple(axis.GetNbins() + 2 for axis in reversed(axes))
+
+    # Profiles store the sums rather than the bin contents, so they need to be retrieved bin-by-bin.
+    is_profile = any(hist.InheritsFrom(name) for name in ["TProfile", "TProfile2D", "TProfile3D"])
+    # The type of the contents is determined by the TArray from which the concrete hist class inherits
+    # (ie. TArrayF for TH1F).
+    dtype = next((dtype for name, dtype in _TArray_dtypes if hist.InheritsFrom(name)), None)
+    if is_profile or dtype is None:
+        contents = np.array([hist.GetBinContent(i) for i in range(n_cells)], dtype = np.float64)
+        errors_squared = np.array([hist.GetBinError(i) for i in range(n_cells)], dtype = np.float64) ** 2
+    else:
+        contents = _root_buffer_to_array(hist.GetArray(), size = n_cells, dtype = dtype)
+        if hist.GetSumw2N() > 0:
+            # The sum of the weights squared is always stored as doubles.
+            errors_squared = _root_buffer_to_array(hist.GetSumw2().GetArray(), size = n_cells, dtype = np.float64)
+        else:
+            # Without sumw2, ROOT uses sqrt(|content|) for the errors.
+            errors_squared = np.abs(contents)
+
+    return contents.reshape(shape), errors_squared.reshape(shape)
+
+def _set_hist_buffers(hist: Hist, contents: np.ndarray, errors_squared: np.ndarray) -> None:
+    """ Set the bin contents and the sum of the weights squared of a ROOT hist in bulk.
+
+    This is the inverse of ``_get_hist_buffers(...)``.
+
+    Note:
+        The under- and overflow bins must be included!
+
+    Args:
+        hist (ROOT.TH1): Histogram whose contents should be set. ``TH1::SetContent(...)`` sets each bin
+            from the double values, so the contents are converted to the type stored by the hist.
+        contents: Bin contents, with shape ``(n_bins_z + 2, n_bins_y + 2, n_bins_x + 2)``, with only the axes
+            corresponding to the hist dimension (ie. ``(n_bins_x + 2,)`` for a TH1).
+        errors_squared: Sum of the weights squared, with the same shape as the contents.
+    Returns:
+        None. The hist is modified in place.
+    """
+    # Ensure that the sumw2 array exists.
+    if hist.GetSumw2N() == 0:
+        hist.Sumw2(True)
+    # ROOT stores the bins with the x axis varying the fastest, which matches the C ordering of the arrays.
+    hist.SetContent(np.ascontiguousarray(contents, dtype = np.float64).ravel())
+    flat_errors_squared = np.ascontiguousarray(errors_squared, dtype = np.float64).ravel()
+    hist.GetSumw2().Set(len(flat_errors_squared), flat_errors_squared)
+
+def get_array_from_hist2D(hist: Hist, set_zero_to_NaN: bool = True, return_bin_edges: bool = False,
+                          return_errors: bool = False, mesh: bool = True) -> Tuple[np.ndarray, ...]:
     """ Extract x, y, and bin values from a 2D ROOT histogram.
 
     Converts the histogram into a numpy array, and suitably processes it for a surface plot
     by removing 0s (which can cause problems when taking logs), and returning a set of (x, y) mesh
-    values utilziing either the bin edges or bin centers.
+    values utilziing either the bin edges or bin centers. The bin values (and errors) are read in bulk
+    from the hist buffers.
 
     Note:
         This is a different format than the 1D version!
@@ -537,24 +1496,24 @@ def get_array_from_hist2D(hist: Hist, set_zero_to_NaN: bool = True, return_bin_e
         set_zero_to_NaN: If true, set 0 in the array to NaN. Useful with matplotlib so that it will
             ignore the values when plotting. See comments in this function for more details. Default: True.
         return_bin_edges: Return x and y using bin edges instead of bin centers.
+        return_errors: If true, also return the bin errors (in the same format as the bin values). Default: False.
+        mesh: If true, return the x and y values on a grid (from np.meshgrid). Otherwise, return the x and y
+            values for each axis directly, which avoids allocating the grid. Default: True.
     Returns:
         Contains (x values, y values, numpy array of hist data) where (x, y) are values on a
-            grid (from np.meshgrid) using the selected bin values.
+            grid (from np.meshgrid) using the selected bin values. If ``return_errors`` is True, the
+            numpy array of hist errors is also included at the end.
     """
     # Process the hist into a suitable state
-    # NOTE: The shape specific can be somewhat confusing (ie. I would naviely expected to specify the x first.)
-    # This says that the ``GetYaxis().GetNbins()`` number of rows and ``GetXaxis().GetNbins()`` number of columns.
-    shape = (hist.GetYaxis().GetNbins(), hist.GetXaxis().GetNbins())
-    # To keep consistency with the root_numpy 2D hist format, we transpose the final result
-    # This format has x values as columns.
-    hist_array = np.array([hist.GetBinContent(x) for x in range(1, hist.GetNcells()) if not hist.IsBinUnderflow(x) and not hist.IsBinOverflow(x)])
-    # The hist_array was linear, so we need to shape it into our expected 2D values.
-    hist_array = hist_array.reshape(shape)
-    # Transpose the array to better match expectations
+    # NOTE: The shape of the contents can be somewhat confusing (ie. I would naviely expected to specify
+    #       the x first.) It has ``GetYaxis().GetNbins() + 2`` number of rows and ``GetXaxis().GetNbins() + 2``
+    #       number of columns.
+    contents, errors_squared = _get_hist_buffers(hist)
+    # Remove the under- and overflow, and then transpose the array to better match expectations.
     # In particular, by transposing the array, it means that ``thist_array[1][0]`` gives the 2nd x
     # value (x_index = 1) and the 1st y value (y_index = 1). This is as we would expect. This is also
     # the same convention as used by root_numpy
-    hist_array = hist_array.T
+    hist_array = contents[1:-1, 1:-1].T
     # Set all 0s to nan to get similar behavior to ROOT. In ROOT, it will basically ignore 0s. This is
     # especially important for log plots. Matplotlib doesn't handle 0s as well, since it attempts to
     # plot them and then will throw exceptions when the log is taken.
@@ -563,43 +1522,26 @@ def get_array_from_hist2D(hist: Hist, set_zero_to_NaN: bool = True, return_bin_e
     if set_zero_to_NaN:
         hist_array[hist_array == 0] = np.nan
 
-    if return_bin_edges:
-        # Bin edges
-        x_bin_edges = get_bin_edges_from_axis(hist.GetXaxis())
-        y_bin_edges = get_bin_edges_from_axis(hist.GetYaxis())
-
-        # NOTE: The addition of epsilon to the max is extremely important! Otherwise, the x and y
-        #       ranges will be one bin short since ``arange`` is not inclusive. This could also be resolved
-        #       by using ``linspace``, but I think this approach is perfectly fine.
-        # NOTE: This epsilon is smaller than the one in ``utils`` because we are sometimes dealing
-        #       with small times (~ns). The other value is larger because (I seem to recall) that
-        #       smaller values didn't always place nice with ROOT, but it is fine here, since we're
-        #       working with numpy.
-        # NOTE: This should be identical to taking the min and max of the axis using
-        #       ``TAxis.GetXmin()`` and ``TAxis.GetXmax()``, but I prefer this approach.
-        epsilon = 1e-9
-        x_range = np.arange(
-            np.amin(x_bin_edges),
-            np.amax(x_bin_edges) + epsilon,
-            hist.GetXaxis().GetBinWidth(1)
-        )
-        y_range = np.arange(
-            np.amin(y_bin_edges),
-            np.amax(y_bin_edges) + epsilon,
-            hist.GetYaxis().GetBinWidth(1)
-        )
-    else:
+    # Bin edges
+    x_range = get_bin_edges_from_axis(hist.GetXaxis())
+    y_range = get_bin_edges_from_axis(hist.GetYaxis())
+    if not return_bin_edges:
         # We want an array of bin centers
-        x_range = np.array([hist.GetXaxis().GetBinCenter(i) for i in range(1, hist.GetXaxis().GetNbins() + 1)])
-        y_range = np.array([hist.GetYaxis().GetBinCenter(i) for i in range(1, hist.GetYaxis().GetNbins() + 1)])
+        x_range = (x_range[1:] + x_range[:-1]) / 2
+        y_range = (y_range[1:] + y_range[:-1]) / 2
 
-    X, Y = np.meshgrid(x_range, y_range)
+    if mesh:
+        x_range, y_range = np.meshgrid(x_range, y_range)
 
-    return (X, Y, hist_array)
+    if return_errors:
+        return (x_range, y_range, hist_array, np.sqrt(errors_squared[1:-1, 1:-1].T))
+    return (x_range, y_range, hist_array)
 
 def get_bin_edges_from_axis(axis) -> np.ndarray:
     """ Get bin edges from a ROOT hist axis.
 
+    The edges are read in bulk from the axis, which properly supports variable binning.
+
     Note:
         Doesn't include over- or underflow bins!
 
@@ -608,12 +1550,12 @@ def get_bin_edges_from_axis(axis) -> np.ndarray:
     Returns:
         Array containing the bin edges.
     """
-    # Don't include over- or underflow bins
-    bins = range(1, axis.GetNbins() + 1)
-    # Bin edges
-    bin_edges = np.empty(len(bins) + 1)
-    bin_edges[:-1] = [axis.GetBinLowEdge(i) for i in bins]
-    bin_edges[-1] = axis.GetBinUpEdge(axis.GetNbins())
-
-    return bin_edges
+    n_bins = axis.GetNbins()
+    if axis.IsVariableBinSize():
+        # The edges are stored in the axis, so we just copy them.
+        return _root_buffer_to_array(axis.GetXbins().GetArray(), size = n_bins + 1, dtype = np.float64)
+    # Fixed binning, so the edges aren't stored and we need to calculate them. We calculate them in the same
+    # way as ``TAxis::GetBinLowEdge(...)`` so that they're identical (``np.linspace`` can differ in the last bits).
+    bin_width = (axis.GetXmax() - axis.GetXmin()) / n_bins
+    return axis.GetXmin() + np.arange(n_bins + 1) * bin_width
 
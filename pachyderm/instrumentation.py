@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+
+""" Opt-in timing and counting instrumentation.
+
+Instrumentation is disabled by default, in which case the timers and counters are no-ops with minimal
+overhead. It is enabled for the current context (ie. thread or asyncio task) via ``enable()``, which
+collects aggregate statistics for everything which runs within the context, and forwards each measurement
+to the given sinks. Objects can also keep their own statistics (such as ``HistProjector.statistics``),
+which are only updated while instrumentation is enabled.
+
+.. code-block:: python
+
+    >>> with instrumentation.enable(sinks = [instrumentation.logging_sink(logger)]) as inst:
+    ...     projector.project()
+    >>> print(inst.statistics.report())
+    >>> print(projector.statistics.report())
+
+.. codeauthor:: Raymond Ehlers <raymond.ehlers@cern.ch>, Yale University
+"""
+
+import contextlib
+import contextvars
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+# A sink receives each measurement as (kind, name, value), where kind is "timer" or "counter".
+Sink = Callable[[str, str, float], None]
+
+class Statistics:
+    """ Accumulated timers and counters.
+
+    Attributes:
+        times: Total time in seconds spent in each timer.
+        calls: Number of calls of each timer.
+        counters: Value of each counter.
+    """
+    __slots__ = ("times", "calls", "counters")
+
+    def __init__(self) -> None:
+        self.times: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self.counters: Dict[str, float] = {}
+
+    def add_time(self, name: str, elapsed: float) -> None:
+        """ Record a timer measurement.
+
+        Args:
+            name: Name of the timer.
+            elapsed: Elapsed time in seconds.
+        Returns:
+            None.
+        """
+        self.times[name] = self.times.get(name, 0.0) + elapsed
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """ Increment a counter.
+
+        Args:
+            name: Name of the counter.
+            value: Value by which the counter should be incremented. Default: 1.
+        Returns:
+            None.
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, other: "Statistics") -> None:
+        """ Merge the measurements from another set of statistics into this one.
+
+        Args:
+            other: Statistics to be merged.
+        Returns:
+            None.
+        """
+        for name, elapsed in other.times.items():
+            self.times[name] = self.times.get(name, 0.0) + elapsed
+            self.calls[name] = self.calls.get(name, 0) + other.calls[name]
+        for name, value in other.counters.items():
+            self.increment(name, value)
+
+    def reset(self) -> None:
+        """ Reset all of the measurements. """
+        self.times.clear()
+        self.calls.clear()
+        self.counters.clear()
+
+    def as_dict(self) -> Dict[str, Any]:
+        """ Convert the statistics to a dict (which can be stored as JSON or YAML).
+
+        Args:
+            None.
+        Returns:
+            Dict containing the timers (total time and number of calls) and the counters.
+        """
+        return {
+            "timers": {name: {"time": self.times[name], "calls": self.calls[name]} for name in self.times},
+            "counters": dict(self.counters),
+        }
+
+    def report(self) -> str:
+        """ Format the statistics into a table, with the timers sorted by the total time.
+
+        Args:
+            None.
+        Returns:
+            The formatted table.
+        """
+        lines = []
+        for name in sorted(self.times, key = lambda n: self.times[n], reverse = True):
+            lines.append(
+                f"{name:<32} {self.times[name] * 1e3:12.3f} ms {self.calls[name]:8d} calls"
+                f" {self.times[name] / self.calls[name] * 1e6:12.1f} us/call"
+            )
+        for name, value in self.counters.items():
+            lines.append(f"{name:<32} {value:12g}")
+        return "\n".join(lines)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(times={self.times!r}, calls={self.calls!r}, counters={self.counters!r})"
+
+class Instrumentation:
+    """ Collects the measurements for a context in which instrumentation is enabled.
+
+    Args:
+        sinks: Sinks to which each measurement is forwarded. Default: None.
+
+    Attributes:
+        statistics: Aggregate statistics of all measurements within the context.
+        sinks: Sinks to which each measurement is forwarded.
+    """
+    def __init__(self, sinks: Optional[Iterable[Sink]] = None):
+        self.statistics = Statistics()
+        self.sinks: List[Sink] = list(sinks) if sinks else []
+
+    def record_time(self, name: str, elapsed: float, local: Optional[Statistics] = None) -> None:
+        """ Record a timer measurement. """
+        self.statistics.add_time(name, elapsed)
+        if local is not None:
+            local.add_time(name, elapsed)
+        for sink in self.sinks:
+            sink("timer", name, elapsed)
+
+    def record_count(self, name: str, value: float, local: Optional[Statistics] = None) -> None:
+        """ Record a counter increment. """
+        self.statistics.increment(name, value)
+        if local is not None:
+            local.increment(name, value)
+        for sink in self.sinks:
+            sink("counter", name, value)
+
+_active = contextvars.ContextVar(
+    "pachyderm_instrumentation", default = None
+)  # type: contextvars.ContextVar[Optional[Instrumentation]]
+
+def current() -> Optional[Instrumentation]:
+    """ Retrieve the instrumentation which is enabled in the current context.
+
+    Args:
+        None.
+    Returns:
+        The enabled instrumentation, or None if instrumentation is disabled.
+    """
+    return _active.get()
+
+@contextlib.contextmanager
+def enable(sinks: Optional[Iterable[Sink]] = None,
+           instrumentation: Optional[Instrumentation] = None) -> Iterator[Instrumentation]:
+    """ Enable instrumentation within the context.
+
+    Args:
+        sinks: Sinks to which each measurement is forwarded. Only used if ``instrumentation`` isn't passed.
+            Default: None.
+        instrumentation: Existing instrumentation to continue collecting into. Default: None, in which case
+            a new instrumentation object is created.
+    Returns:
+        The enabled instrumentation, which contains the aggregate statistics.
+    """
+    if instrumentation is None:
+        instrumentation = Instrumentation(sinks = sinks)
+    token = _active.set(instrumentation)
+    try:
+        yield instrumentation
+    finally:
+        _active.reset(token)
+
+class _Timer:
+    """ Context manager which records the elapsed time into the enabled instrumentation. """
+    __slots__ = ("instrumentation", "name", "local", "start")
+
+    def __init__(self, instrumentation: Instrumentation, name: str, local: Optional[Statistics]):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.local = local
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.instrumentation.record_time(self.name, time.perf_counter() - self.start, local = self.local)
+
+# Shared no-op context manager for when instrumentation is disabled.
+_null_timer = contextlib.nullcontext() if hasattr(contextlib, "nullcontext") else contextlib.suppress()
+
+def timer(name: str, local: Optional[Statistics] = None) -> Any:
+    """ Time the enclosed block if instrumentation is enabled.
+
+    Args:
+        name: Name of the timer.
+        local: Additional statistics (say, of a particular object) in which the measurement should be
+            recorded. Default: None.
+    Returns:
+        Context manager which times the enclosed block.
+    """
+    instrumentation = _active.get()
+    if instrumentation is None:
+        return _null_timer
+    return _Timer(instrumentation, name, local)
+
+def increment(name: str, value: float = 1, local: Optional[Statistics] = None) -> None:
+    """ Increment a counter if instrumentation is enabled.
+
+    Args:
+        name: Name of the counter.
+        value: Value by which the counter should be incremented. Default: 1.
+        local: Additional statistics (say, of a particular object) in which the increment should be
+            recorded. Default: None.
+    Returns:
+        None.
+    """
+    instrumentation = _active.get()
+    if instrumentation is not None:
+        instrumentation.record_count(name, value, local = local)
+
+def logging_sink(sink_logger: Optional[logging.Logger] = None, level: int = logging.DEBUG) -> Sink:
+    """ Create a sink which logs each measurement.
+
+    Args:
+        sink_logger: Logger to use. Default: None, which uses the logger of this module.
+        level: Level at which the measurements are logged. Default: DEBUG.
+    Returns:
+        The sink.
+    """
+    log = sink_logger if sink_logger is not None else logger
+
+    def sink(kind: str, name: str, value: float) -> None:
+        if log.isEnabledFor(level):
+            log.log(level, f"{kind} {name}: {value:g}")
+    return sink
@@ -5,12 +5,18 @@
 .. codeauthor:: Raymond Ehlers <raymond.ehlers@cern.ch>, Yale University
 """
 
-import copy
+from collections import ChainMap, OrderedDict
 import enum
+import hashlib
 import logging
-from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+import numbers
+import numpy as np
+import os
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple, Union
 
 from pachyderm import generic_class
+from pachyderm import histogram
+from pachyderm import instrumentation
 from pachyderm.typing_helpers import Hist, Axis
 
 # Setup logger
@@ -26,6 +32,24 @@ class TH1AxisType(enum.Enum):
     y_axis = 1
     z_axis = 2
 
+# Map from the TH1 axis value to the name of the function which retrieves that axis.
+_TH1_axis_getters = {
+    TH1AxisType.x_axis.value: "GetXaxis",
+    TH1AxisType.y_axis.value: "GetYaxis",
+    TH1AxisType.z_axis.value: "GetZaxis",
+}
+
+def _is_THn(hist: Hist) -> bool:
+    """ Determine whether a hist should be treated as a THn.
+
+    Args:
+        hist: Histogram to be checked.
+    Returns:
+        True if the hist is a THnBase derived hist or a sparse hist.
+    """
+    # THnBase defines ProjectionND and Projection, so we will use those as proxies.
+    return isinstance(hist, histogram.SparseHistogram) or (hasattr(hist, "ProjectionND") and hasattr(hist, "Projection"))
+
 def hist_axis_func(axis_type: enum.Enum) -> Callable[[Hist], Axis]:
     """ Wrapper to retrieve the axis of a given histogram.
 
@@ -36,46 +60,50 @@ def hist_axis_func(axis_type: enum.Enum) -> Callable[[Hist], Axis]:
     Returns:
         Callable to retrieve the specified axis when given a hist.
     """
+    # Determine the axis_type value
+    # Use try here instead of checking for a particular type to protect against type changes
+    # (say in the enum)
+    try:
+        # Try to extract the value from an enum
+        hist_axis_type = axis_type.value
+    except AttributeError:
+        # Seems that we received an int, so just use that value
+        hist_axis_type = axis_type
+
     def axis_func(hist: Hist) -> Axis:
         """ Retrieve the axis associated with the ``HistAxisRange`` object for a given hist.
 
         Args:
             hist: Histogram from which the selected axis should be retrieved.
-            axis_type: Enumeration corresponding to the axis to be restricted. The numerical
-                value of the enum should be axis number (for a THnBase).
         Returns:
             ROOT.TAxis: The axis associated with the ``HistAxisRange`` object.
         """
-        # Determine the axis_type value
-        # Use try here instead of checking for a particular type to protect against type changes
-        # (say in the enum)
-        try:
-            # Try to extract the value from an enum
-            hist_axis_type = axis_type.value
-        except AttributeError:
-            # Seems that we received an int, so just use that value
-            hist_axis_type = axis_type
-
-        if hasattr(hist, "ProjectionND") and hasattr(hist, "Projection"):
-            # THnBase defines ProjectionND and Projection, so we will use those as proxies.
+        if _is_THn(hist):
             # Return the proper THn access
-            #logger.debug(f"From hist: {hist}, hist_axis_type: {hist_axis_type}, axis: {hist.GetAxis(hist_axis_type.value)}")
             return hist.GetAxis(hist_axis_type)
         else:
             # If it's not a THn, then it must be a TH1 derived
-            axis_function_map = {
-                TH1AxisType.x_axis.value: hist.GetXaxis,
-                TH1AxisType.y_axis.value: hist.GetYaxis,
-                TH1AxisType.z_axis.value: hist.GetZaxis
-            }
-
             # Retrieve the axis function and execute it. It is done separately to
             # clarify any possible errors.
-            return_func = axis_function_map[hist_axis_type]
+            return_func = getattr(hist, _TH1_axis_getters[hist_axis_type])
             return return_func()
 
     return axis_func
 
+def _axis_binning_key(axis: Axis) -> Tuple[Any, ...]:
+    """ Determine a key which uniquely identifies the binning of an axis.
+
+    Args:
+        axis: Axis for which the key should be determined.
+    Returns:
+        Key corresponding to the binning of the axis.
+    """
+    key: Tuple[Any, ...] = (axis.GetNbins(), axis.GetXmin(), axis.GetXmax())
+    if axis.IsVariableBinSize():
+        # Read the bin edges directly from the underlying buffer rather than element by element.
+        key += (histogram.get_bin_edges_from_axis(axis).tobytes(),)
+    return key
+
 RangeMinMaxType = Union[float, Callable[[Any], float]]
 
 class HistAxisRange(generic_class.EqualityMixin):
@@ -95,13 +123,36 @@ class HistAxisRange(generic_class.EqualityMixin):
             value of the enum should be axis number (for a THnBase).
         min_val (function): Minimum range value for the axis. Usually set via ``apply_func_to_find_bin()``.
         min_val (function): Maximum range value for the axis. Usually set via ``apply_func_to_find_bin()``.
+
+    Note:
+        The bin range resolved from ``min_val`` and ``max_val`` is cached based on the binning of the axis,
+        so they must only depend on the binning of the axis (as is the case for ``apply_func_to_find_bin()``).
+        The cache is invalidated when any of the arguments are reassigned.
     """
+    # The caches are stored in slots rather than in ``__dict__`` so that they aren't considered when
+    # comparing objects via the ``EqualityMixin``.
+    __slots__ = ("_axis_func", "_resolved_bin_ranges")
+
     def __init__(self, axis_range_name: str, axis_type: enum.Enum, min_val: RangeMinMaxType, max_val: RangeMinMaxType):
         self.name = axis_range_name
         self.axis_type = axis_type
         self.min_val = min_val
         self.max_val = max_val
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        """ Set an attribute, invalidating the cached axis function and bin ranges. """
+        if not name.startswith("_"):
+            for cache in HistAxisRange.__slots__:
+                try:
+                    object.__delattr__(self, cache)
+                except AttributeError:
+                    pass
+        super().__setattr__(name, value)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """ Retrieve the state for copying and pickling, which excludes the caches. """
+        return dict(self.__dict__)
+
     def __repr__(self) -> str:
         """ Representation of the object. """
         # The axis type is an enumeration of some type. In such a case, we want the repr to represent
@@ -115,10 +166,40 @@ class HistAxisRange(generic_class.EqualityMixin):
     @property
     def axis(self) -> Callable[[Any], Any]:
         """ Determine the axis to return based on the hist type. """
-        axis_func = hist_axis_func(
-            axis_type = self.axis_type
-        )
-        return axis_func
+        try:
+            return self._axis_func
+        except AttributeError:
+            self._axis_func: Callable[[Any], Any] = hist_axis_func(
+                axis_type = self.axis_type
+            )
+        return self._axis_func
+
+    def resolve_bin_range(self, axis: Axis) -> Tuple[float, float]:
+        """ Resolve the min and max values into a bin range for the given axis.
+
+        The bin range is cached based on the binning of the axis, such that ``min_val`` and ``max_val`` are
+        only evaluated once for each binning (including for different hists with the same binning).
+
+        Args:
+            axis: Axis for which the bin range should be resolved.
+        Returns:
+            (min_bin, max_bin) for the given axis.
+        """
+        try:
+            resolved_bin_ranges = self._resolved_bin_ranges
+        except AttributeError:
+            resolved_bin_ranges = {}
+            self._resolved_bin_ranges: Dict[Tuple[Any, ...], Tuple[float, float]] = resolved_bin_ranges
+        binning_key = _axis_binning_key(axis)
+        bin_range = resolved_bin_ranges.get(binning_key)
+        if bin_range is None:
+            # Help out mypy
+            assert not isinstance(self.min_val, float)
+            assert not isinstance(self.max_val, float)
+            # Evaluate the functions to determine the values.
+            bin_range = (self.min_val(axis), self.max_val(axis))
+            resolved_bin_ranges[binning_key] = bin_range
+        return bin_range
 
     def apply_range_set(self, hist: Hist) -> None:
         """ Apply the associated range set to the axis of a given hist.
@@ -135,16 +216,11 @@ class HistAxisRange(generic_class.EqualityMixin):
         # Do individual assignments to clarify which particular value is causing an error here.
         axis = self.axis(hist)
         #logger.debug(f"axis: {axis}, axis(): {axis.GetName()}")
-        # Help out mypy
-        assert not isinstance(self.min_val, float)
-        assert not isinstance(self.max_val, float)
-        # Evaluate the functions to determine the values.
-        min_val = self.min_val(axis)
-        max_val = self.max_val(axis)
+        min_val, max_val = self.resolve_bin_range(axis)
         # NOTE: Using SetRangeUser() here was a bug, since I've been passing bin values! In general,
         #       passing bin values is more flexible, but requires the values to be passed to
         #       ``apply_func_to_find_bin()`` to be shifted by some small epsilon to get the desired bin.
-        self.axis(hist).SetRange(min_val, max_val)
+        axis.SetRange(min_val, max_val)
 
     @staticmethod
     def apply_func_to_find_bin(
@@ -202,6 +278,229 @@ class HistAxisRange(generic_class.EqualityMixin):
 
         return return_func
 
+def _hist_content_digest(hist: Hist) -> str:
+    """ Determine a hash of the bin contents and the sum of the weights squared of a histogram.
+
+    The contents are read in bulk where possible (via ``histogram._get_hist_buffers(...)`` for TH1 derived
+    hists), but a ``THnBase`` derived hist must be read bin-by-bin, so converting it to a ``SparseHistogram``
+    first is substantially faster.
+
+    Args:
+        hist: Histogram for which the hash should be determined.
+    Returns:
+        Hex digest of the hist contents.
+    """
+    if _is_THn(hist):
+        sparse_hist = hist if isinstance(hist, histogram.SparseHistogram) \
+            else histogram.SparseHistogram.from_existing_hist(hist)
+        arrays: Tuple[np.ndarray, ...] = (sparse_hist.coordinates, sparse_hist.y, sparse_hist.errors_squared)
+    else:
+        arrays = histogram._get_hist_buffers(hist)
+    contents_hash = hashlib.sha1()
+    for array in arrays:
+        contents_hash.update(np.ascontiguousarray(array).tobytes())
+    return contents_hash.hexdigest()
+
+def _hist_statistics(hist: Hist) -> Tuple[float, float]:
+    """ Retrieve the number of entries and sum of weights of a histogram, which change when it's filled. """
+    if _is_THn(hist):
+        return (hist.GetEntries(), hist.GetSumw())
+    return (hist.GetEntries(), hist.GetSumOfWeights())
+
+def default_hist_key(hist: Hist, content_digest: Optional[str] = None) -> Tuple[Any, ...]:
+    """ Determine a key which identifies the contents of a histogram.
+
+    The key is determined from the type, name, and binning of the hist, as well as a hash of the bin contents
+    and the sum of the weights squared (see ``_hist_content_digest(...)``).
+
+    Args:
+        hist: Histogram for which the key should be determined.
+        content_digest: Hash of the contents of the hist, if it's already available. Default: None, in which
+            case it will be determined from the hist.
+    Returns:
+        Key corresponding to the histogram contents.
+    """
+    if _is_THn(hist):
+        axes = [hist.GetAxis(i) for i in range(hist.GetNdimensions())]
+    else:
+        # If it's not a THn, then it must be a TH1 derived
+        axes = [getattr(hist, _TH1_axis_getters[i])() for i in range(hist.GetDimension())]
+    if content_digest is None:
+        content_digest = _hist_content_digest(hist)
+    return (type(hist).__name__, hist.GetName(), tuple(_axis_binning_key(axis) for axis in axes), content_digest)
+
+def _update_key_digest(digest: Any, value: Any) -> None:
+    """ Update the hash with an explicit (and therefore stable) serialization of a projection cache key.
+
+    Args:
+        digest: Hash to be updated.
+        value: Key (or part of a key) to be added. It must consist of (nested) tuples, str, bytes, ints,
+            floats, and None.
+    Returns:
+        None. The hash is updated.
+    Raises:
+        TypeError: If the key contains other types.
+    """
+    if isinstance(value, tuple):
+        digest.update(b"(%d:" % len(value))
+        for v in value:
+            _update_key_digest(digest, v)
+        digest.update(b")")
+    elif isinstance(value, str):
+        encoded = value.encode()
+        digest.update(b"s%d:" % len(encoded) + encoded)
+    elif isinstance(value, bytes):
+        digest.update(b"b%d:" % len(value) + value)
+    elif isinstance(value, numbers.Integral):
+        digest.update(b"i%d;" % int(value))
+    elif isinstance(value, numbers.Real):
+        digest.update(b"f" + float(value).hex().encode() + b";")
+    elif value is None:
+        digest.update(b"n;")
+    else:
+        raise TypeError(f"Cannot store projections on disk with a key containing {value} (type {type(value)}).")
+
+class ProjectionCache:
+    """ Cache of projected histograms, which can be shared between projectors.
+
+    The projections are stored in memory with least recently used eviction. They can optionally also be
+    stored on disk (one ROOT file per projection), such that they are available when rerunning.
+    The keys are determined by ``HistProjector`` from the input hist (via ``hist_key``) and the resolved
+    bin ranges of all of the axis cuts.
+
+    Note:
+        The cache assumes that the projections are performed via the standard projection functions. If
+        ``call_projection_function(...)`` is overridden to do something different, projectors should not
+        share a cache.
+
+    Args:
+        max_size: Maximum number of projections to keep in memory. Default: 128.
+        directory: Directory where the projections should be stored on disk. Default: None, in which case
+            the projections will only be stored in memory.
+        hist_key: Function to determine a key which identifies the contents of the input hist. To store the
+            projections on disk, the key must consist of (nested) tuples of str, bytes, ints, floats, and None.
+            Default: None, in which case ``default_hist_key(...)`` is used, with the hash of the contents of
+            each input hist object stored until its number of entries or sum of weights changes. Consequently,
+            the cache keeps a reference to the input hists.
+
+    Attributes:
+        hits: Number of projections retrieved from the cache.
+        misses: Number of projections which were not available in the cache.
+    """
+    def __init__(self, max_size: int = 128, directory: Optional[str] = None,
+                 hist_key: Optional[Callable[[Hist], Hashable]] = None):
+        self.max_size = max_size
+        self.directory = directory
+        if hist_key is None:
+            hist_key = self._default_hist_key
+        self.hist_key = hist_key
+        self.hits = 0
+        self.misses = 0
+        self._hists: "OrderedDict[Hashable, Hist]" = OrderedDict()
+        # Hashes of the contents of the input hists, keyed by ``id(hist)``. We store the hist to ensure
+        # that the id isn't reused, as well as the statistics to check whether the contents have changed.
+        self._content_digests: Dict[int, Tuple[Hist, Tuple[float, float], str]] = {}
+
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok = True)
+
+    def __len__(self) -> int:
+        return len(self._hists)
+
+    def _default_hist_key(self, hist: Hist) -> Tuple[Any, ...]:
+        """ Determine the key via ``default_hist_key(...)``, reusing the hash of the contents if possible.
+
+        Args:
+            hist: Histogram for which the key should be determined.
+        Returns:
+            Key corresponding to the histogram contents.
+        """
+        statistics = _hist_statistics(hist)
+        stored = self._content_digests.get(id(hist))
+        if stored is None or stored[0] is not hist or stored[1] != statistics:
+            stored = (hist, statistics, _hist_content_digest(hist))
+            self._content_digests[id(hist)] = stored
+        return default_hist_key(hist, content_digest = stored[2])
+
+    def _filename(self, key: Hashable) -> str:
+        """ Determine the filename where the projection corresponding to the key is stored on disk. """
+        assert self.directory is not None
+        # We serialize the key explicitly (rather than via repr) so that the filename is stable between runs
+        # and python versions.
+        digest = hashlib.sha1()
+        _update_key_digest(digest, key)
+        return os.path.join(self.directory, f"{digest.hexdigest()}.root")
+
+    def get(self, key: Hashable, name: str) -> Optional[Hist]:
+        """ Retrieve a projection from the cache.
+
+        Args:
+            key: Key corresponding to the projection.
+            name: Name to be given to the retrieved hist.
+        Returns:
+            Copy of the cached projection, or None if it isn't available.
+        """
+        hist = self._hists.get(key)
+        if hist is None and self.directory is not None and os.path.exists(self._filename(key)):
+            with histogram.RootOpen(filename = self._filename(key), mode = "READ") as f:
+                hist = f.Get("hist")
+                # Ensure that the hist isn't deleted when the file is closed.
+                if hasattr(hist, "SetDirectory"):
+                    hist.SetDirectory(0)
+            self._store(key, hist)
+        if hist is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._hists.move_to_end(key)
+        return _clone_hist(hist, name)
+
+    def put(self, key: Hashable, hist: Hist) -> None:
+        """ Store a projection in the cache.
+
+        Args:
+            key: Key corresponding to the projection.
+            hist: Projected hist. A copy is stored, so the hist can be modified later.
+        Returns:
+            None.
+        """
+        hist = _clone_hist(hist, hist.GetName())
+        self._store(key, hist)
+        if self.directory is not None:
+            with histogram.RootOpen(filename = self._filename(key), mode = "RECREATE") as f:
+                f.WriteTObject(hist, "hist")
+
+    def _store(self, key: Hashable, hist: Hist) -> None:
+        """ Store the hist in memory, evicting the least recently used projection if necessary. """
+        self._hists[key] = hist
+        self._hists.move_to_end(key)
+        while len(self._hists) > self.max_size:
+            self._hists.popitem(last = False)
+
+    def clear(self) -> None:
+        """ Remove all projections (and the hashes of the input hists) from the in memory cache.
+
+        Projections stored on disk are kept.
+        """
+        self._hists.clear()
+        self._content_digests.clear()
+
+def _clone_hist(hist: Hist, name: str) -> Hist:
+    """ Clone a hist, ensuring that it isn't attached to a ROOT directory.
+
+    Args:
+        hist: Histogram to be cloned.
+        name: Name of the cloned hist.
+    Returns:
+        The cloned hist.
+    """
+    cloned = hist.Clone(name)
+    # Ensure that the hist doesn't get deleted by ROOT
+    if hasattr(cloned, "SetDirectory"):
+        cloned.SetDirectory(0)
+    return cloned
+
 class HistProjector:
     """ Handles generic ROOT ``THn`` and ``TH1`` projections.
 
@@ -232,6 +531,9 @@ class HistProjector:
             objects. Default: None.
         projection_information: Keyword arguments to be passed to ``projection_name(...)`` to determine
             the name of the projected histogram. Default: None.
+        projection_cache: Cache for the projected histograms, which can be shared between projectors.
+            If a projection with the same input hist and cuts is already available in the cache, it will be
+            used instead of performing the projection. Default: None, in which case projections aren't cached.
 
     Attributes:
         single_observable_projection: True if the projector is only performing a single observable projection.
@@ -251,13 +553,16 @@ class HistProjector:
             when projecting dPhi). It is a list of list to allow for groups of cuts to be specified
             together if necessary.
         projection_axes (list): List of axes which should be projected.
+        statistics: Timers and counters for each phase of the projections performed by this projector.
+            They are only recorded while instrumentation is enabled via ``instrumentation.enable()``.
     """
     def __init__(self,
                  observable_to_project_from: Union[Dict[str, Any], Hist, Any],
                  output_observable: Union[Dict[str, Any], Hist, Any],
                  projection_name_format: str,
                  output_attribute_name: str = None,
-                 projection_information: Optional[Dict[str, Any]] = None):
+                 projection_information: Optional[Dict[str, Any]] = None,
+                 projection_cache: Optional[ProjectionCache] = None):
         # Determine whether we projecting multiple objects.
         # If not, store the attribute under which we are going to store the output.
         single_observable_projection = False
@@ -279,8 +584,14 @@ class HistProjector:
         # NOTE: See reserved keys enumerated above.
         if projection_information is None:
             projection_information = {}
-        # Ensure that the dict is copied successfully
-        self.projection_information = copy.deepcopy(projection_information)
+        # Copy the dict so that later changes to the passed dict don't affect the projector.
+        # NOTE: This is intentionally a shallow copy. The values (which may be large analysis objects) are
+        #       only read when determining names, etc, so there's no need to pay the price of a deepcopy.
+        self.projection_information = dict(projection_information)
+        self.projection_cache = projection_cache
+        # Timers and counters for this projector. They are only recorded when instrumentation is enabled
+        # (see ``pachyderm.instrumentation``).
+        self.statistics = instrumentation.Statistics()
 
         # Axes
         # Cuts for axes which are not projected
@@ -311,11 +622,13 @@ class HistProjector:
 
         return ret_val
 
-    def call_projection_function(self, hist: Hist) -> Hist:
+    def call_projection_function(self, hist: Hist, weights: Optional[np.ndarray] = None) -> Hist:
         """ Calls the actual projection function for the hist.
 
         Args:
             hist: Histogram from which the projections should be performed.
+            weights: Multiplicity of each filled bin of a sparse hist in the projection. Only used for
+                sparse hists. Default: None.
         Returns:
             The projected histogram.
         """
@@ -325,23 +638,45 @@ class HistProjector:
             axis.apply_range_set(hist)
 
         projected_hist = None
-        if hasattr(hist, "ProjectionND") and hasattr(hist, "Projection"):
-            # THnBase defines ProjectionND and Projection, so we will use those as proxies.
-            projected_hist = self._project_THn(hist = hist)
-        elif hasattr(hist, "ProjectionZ") and hasattr(hist, "Project3D"):
-            # TH3 defines ProjectionZ and Project3D, so we will use those as proxies.
-            projected_hist = self._project_TH3(hist = hist)
-        elif hasattr(hist, "ProjectionX") and hasattr(hist, "ProjectionY"):
-            # TH2 defines ProjectionX and ProjectionY, so we will use those as proxies.
-            projected_hist = self._project_TH2(hist = hist)
-        else:
-            raise TypeError(type(hist), f"Could not recognize hist {hist} of type {type(hist)}")
+        instrumentation.increment("projections", local = self.statistics)
+        with instrumentation.timer("projection", self.statistics):
+            if isinstance(hist, histogram.SparseHistogram):
+                # The sparse hist was already extracted, so we project it directly.
+                projected_hist = self._project_sparse(hist = hist, weights = weights)
+            elif hasattr(hist, "ProjectionND") and hasattr(hist, "Projection"):
+                # THnBase defines ProjectionND and Projection, so we will use those as proxies.
+                projected_hist = self._project_THn(hist = hist)
+            elif hasattr(hist, "ProjectionZ") and hasattr(hist, "Project3D"):
+                # TH3 defines ProjectionZ and Project3D, so we will use those as proxies.
+                projected_hist = self._project_TH3(hist = hist)
+            elif hasattr(hist, "ProjectionX") and hasattr(hist, "ProjectionY"):
+                # TH2 defines ProjectionX and ProjectionY, so we will use those as proxies.
+                projected_hist = self._project_TH2(hist = hist)
+            else:
+                raise TypeError(type(hist), f"Could not recognize hist {hist} of type {type(hist)}")
 
         # Cleanup restricted axes
         self.cleanup_cuts(hist, cut_axes = self.projection_axes)
 
         return projected_hist
 
+    def _project_sparse(self, hist: histogram.SparseHistogram, weights: Optional[np.ndarray] = None) -> Any:
+        """ Perform the actual sparse hist -> TH1 projection.
+
+        This projection could be to 1D, 2D, or 3D. In contrast to the THn projection, the projection axes
+        are passed in the order of the output axes (ie. x, y, z).
+
+        Args:
+            hist: Sparse histogram from which the projections should be performed.
+            weights: Multiplicity of each filled bin in the projection. Default: None.
+        Returns:
+            ROOT.TH1: The projected histogram.
+        """
+        axis_types: List[Any] = [axis.axis_type for axis in self.projection_axes]
+        projection_axes = [getattr(axis_type, "value", axis_type) for axis_type in axis_types]
+        logger.debug(f"hist: {hist.GetName()} projection_axes: {projection_axes}")
+        return hist.project(projection_axes, name = f"{hist.GetName()}_proj", weights = weights)
+
     def _project_THn(self, hist: Hist) -> Any:
         """ Perform the actual THn -> THn or TH1 projection.
 
@@ -473,47 +808,42 @@ class HistProjector:
         Args:
             input_key: Key to describe the input observable.
             input_observable: Observable to project from.
-            get_hist_args: Arguments to pass to ``get_hist(...)``. Made available so the args can be cached
-                to avoid a ``deepcopy`` when looping. Default: None. In this case, they will be retrieved
-                automatically.
-            projection_name_args: Arguments to pass to ``projection_name(...)``. Made available so the args
-                can be cached to avoid a ``deepcopy`` when looping. Default: None. In this case, they will be
-                retrieved automatically.
+            get_hist_args: Base arguments to pass to ``get_hist(...)``. They are not modified. Default: None.
+                In this case, the kwargs will be used.
+            projection_name_args: Base arguments to pass to ``projection_name(...)``, which have the lowest
+                precedence. They are not modified. Default: None. In this case, the kwargs will be used.
             kwargs: Additional named args to be passed to projection_name(...) and output_key_name(...).
         Returns:
-            The projected histogram.
+            The projected histogram, the projection name, and the arguments used to determine the
+                projection name.
         """
         # Validation of other optional arguments.
+        # NOTE: The arguments are layered with ``ChainMap`` (where the first map takes precedence) rather than
+        #       copied and updated. This way, we never copy the values, which may be large analysis objects.
         if get_hist_args is None:
-            get_hist_args = copy.deepcopy(kwargs)
+            get_hist_args = kwargs
         if projection_name_args is None:
-            projection_name_args = copy.deepcopy(kwargs)
+            projection_name_args = kwargs
 
         # Retrieve histogram
-        # We update ``input_observable`` in ``get_hist_args`` every loop, so we don't have to worry
-        # about passing the wrong observable.
-        get_hist_args.update({"observable": input_observable})
-        hist = self.get_hist(**get_hist_args)
+        with instrumentation.timer("get_hist", self.statistics):
+            hist = self.get_hist(**ChainMap({"observable": input_observable}, get_hist_args))
 
         # Define projection name
-        projection_name_args.update(self.projection_information)
-        # In principle, we could have overwritten one of the kwargs, so we ensure with one of the other
-        # updates, so we update it again to be certain.
-        projection_name_args.update(kwargs)
-        # Put the values included by default last to ensure nothing overwrites these values
-        projection_name_args.update({  # type: ignore
-            "input_key": input_key,
-            "input_observable": input_observable,
-            "input_hist": hist
-        })
-        projection_name = self.projection_name(**projection_name_args)
-
-        # First apply the cuts
-        # Restricting the range with SetRange(User) works properly for both THn and TH1.
-        logger.debug(f"hist: {hist}")
-        for axis in self.additional_axis_cuts:
-            logger.debug(f"Apply additional axis hist range: {axis.name}")
-            axis.apply_range_set(hist)
+        # The values included by default take precedence, followed by the kwargs and then the
+        # projection information.
+        name_args = ChainMap(
+            {
+                "input_key": input_key,
+                "input_observable": input_observable,
+                "input_hist": hist,
+            },
+            kwargs,
+            self.projection_information,
+            projection_name_args,
+        )
+        with instrumentation.timer("projection_name", self.statistics):
+            projection_name = self.projection_name(**name_args)
 
         # We need to ensure that it isn't empty so at least one project occurs
         if self.projection_dependent_cut_axes == []:
@@ -535,7 +865,155 @@ class HistProjector:
                 " Please revise your configuration."
             )
 
-        # Perform the projections
+        # Check whether the projection is already available.
+        cache_key = None
+        if self.projection_cache is not None:
+            cache_key = self._projection_cache_key(hist)
+            cached_hist = self.projection_cache.get(cache_key, name = projection_name)
+            if cached_hist is not None:
+                logger.debug(f"Retrieved projection {projection_name} from the cache.")
+                instrumentation.increment("projection_cache_hits", local = self.statistics)
+                return cached_hist, projection_name, name_args
+
+        output_hist = self._perform_projections(hist = hist, projection_name = projection_name)
+
+        # Final settings
+        output_hist.SetName(projection_name)
+        # Ensure that the hist doesn't get deleted by ROOT
+        # A reference to the histogram within python may not be enough
+        output_hist.SetDirectory(0)
+
+        if self.projection_cache is not None:
+            self.projection_cache.put(cache_key, output_hist)
+
+        return output_hist, projection_name, name_args
+
+    def _perform_projections(self, hist: Hist, projection_name: str) -> Hist:
+        """ Apply the cuts and perform the projection(s) for a single hist.
+
+        The projection dependent cut axes are projected in a single pass where possible: for sparse hists,
+        the union of the selections is projected at once, while for ROOT hists, adjacent ranges on the
+        same axis are merged into one range. Otherwise, each selection is projected separately and the
+        results are added together.
+
+        Note:
+            All cuts on the original histograms will be reset when this function is completed.
+
+        Args:
+            hist: Histogram from which the projections should be performed.
+            projection_name: Name of the projection.
+        Returns:
+            The projected histogram, combined over the projection dependent cut axes.
+        """
+        # First apply the cuts
+        # Restricting the range with SetRange(User) works properly for both THn and TH1.
+        logger.debug(f"hist: {hist}")
+        with instrumentation.timer("apply_cuts", self.statistics):
+            for axis in self.additional_axis_cuts:
+                logger.debug(f"Apply additional axis hist range: {axis.name}")
+                axis.apply_range_set(hist)
+
+        if isinstance(hist, histogram.SparseHistogram):
+            output_hist = self._project_sparse_union(hist)
+        else:
+            merged_range = self._merged_projection_dependent_range(hist)
+            if merged_range is not None:
+                output_hist = self._project_merged_range(hist, *merged_range)
+            else:
+                output_hist = self._project_and_add(hist, projection_name = projection_name)
+
+        # Cleanup the rest of the cuts
+        with instrumentation.timer("cleanup_cuts", self.statistics):
+            self.cleanup_cuts(hist, cut_axes = self.additional_axis_cuts)
+
+        return output_hist
+
+    def _project_sparse_union(self, hist: histogram.SparseHistogram) -> Hist:
+        """ Project the union of the projection dependent cut axes selections of a sparse hist in one pass.
+
+        Each filled bin is weighted by the number of selections which contain it, which is equivalent to
+        projecting each selection separately and adding the results.
+
+        Args:
+            hist: Sparse histogram from which the projection should be performed.
+        Returns:
+            The projected histogram.
+        """
+        multiplicity = np.zeros(len(hist.y), dtype = np.int64)
+        for axes in self.projection_dependent_cut_axes:
+            for axis in axes:
+                logger.debug(f"Apply projection dependent hist range: {axis.name}")
+                axis.apply_range_set(hist)
+            multiplicity += hist.selection_mask()
+            self.cleanup_cuts(hist, cut_axes = axes)
+
+        return self.call_projection_function(hist, weights = multiplicity)
+
+    def _single_axis_projection_dependent_ranges(self) -> Optional[List[HistAxisRange]]:
+        """ Retrieve the projection dependent cut axes if each selection is a single range on the same axis.
+
+        Args:
+            None.
+        Returns:
+            The axis range of each selection, or None if there are fewer than two selections, or they aren't
+                single ranges on the same axis.
+        """
+        groups = self.projection_dependent_cut_axes
+        if len(groups) < 2 or any(len(axes) != 1 for axes in groups):
+            return None
+        axis_ranges = [axes[0] for axes in groups]
+        if any(axis_range.axis_type != axis_ranges[0].axis_type for axis_range in axis_ranges):
+            return None
+        return axis_ranges
+
+    def _merged_projection_dependent_range(self, hist: Hist) -> Optional[Tuple[HistAxisRange, int, int]]:
+        """ Determine whether the projection dependent cut axes can be merged into a single range.
+
+        This is possible when each selection is a single range on the same axis, and the ranges are
+        adjacent (such that they don't overlap or leave a gap).
+
+        Args:
+            hist: Histogram from which the projections will be performed.
+        Returns:
+            (axis range, min bin, max bin) of the merged range, or None if they can't be merged.
+        """
+        axis_ranges = self._single_axis_projection_dependent_ranges()
+        if axis_ranges is None:
+            return None
+
+        axis = axis_ranges[0].axis(hist)
+        bin_ranges = sorted(axis_range.resolve_bin_range(axis) for axis_range in axis_ranges)
+        for (_, previous_max), (current_min, _) in zip(bin_ranges[:-1], bin_ranges[1:]):
+            if current_min != previous_max + 1:
+                return None
+        return axis_ranges[0], int(bin_ranges[0][0]), int(bin_ranges[-1][1])
+
+    def _project_merged_range(self, hist: Hist, axis_range: HistAxisRange, min_bin: int, max_bin: int) -> Hist:
+        """ Perform the projection with the merged projection dependent range.
+
+        Args:
+            hist: Histogram from which the projection should be performed.
+            axis_range: Axis range which identifies the axis on which the merged range should be set.
+            min_bin: Minimum bin of the merged range.
+            max_bin: Maximum bin of the merged range.
+        Returns:
+            The projected histogram.
+        """
+        logger.debug(f"Apply merged projection dependent hist range: {axis_range.name}, ({min_bin}, {max_bin})")
+        axis_range.axis(hist).SetRange(min_bin, max_bin)
+        projected_hist = self.call_projection_function(hist)
+        self.cleanup_cuts(hist, cut_axes = [axis_range])
+        return projected_hist
+
+    def _project_and_add(self, hist: Hist, projection_name: str) -> Hist:
+        """ Project each set of projection dependent cut axes separately and add the results together.
+
+        Args:
+            hist: Histogram from which the projections should be performed.
+            projection_name: Name of the projection.
+        Returns:
+            The combined projected histogram.
+        """
         hists = []
         for i, axes in enumerate(self.projection_dependent_cut_axes):
             # Projection dependent range set
@@ -553,21 +1031,36 @@ class HistProjector:
             # iteration of the loop)
             self.cleanup_cuts(hist, cut_axes = axes)
 
-        # Cleanup the rest of the cuts
-        self.cleanup_cuts(hist, cut_axes = self.additional_axis_cuts)
-
         # Combine all of the projections together
         output_hist = hists[0]
         for temp_hist in hists[1:]:
             output_hist.Add(temp_hist)
 
-        # Final settings
-        output_hist.SetName(projection_name)
-        # Ensure that the hist doesn't get deleted by ROOT
-        # A reference to the histogram within python may not be enough
-        output_hist.SetDirectory(0)
+        return output_hist
+
+    def _projection_cache_key(self, hist: Hist) -> Tuple[Any, ...]:
+        """ Determine the projection cache key for the given input hist and the cuts of this projector.
 
-        return output_hist, projection_name, projection_name_args
+        Args:
+            hist: Histogram from which the projections will be performed.
+        Returns:
+            Key identifying the projection.
+        """
+        # Help out mypy
+        assert self.projection_cache is not None
+
+        def resolve(axes: Iterable[HistAxisRange]) -> Tuple[Any, ...]:
+            return tuple(
+                (getattr(axis.axis_type, "value", axis.axis_type), axis.resolve_bin_range(axis.axis(hist)))
+                for axis in axes
+            )
+
+        return (
+            self.projection_cache.hist_key(hist),
+            resolve(self.additional_axis_cuts),
+            tuple(resolve(axes) for axes in self.projection_dependent_cut_axes),
+            resolve(self.projection_axes),
+        )
 
     def _project_single_observable(self, **kwargs: Dict[str, Any]) -> Hist:
         """ Driver function for projecting and storing a single observable.
@@ -581,20 +1074,21 @@ class HistProjector:
         assert isinstance(self.output_attribute_name, str)
 
         # Run the actual projection.
-        output_hist, projection_name, projection_name_args, = self._project_observable(
-            input_key = "single_observable",
-            input_observable = self.observable_to_project_from,
-            **kwargs,
-        )
+        with instrumentation.timer("project_observable", self.statistics):
+            output_hist, projection_name, projection_name_args, = self._project_observable(
+                input_key = "single_observable",
+                input_observable = self.observable_to_project_from,
+                **kwargs,
+            )
         # Store the output.
-        output_hist_args = projection_name_args
-        output_hist_args.update({  # type: ignore
+        output_hist_args = projection_name_args.new_child({
             "output_hist": output_hist,
             "projection_name": projection_name
         })
 
         # Store the final histogram.
-        output_hist = self.output_hist(**output_hist_args)  # type: ignore
+        with instrumentation.timer("output_hist", self.statistics):
+            output_hist = self.output_hist(**output_hist_args)  # type: ignore
 
         # Store the final output hist
         if not hasattr(self.output_observable, self.output_attribute_name):
@@ -613,26 +1107,23 @@ class HistProjector:
         Returns:
             The projected histograms. The projected histograms are also stored in ``output_observable``.
         """
-        # Setup function arguments with values which don't change per loop.
-        get_hist_args = copy.deepcopy(kwargs)
-        projection_name_args = copy.deepcopy(kwargs)
         for key, input_observable in self.observable_to_project_from.items():
-            output_hist, projection_name, projection_name_args, = self._project_observable(
-                input_key = key,
-                input_observable = input_observable,
-                get_hist_args = get_hist_args,
-                projection_name_args = projection_name_args,
-                **kwargs,
-            )
+            with instrumentation.timer("project_observable", self.statistics):
+                output_hist, projection_name, projection_name_args, = self._project_observable(
+                    input_key = key,
+                    input_observable = input_observable,
+                    **kwargs,
+                )
 
             # Store the output observable
-            output_hist_args = projection_name_args
-            output_hist_args.update({  # type: ignore
+            # NOTE: The args are layered freshly for each observable, so nothing leaks between iterations.
+            output_hist_args = projection_name_args.new_child({
                 "output_hist": output_hist,
                 "projection_name": projection_name
             })
             output_key_name = self.output_key_name(**output_hist_args)  # type: ignore
-            self.output_observable[output_key_name] = self.output_hist(**output_hist_args)  # type: ignore
+            with instrumentation.timer("output_hist", self.statistics):
+                self.output_observable[output_key_name] = self.output_hist(**output_hist_args)  # type: ignore
 
         return self.output_observable
 
@@ -664,7 +1155,8 @@ class HistProjector:
         for axis in cut_axes:
             # According to the function TAxis::SetRange(first, last), the widest possible range is
             # (1, Nbins). Anything beyond that will be reset to (1, Nbins)
-            axis.axis(hist).SetRange(1, axis.axis(hist).GetNbins())
+            hist_axis = axis.axis(hist)
+            hist_axis.SetRange(1, hist_axis.GetNbins())
 
     #############################
     # Functions to be overridden!
@@ -35,11 +35,13 @@ Note:
 """
 
 import enum
+import functools
 import inspect
 import logging
 import numpy as np
 import ruamel.yaml
-from typing import Any, Iterable, Optional, Sequence, Type, TypeVar
+import threading
+from typing import Any, Iterable, Optional, Sequence, Tuple, Type, TypeVar
 
 logger = logging.getLogger(__name__)
 
@@ -50,18 +52,32 @@ Constructor = Type[ruamel.yaml.constructor.BaseConstructor]
 T_EnumToYAML = TypeVar("T_EnumToYAML", bound = enum.Enum)
 T_EnumFromYAML = TypeVar("T_EnumFromYAML", bound = enum.Enum)
 
-def yaml(modules_to_register: Iterable[Any] = None, classes_to_register: Iterable[Any] = None) -> ruamel.yaml.YAML:
+def yaml(modules_to_register: Iterable[Any] = None, classes_to_register: Iterable[Any] = None,
+         fast: bool = False) -> ruamel.yaml.YAML:
     """ Create a YAML object for loading a YAML configuration.
 
+    By default, the YAML object is round-trip, which preserves the comments, anchors, etc, so the configuration
+    can be modified (for example, by ``generic_config.override_options(...)``) and written back out. For read-only
+    usage, ``fast`` can be used to create a safe YAML object instead. It uses the C-accelerated loader if
+    it is available (via ``ruamel.yaml.clib``), and it loads into standard dicts and lists. It's substantially
+    faster, but the anchor information is lost (the aliases still refer to the same object), so it shouldn't be
+    used with ``override_options(...)``. Registered classes, enums, and numpy arrays are supported in both modes.
+
     Args:
         modules_to_register: Modules containing classes to be registered with the YAML object. Default: None.
         classes_to_register: Classes to be registered with the YAML object. Default: None.
+        fast: If True, create a (faster) safe YAML object rather than a round-trip object. Default: False.
     Returns:
         A newly creating YAML object, configured as apporpirate.
     """
     # Defein a round-trip yaml object for us to work with. This object should be imported by other modules
     # NOTE: "typ" is a not a typo. It stands for "type"
-    yaml = ruamel.yaml.YAML(typ = "rt")
+    yaml = ruamel.yaml.YAML(typ = "safe" if fast else "rt")
+    if fast:
+        # Registering representers and constructors modifies the representer and constructor classes.
+        # We use dedicated subclasses so the registration doesn't leak into other safe YAML objects.
+        yaml.Representer = type("Representer", (yaml.Representer,), {})
+        yaml.Constructor = type("Constructor", (yaml.Constructor,), {})
 
     # Register representers and constructors
     # Numpy
@@ -73,6 +89,40 @@ def yaml(modules_to_register: Iterable[Any] = None, classes_to_register: Iterabl
 
     return yaml
 
+def cached_yaml(modules_to_register: Optional[Iterable[Any]] = None, classes_to_register: Optional[Iterable[Any]] = None,
+                fast: bool = False) -> ruamel.yaml.YAML:
+    """ Retrieve a YAML object for loading a YAML configuration, which is only created once per thread.
+
+    Creating the YAML object and registering the classes (especially of entire modules) is fairly expensive,
+    so the object is cached based on the arguments. Since the same object is returned for each call with the
+    same arguments, it must not be modified (for example, by registering further classes). If that's required,
+    use ``yaml(...)`` instead.
+
+    Note:
+        The ``ruamel.yaml`` objects aren't thread safe (they store the state of the current load or dump),
+        so each thread receives its own object.
+
+    Args:
+        modules_to_register: Modules containing classes to be registered with the YAML object. Default: None.
+        classes_to_register: Classes to be registered with the YAML object. Default: None.
+        fast: If True, create a (faster) safe YAML object rather than a round-trip object. See ``yaml(...)``.
+            Default: False.
+    Returns:
+        The YAML object, configured as appropriate.
+    """
+    modules = tuple(modules_to_register) if modules_to_register is not None else ()
+    classes = tuple(classes_to_register) if classes_to_register is not None else ()
+    return _cached_yaml(modules, classes, fast, threading.get_ident())
+
+@functools.lru_cache(maxsize = None)
+def _cached_yaml(modules_to_register: Tuple[Any, ...], classes_to_register: Tuple[Any, ...],
+                 fast: bool, thread_id: int) -> ruamel.yaml.YAML:
+    """ Create and cache the YAML object. The arguments must be hashable. See ``cached_yaml(...)``.
+
+    The thread identifier is only used as part of the cache key, such that each thread has its own object.
+    """
+    return yaml(modules_to_register = modules_to_register, classes_to_register = classes_to_register, fast = fast)
+
 def register_classes(yaml: ruamel.yaml.YAML, classes: Optional[Iterable[Any]] = None) -> ruamel.yaml.YAML:
     """ Register externally defined classes. """
     # Validation
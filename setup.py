@@ -59,7 +59,7 @@ setup(
     # What does your project relate to?
     keywords = 'HEP ALICE',
 
-    packages = find_packages(exclude=(".git", "tests")),
+    packages = find_packages(exclude=(".git", "tests", "benchmarks")),
 
     # Rename scripts to the desired executable names
     # See: https://stackoverflow.com/a/8506532
@@ -71,6 +71,7 @@ setup(
     # This is usually the minimal set of the required packages.
     install_requires = [
         "dataclasses;python_version<'3.7'",
+        "contextvars;python_version<'3.7'",
         "ruamel.yaml",
         "numpy",
         "uproot",
@@ -15,6 +15,7 @@ from io import StringIO
 import ruamel.yaml
 
 from pachyderm import generic_config
+from pachyderm import instrumentation
 from pachyderm import yaml
 
 logger = logging.getLogger(__name__)
@@ -150,6 +151,16 @@ def test_override_with_basic_config(logging_mixin, basic_config):
     # This value is overridden directly
     assert basic_config["test3"] == "test6"
 
+def test_override_instrumentation(logging_mixin, basic_config):
+    """ Test that the number of applied override keys is counted when instrumentation is enabled. """
+    (basic_config, yaml_string) = basic_config
+    n_override_keys = len(basic_config["override"])
+    with instrumentation.enable() as inst:
+        basic_config = override_data(basic_config)
+
+    assert basic_config["test3"] == "test6"
+    assert inst.statistics.counters["override_keys_applied"] == n_override_keys
+
 def test_basic_anchor_override(logging_mixin, basic_config):
     """ Test overriding with an anchor.
 
@@ -213,6 +224,76 @@ def test_complex_object_override(logging_mixin, basic_config):
     assert basic_config["testList"] == [3, 4]
     assert basic_config["testDict"] == {3: 4}
 
+def test_override_overlay(logging_mixin, basic_config):
+    """ Test that the override overlay is equivalent to overriding the configuration in place. """
+    (basic_config, yaml_string) = basic_config
+    overlays = generic_config.OverrideOverlays(basic_config, set_of_possible_options = ())
+    # The original config isn't modified.
+    assert "override" in basic_config
+    assert "override" not in overlays.config
+
+    config = overlays.overlay(())
+    # Anchors are maintained in the derived config, but the base config is unchanged.
+    assert config["test3"] is config["test4"]
+    assert config["test3"] == ["test6"]
+    assert overlays.config["test3"] == ["test3"]
+    # Values which aren't overridden are shared with the base config.
+    assert config["responseTasks"] is overlays.config["responseTasks"]
+
+    # Compare to overriding in place (before simplifying, which would hide differences in the types).
+    yml = ruamel.yaml.YAML()
+    expected = generic_config.override_options(yml.load(yaml_string), (), ())
+    assert dict(config) == dict(expected)
+    for k, v in config.items():
+        assert type(v) is type(expected[k]), k
+
+class override_option(enum.Enum):
+    """ Example enumeration for testing override options. """
+    a = 0
+    b = 1
+
+    def __str__(self) -> str:
+        return self.name
+
+def test_override_overlay_with_selected_options(logging_mixin):
+    """ Test the override overlay for nested references to anchored values. """
+    test_yaml = """
+value: &value [1]
+nested:
+    a: *value
+    b: [5]
+unrelated: {c: 1}
+plain: [1]
+override:
+    a:
+        value: 2
+        plain: 5
+    b:
+        value: 3
+    """
+    yml = ruamel.yaml.YAML()
+    overlays = generic_config.OverrideOverlays(yml.load(test_yaml), set_of_possible_options = (override_option,))
+
+    for selected_option, expected_value in [(override_option.a, 2), (override_option.b, 3)]:
+        config = overlays.overlay((selected_option,))
+        # Every reference to the anchored value is updated.
+        assert config["value"] == [expected_value]
+        assert config["nested"]["a"] is config["value"]
+        # Lists without an anchor are overridden in the same way as the anchored lists.
+        assert config["plain"] == ([5] if selected_option == override_option.a else [1])
+        assert overlays.config["plain"] == [1]
+        # Only the containers which contain the overridden values are copied.
+        assert config["nested"] is not overlays.config["nested"]
+        assert config["nested"]["b"] is overlays.config["nested"]["b"]
+        assert config["unrelated"] is overlays.config["unrelated"]
+        # The base config is unchanged.
+        assert overlays.config["value"] == [1]
+        assert overlays.config["nested"]["a"] is overlays.config["value"]
+
+        # Compare to overriding in place.
+        expected = generic_config.override_options(yml.load(test_yaml), (selected_option,), (override_option,))
+        assert config == expected
+
 def test_load_configuration(logging_mixin, basic_config):
     """ Test that loading yaml goes according to expectations. This may be somewhat trivial, but it
     is still important to check in case ruamel.yaml changes APIs or defaults.
@@ -490,6 +571,147 @@ def test_create_objects_from_iterables(logging_mixin, object_creation_config, ob
 
             assert found_key_index is True
 
+def test_object_creation_shares_unformatted_args(logging_mixin, object_creation_config, object_and_creation_args):
+    """ Test that args which don't need formatting are shared between the created objects. """
+    (config, possible_iterables, _) = object_creation_config
+    (obj, args, formatting_options) = object_and_creation_args
+    iterables = generic_config.determine_selection_of_iterable_values_from_config(
+        config = config,
+        possible_iterables = possible_iterables
+    )
+    # Add args which do and don't need formatting.
+    shared = {"values": [1, 2, 3], "nested": {"str": "no formatting"}}
+    args["nested_fmt"] = [shared, {"val": "{qVector}_{reaction_plane_orientation}", "shared": shared}]
+
+    (_, _, objects) = generic_config.create_objects_from_iterables(
+        obj = obj,
+        args = args,
+        iterables = iterables,
+        formatting_options = formatting_options,
+    )
+
+    for key_index, created_object in objects.items():
+        assert created_object.nested_fmt == [
+            shared, {"val": f"{key_index.qVector}_{key_index.reaction_plane_orientation}", "shared": shared}
+        ]
+        # The parts which don't need formatting are shared, while the others are separate for each object.
+        assert created_object.nested_fmt[0] is shared
+        assert created_object.nested_fmt[1]["shared"] is shared
+        assert created_object.nested_fmt is not args["nested_fmt"]
+
+def test_object_creation_modifying_shared_args(logging_mixin, object_creation_config, object_and_creation_args):
+    """ Test that modifying the unformatted args of one object in place modifies them for the other objects.
+
+    This is the documented consequence of not deep copying the args for each object.
+    """
+    (config, possible_iterables, _) = object_creation_config
+    (obj, args, formatting_options) = object_and_creation_args
+    iterables = generic_config.determine_selection_of_iterable_values_from_config(
+        config = config,
+        possible_iterables = possible_iterables
+    )
+    args["a"] = {"values": [1, 2, 3]}
+
+    (_, _, objects) = generic_config.create_objects_from_iterables(
+        obj = obj,
+        args = args,
+        iterables = iterables,
+        formatting_options = formatting_options,
+    )
+    first, *others = objects.values()
+    first.a["values"].append(4)
+    first.nested_fmt[0][0]["val"] = "modified"
+
+    # The unformatted args are shared.
+    assert args["a"] == {"values": [1, 2, 3, 4]}
+    assert all(o.a == {"values": [1, 2, 3, 4]} for o in others)
+    # While the formatted args are separate for each object.
+    assert all(o.nested_fmt[0][0]["val"] != "modified" for o in others)
+    assert args["nested_fmt"] == [[{"val": "{qVector}_{reaction_plane_orientation}"}]]
+
+def test_lazy_object_creation(logging_mixin, object_creation_config, object_and_creation_args):
+    """ Test that lazy object creation only constructs objects when they are accessed. """
+    (config, possible_iterables, (reaction_plane_orientations, qvectors)) = object_creation_config
+    (obj, args, formatting_options) = object_and_creation_args
+    iterables = generic_config.determine_selection_of_iterable_values_from_config(
+        config = config,
+        possible_iterables = possible_iterables
+    )
+
+    # Create the objects both eagerly and lazily for comparison.
+    _, _, expected_objects = generic_config.create_objects_from_iterables(
+        obj = obj, args = copy.copy(args), iterables = iterables, formatting_options = copy.copy(formatting_options),
+    )
+    with instrumentation.enable() as inst:
+        (key_index, returned_iterables, objects) = generic_config.create_objects_from_iterables(
+            obj = obj, args = args, iterables = iterables, formatting_options = formatting_options,
+            lazy = True,
+        )
+
+        # Nothing should be constructed yet, but the keys should already be available in the same order.
+        assert isinstance(objects, generic_config.LazyObjects)
+        assert "objects_created" not in inst.statistics.counters
+        # NOTE: Each call creates a new KeyIndex class, so we compare the key index values.
+        assert [list(k) for k in objects] == [list(k) for k in expected_objects]
+        assert len(objects) == len(reaction_plane_orientations) * len(qvectors)
+
+        # Access one object.
+        key = key_index(reaction_plane_orientation = reaction_plane_orientations[1], qVector = qvectors[0])
+        assert key in objects
+        assert objects[key] == list(expected_objects.values())[3]
+        assert objects[key] is objects[key]
+        assert objects.is_constructed(key)
+        assert inst.statistics.counters["objects_created"] == 1
+
+        # Access all of them.
+        assert list(objects.values()) == list(expected_objects.values())
+        assert inst.statistics.counters["objects_created"] == len(expected_objects)
+
+    with pytest.raises(KeyError):
+        objects["not_a_key_index"]
+
+@dataclasses.dataclass
+class ParallelTestObj:
+    """ Object for testing parallel object creation. It must be defined at module level to be picklable. """
+    reaction_plane_orientation: reaction_plane_orientation
+    qVector: qvector
+    a: int
+    b: str
+    options_fmt: str
+    nested_fmt: list
+
+@pytest.mark.parametrize("use_threads", [False, True], ids = ["processes", "threads"])
+def test_parallel_object_creation(logging_mixin, object_creation_config, object_and_creation_args, use_threads):
+    """ Test that constructing objects in parallel gives the same objects in the same order. """
+    (config, possible_iterables, _) = object_creation_config
+    (_, args, formatting_options) = object_and_creation_args
+    iterables = generic_config.determine_selection_of_iterable_values_from_config(
+        config = config,
+        possible_iterables = possible_iterables
+    )
+
+    _, _, expected_objects = generic_config.create_objects_from_iterables(
+        obj = ParallelTestObj, args = copy.copy(args), iterables = iterables,
+        formatting_options = copy.copy(formatting_options),
+    )
+    with instrumentation.enable() as inst:
+        _, _, objects = generic_config.create_objects_from_iterables(
+            obj = ParallelTestObj, args = args, iterables = iterables, formatting_options = formatting_options,
+            max_workers = 2, use_threads = use_threads,
+        )
+
+    # NOTE: Each call creates a new KeyIndex class, so we compare the key index values.
+    assert [list(k) for k in objects] == [list(k) for k in expected_objects]
+    assert list(objects.values()) == list(expected_objects.values())
+    assert inst.statistics.counters["objects_created"] == len(expected_objects)
+
+    # Parallel construction can't be combined with lazy construction.
+    with pytest.raises(ValueError):
+        generic_config.create_objects_from_iterables(
+            obj = ParallelTestObj, args = args, iterables = iterables, formatting_options = formatting_options,
+            lazy = True, max_workers = 2,
+        )
+
 def test_missing_iterable_for_object_creation(logging_mixin, object_and_creation_args):
     """ Test object creation when the iterables are missing. """
     (obj, args, formatting_options) = object_and_creation_args
@@ -506,6 +728,31 @@ def test_missing_iterable_for_object_creation(logging_mixin, object_and_creation
         )
     assert exception_info.value.args[0] == iterables
 
+def test_object_creation_instrumentation(logging_mixin, object_creation_config, object_and_creation_args):
+    """ Test the instrumentation counters and timers recorded during object creation. """
+    (config, possible_iterables, (reaction_plane_orientations, qvectors)) = object_creation_config
+    (obj, args, formatting_options) = object_and_creation_args
+    iterables = generic_config.determine_selection_of_iterable_values_from_config(
+        config = config,
+        possible_iterables = possible_iterables
+    )
+
+    with instrumentation.enable() as inst:
+        (_, _, objects) = generic_config.create_objects_from_iterables(
+            obj = obj,
+            args = args,
+            iterables = iterables,
+            formatting_options = formatting_options,
+        )
+
+    n_objects = len(reaction_plane_orientations) * len(qvectors)
+    assert len(objects) == n_objects
+    assert inst.statistics.counters["objects_created"] == n_objects
+    # There are three strings to format in the args of each object.
+    assert inst.statistics.counters["strings_formatted"] == 3 * n_objects
+    assert inst.statistics.calls["apply_formatting_dict"] == n_objects
+    assert inst.statistics.calls["object_construction"] == n_objects
+
 @pytest.fixture
 def formatting_config():
     """ Config for testing the formatting of strings after loading them.
@@ -568,9 +815,8 @@ def test_apply_formatting_skip_latex(logging_mixin, formatting_config):
 @pytest.fixture
 def setup_analysis_iterator(logging_mixin):
     """ Setup for testing iteration over analysis objects. """
-    KeyIndex = dataclasses.make_dataclass("KeyIndex", ["a", "b", "c"], frozen = True)
-    KeyIndex.__iter__ = generic_config._key_index_iter
     analysis_iterables = {"a": ["a1", "a2"], "b": ["b1", "b2"], "c": ["c"]}
+    KeyIndex = generic_config.create_key_index_object("KeyIndex", analysis_iterables)
     test_dict = {
         KeyIndex(a = "a1", b = "b1", c = "c"): "obj1",
         KeyIndex(a = "a1", b = "b2", c = "c"): "obj2",
@@ -602,6 +848,48 @@ def test_key_index_iterator(setup_analysis_iterator):
         assert k == k_expected
         assert v == v_expected
 
+def test_created_key_index(logging_mixin):
+    """ Test the properties of the ``KeyIndex`` created by ``create_key_index_object(...)``. """
+    KeyIndex = generic_config.create_key_index_object(
+        key_index_name = "KeyIndex",
+        iterables = {"a": ["a1", "a2"], "b": [1, 2], "c": [2.76]},
+    )
+    kwargs = {"a": "a1", "b": 2, "c": 2.76}
+    key_index = KeyIndex(**kwargs)
+
+    # Construction, attribute access, and iteration.
+    assert key_index == KeyIndex("a1", 2, c = 2.76)
+    assert key_index != KeyIndex("a2", 2, 2.76)
+    assert (key_index.a, key_index.b, key_index.c) == ("a1", 2, 2.76)
+    assert dict(key_index) == kwargs
+    assert repr(key_index) == "KeyIndex(a='a1', b=2, c=2.76)"
+    with pytest.raises(TypeError):
+        KeyIndex("a1", 2)
+
+    # Hashing and immutability.
+    assert hash(key_index) == hash(KeyIndex(**kwargs))
+    assert {key_index: 1}[KeyIndex(**kwargs)] == 1
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        key_index.a = "a2"
+
+    # Dataclass support.
+    assert dataclasses.is_dataclass(key_index)
+    assert [f.name for f in dataclasses.fields(key_index)] == ["a", "b", "c"]
+    assert dataclasses.asdict(key_index) == kwargs
+    replaced = dataclasses.replace(key_index, a = "a2")
+    assert replaced == KeyIndex("a2", 2, 2.76)
+    assert hash(replaced) == hash(KeyIndex("a2", 2, 2.76))
+
+    # Copying and YAML.
+    assert copy.deepcopy(key_index) == key_index
+    y = yaml.yaml(classes_to_register = [KeyIndex])
+    s = StringIO()
+    y.dump([key_index], s)
+    s.seek(0)
+    loaded = y.load(s)
+    assert loaded == [key_index]
+    assert hash(loaded[0]) == hash(key_index)
+
 def test_iterate_with_no_selected_items(setup_analysis_iterator):
     """ Test iterating over analysis objects without any selection. """
     KeyIndex, _, test_dict = setup_analysis_iterator
@@ -11,6 +11,7 @@ import numpy as np
 import os
 import pytest
 import uproot
+from typing import Optional
 
 from pachyderm import histogram
 from pachyderm.typing_helpers import Hist
@@ -296,6 +297,106 @@ def test_uproot_hist_to_histogram(setup_histogram_conversion):
     # Cleanup
     del uproot_file
 
+class FakeUHIAxis:
+    """ Minimal axis following the UHI ``PlottableAxis`` protocol, which is a sequence of (lower, upper) edges. """
+    def __init__(self, bin_edges: np.ndarray):
+        self.bin_edges = bin_edges
+
+    def __len__(self):
+        return len(self.bin_edges) - 1
+
+    def __getitem__(self, i):
+        return (self.bin_edges[i], self.bin_edges[i + 1])
+
+class FakeUHIHist:
+    """ Minimal histogram following the UHI ``PlottableHistogram`` protocol. """
+    def __init__(self, bin_edges: np.ndarray, values: np.ndarray, variances: Optional[np.ndarray]):
+        self.axes = [FakeUHIAxis(bin_edges)]
+        self._values = values
+        self._variances = variances
+
+    def values(self):
+        return self._values
+
+    def variances(self):
+        return self._variances
+
+@pytest.mark.parametrize("copy", [False, True], ids = ["Views", "Copy"])
+@pytest.mark.parametrize("store_variances", [False, True], ids = ["No variances", "Variances"])
+def test_uhi_hist_to_histogram(logging_mixin, setup_basic_hist, copy, store_variances):
+    """ Test conversion of a histogram implementing the UHI protocol. """
+    _, bin_edges, y, errors_squared = setup_basic_hist
+    input_hist = FakeUHIHist(bin_edges = bin_edges, values = y, variances = errors_squared if store_variances else None)
+
+    h = histogram.Histogram1D.from_existing_hist(input_hist, copy = copy)
+
+    np.testing.assert_allclose(h.bin_edges, bin_edges)
+    np.testing.assert_allclose(h.y, y)
+    np.testing.assert_allclose(h.errors_squared, errors_squared if store_variances else y)
+    # The arrays should only be copied if requested.
+    assert np.shares_memory(h.y, y) is not copy
+    if store_variances:
+        assert np.shares_memory(h.errors_squared, errors_squared) is not copy
+
+class HistContainer:
+    """ Minimal histogram container, which stores the hist under ``hist``. """
+    def __init__(self, hist):
+        self.hist = hist
+
+def test_convert_histograms(logging_mixin, setup_basic_hist):
+    """ Test converting a nested dict of hists, preserving the structure. """
+    _, bin_edges, y, errors_squared = setup_basic_hist
+    hist_2D = FakeUHIHist(bin_edges = bin_edges, values = y, variances = errors_squared)
+    hist_2D.axes.append(FakeUHIAxis(bin_edges))
+    container = HistContainer(FakeUHIHist(bin_edges = bin_edges, values = y * 3, variances = errors_squared * 9))
+    hists = {
+        "a": FakeUHIHist(bin_edges = bin_edges, values = y, variances = errors_squared),
+        "container": container,
+        "nested": {
+            "b": FakeUHIHist(bin_edges = bin_edges, values = y * 2, variances = errors_squared * 4),
+            "hist_2D": hist_2D,
+            "empty": {},
+        },
+    }
+
+    output = histogram.convert_histograms(hists)
+
+    assert list(output) == ["a", "container", "nested"]
+    assert list(output["nested"]) == ["b", "hist_2D", "empty"]
+    assert output["a"] == histogram.Histogram1D(bin_edges = bin_edges, y = y, errors_squared = errors_squared)
+    # Hists stored in a container are also converted (as for ``from_existing_hist(...)``).
+    assert output["container"] == histogram.Histogram1D(
+        bin_edges = bin_edges, y = y * 3, errors_squared = errors_squared * 9
+    )
+    assert output["nested"]["b"] == histogram.Histogram1D(
+        bin_edges = bin_edges, y = y * 2, errors_squared = errors_squared * 4
+    )
+    # Objects which can't be converted are stored unchanged.
+    assert output["nested"]["hist_2D"] is hist_2D
+    assert output["nested"]["empty"] == {}
+
+@pytest.mark.ROOT
+def test_histogram_to_root(logging_mixin, tmp_path):
+    """ Test converting histograms to ROOT, and writing them to a file. """
+    h = histogram.Histogram1D(
+        bin_edges = np.array([0, 1, 3, 6, 10]), y = np.array([1, 2, 3, 4]), errors_squared = np.array([1, 4, 9, 16])
+    )
+
+    hist = h.to_root(name = "test", title = "Test")
+    assert hist.GetName() == "test"
+    assert hist.GetTitle() == "Test"
+    assert histogram.Histogram1D.from_existing_hist(hist) == h
+
+    # Write a nested set of hists and read them back.
+    filename = str(tmp_path / "hists.root")
+    histogram.write_histograms_to_file(filename, {"a": h, "nested": {"b": h + h, "c": hist}})
+    output = histogram.convert_histograms(filename)
+
+    assert list(output) == ["a", "nested"]
+    assert output["a"] == h
+    assert output["nested"]["b"] == h + h
+    assert output["nested"]["c"] == h
+
 @pytest.mark.ROOT
 class TestWithRootHists:
     def test_get_array_from_hist(self, logging_mixin, test_root_hists):
@@ -450,6 +551,119 @@ def test_find_bin(logging_mixin, setup_basic_hist, value, expected_bin):
 
     assert found_bin == expected_bin
 
+@pytest.mark.parametrize("bin_edges", [
+    np.array([0, 1, 2, 3, 5]),
+    np.linspace(-2.3, 7.1, 95),
+], ids = ["Variable binning", "Uniform binning"])
+def test_find_bins(logging_mixin, bin_edges):
+    """ Test finding the bins for an array of values, including at (and just next to) the bin edges. """
+    h = histogram.Histogram1D(
+        bin_edges = bin_edges, y = np.zeros(len(bin_edges) - 1), errors_squared = np.zeros(len(bin_edges) - 1)
+    )
+    values = np.concatenate([
+        np.linspace(bin_edges[0] - 1, bin_edges[-1] + 1, 1000),
+        bin_edges,
+        np.nextafter(bin_edges, -np.inf),
+        np.nextafter(bin_edges, np.inf),
+        [np.nan],
+    ])
+
+    bins, underflow, overflow = h.find_bins(values)
+
+    expected_bins = np.array([h.find_bin(v) for v in values])
+    np.testing.assert_array_equal(bins, expected_bins)
+    np.testing.assert_array_equal(underflow, expected_bins < 0)
+    np.testing.assert_array_equal(overflow, expected_bins >= len(bin_edges) - 1)
+    # NaN should end up in the overflow.
+    assert overflow[-1]
+
+def test_histogram_from_unbinned_data(logging_mixin, setup_basic_hist):
+    """ Test creating a histogram from unbinned data, reproducing the basic hist. """
+    expected, bin_edges, _, _ = setup_basic_hist
+
+    # See the ``setup_basic_hist`` docstring for the equivalent ROOT fills. The values outside of the
+    # bin edges shouldn't be included.
+    values = np.array([0, 1, 1, 2, 2, 2, -1, 6])
+    weights = np.array([2, 1, 1, 1, 1, 1, 3, 3])
+    h = histogram.Histogram1D.from_unbinned_data(bin_edges = bin_edges, values = values, weights = weights)
+
+    assert h == expected
+
+@pytest.mark.parametrize("bin_edges", [
+    np.array([0, 1, 2, 3, 5]),
+    np.linspace(0, 5, 21),
+], ids = ["Variable binning", "Uniform binning"])
+@pytest.mark.parametrize("use_weights", [False, True], ids = ["Unweighted", "Weighted"])
+def test_fill_histogram_in_chunks(logging_mixin, bin_edges, use_weights):
+    """ Test filling a histogram incrementally in chunks vs all at once and vs ``np.histogram``. """
+    rng = np.random.RandomState(1234)
+    values = rng.uniform(-1, 6, size = 10000)
+    weights = rng.uniform(0.5, 2, size = 10000) if use_weights else None
+
+    h_all_at_once = histogram.Histogram1D.from_unbinned_data(bin_edges = bin_edges, values = values, weights = weights)
+    h_chunks = histogram.Histogram1D.from_unbinned_data(bin_edges = bin_edges)
+    for i in range(0, len(values), 3000):
+        h_chunks.fill(values[i:i + 3000], weights = weights[i:i + 3000] if use_weights else None)
+
+    expected_y, _ = np.histogram(values, bins = bin_edges, weights = weights)
+    expected_errors_squared, _ = np.histogram(values, bins = bin_edges, weights = weights ** 2 if use_weights else None)
+    np.testing.assert_allclose(h_all_at_once.y, expected_y)
+    np.testing.assert_allclose(h_all_at_once.errors_squared, expected_errors_squared)
+    assert h_chunks == h_all_at_once
+
+def test_fill_with_mismatched_weights(logging_mixin, setup_basic_hist):
+    """ Test that filling with weights which don't match the values fails. """
+    h, _, _, _ = setup_basic_hist
+
+    with pytest.raises(ValueError) as exception_info:
+        h.fill(np.array([1, 2, 3]), weights = np.array([1, 2]))
+    assert "doesn't match" in exception_info.value.args[0]
+
+@pytest.mark.parametrize("bins, expected_bin_edges, expected_y, expected_errors_squared", [
+    (1, [0, 1, 2, 3, 5], [2, 2, 3, 0], [4, 2, 3, 0]),
+    (2, [0, 2, 5], [4, 3], [6, 3]),
+    (4, [0, 5], [7], [9]),
+    (np.array([0, 2, 3, 5]), [0, 2, 3, 5], [4, 3, 0], [6, 3, 0]),
+    (np.array([1, 3 + 1e-12]), [1, 3], [5], [5]),
+], ids = ["Factor 1", "Factor 2", "Factor 4", "New bin edges", "New bin edges subrange"])
+def test_rebin(logging_mixin, setup_basic_hist, bins, expected_bin_edges, expected_y, expected_errors_squared):
+    """ Test rebinning by an integer factor and to new bin edges. """
+    h, bin_edges, y, errors_squared = setup_basic_hist
+
+    rebinned = h.rebin(bins)
+
+    np.testing.assert_allclose(rebinned.bin_edges, expected_bin_edges)
+    np.testing.assert_allclose(rebinned.y, expected_y)
+    np.testing.assert_allclose(rebinned.errors_squared, expected_errors_squared)
+    # The original hist shouldn't be modified.
+    np.testing.assert_array_equal(h.bin_edges, bin_edges)
+    np.testing.assert_array_equal(h.y, y)
+    np.testing.assert_array_equal(h.errors_squared, errors_squared)
+
+@pytest.mark.parametrize("bins", [
+    3, 0, np.array([0, 1.5, 5]), np.array([0, 3, 2]), np.array([1]),
+], ids = ["Non-divisor factor", "Zero factor", "Not a subset", "Not increasing", "Single edge"])
+def test_invalid_rebin(logging_mixin, setup_basic_hist, bins):
+    """ Test that invalid rebinning fails. """
+    h, _, _, _ = setup_basic_hist
+
+    with pytest.raises(ValueError):
+        h.rebin(bins)
+
+def test_rebin_with_small_bins(logging_mixin):
+    """ Test that rebinning with small (ns-scale) bins only matches the existing bin edges. """
+    bin_edges = np.arange(10) * 1e-9
+    h = histogram.Histogram1D(bin_edges = bin_edges, y = np.ones(9), errors_squared = np.ones(9))
+
+    # Edges which exist (up to floating point precision) are fine.
+    rebinned = h.rebin(np.array([0, 3e-9, 9e-9]))
+    np.testing.assert_allclose(rebinned.y, [3, 6])
+
+    # But edges which fall within existing bins must not be snapped to the nearest edge.
+    for new_bin_edges in [np.array([0, 1.5e-9, 9e-9]), np.array([0, 0.3e-9, 9e-9])]:
+        with pytest.raises(ValueError):
+            h.rebin(new_bin_edges)
+
 @pytest.mark.parametrize("test_equality", [
     False,
     True,
@@ -466,7 +680,7 @@ def test_histogram1D_equality(logging_mixin, setup_basic_hist, test_equality, ac
     h2 = histogram.Histogram1D(bin_edges = bin_edges, y = y, errors_squared = errors_squared)
 
     if access_attributes_which_are_stored:
-        # This attribute will be stored (but under "_x"), so we want to make sure that it
+        # This attribute will be cached (under "_cache"), so we want to make sure that it
         # doesn't disrupt the equality comparison.
         h1.x
 
@@ -478,6 +692,383 @@ def test_histogram1D_equality(logging_mixin, setup_basic_hist, test_equality, ac
     else:
         assert h1 != h2
 
+def test_derived_quantities_cache(logging_mixin, setup_basic_hist):
+    """ Test caching of the derived quantities, as well as invalidation of the cache. """
+    h, bin_edges, y, errors_squared = setup_basic_hist
+
+    # Derived quantities should be cached and read only.
+    errors = h.errors
+    assert h.errors is errors
+    assert h.x is h.x
+    assert h.bin_widths is h.bin_widths
+    with pytest.raises(ValueError):
+        errors[0] = 10
+    np.testing.assert_allclose(h.x, [0.5, 1.5, 2.5, 4])
+    assert h.counts_in_interval(min_bin = 1, max_bin = 2) == (5, np.sqrt(5))
+
+    # Reassigning an array should invalidate the cache.
+    h.bin_edges = np.array([0, 2, 4, 6, 8])
+    np.testing.assert_allclose(h.x, [1, 3, 5, 7])
+    np.testing.assert_allclose(h.bin_widths, [2, 2, 2, 2])
+
+    # As should the arithmetic operators.
+    # NOTE: The arrays are modified in place, so we need to store the expected values first.
+    expected_errors = np.sqrt(2 * errors_squared)
+    h += h.copy()
+    np.testing.assert_allclose(h.errors, expected_errors)
+    assert h.counts_in_interval(min_bin = 1, max_bin = 2) == (10, np.sqrt(10))
+    np.testing.assert_allclose(h.integral(min_bin = 0, max_bin = 3), (2 * 7 * 2, np.sqrt(2 * 9 * 4)))
+
+    # Modifying elements in place requires explicit invalidation.
+    h.errors_squared[0] = 16
+    h.invalidate_cache()
+    assert h.errors[0] == 4
+
+@pytest.mark.parametrize("dtype", [None, np.float32], ids = ["Default dtype", "float32"])
+def test_compact_histogram(logging_mixin, setup_basic_hist, dtype):
+    """ Test the compact histogram against the standard histogram. """
+    h, bin_edges, y, errors_squared = setup_basic_hist
+
+    compact = histogram.CompactHistogram1D(
+        bin_edges = bin_edges.copy(), y = y, errors_squared = errors_squared, dtype = dtype
+    )
+    other = histogram.CompactHistogram1D(bin_edges = bin_edges.copy(), y = y, errors_squared = errors_squared)
+
+    # Storage
+    assert not hasattr(compact, "__dict__")
+    assert compact.bin_edges is other.bin_edges
+    assert compact.x is other.x
+    with pytest.raises(ValueError):
+        compact.bin_edges[0] = -1
+    if dtype is not None:
+        assert compact.y.dtype == dtype
+        assert compact.errors_squared.dtype == dtype
+
+    # The interface should match the standard histogram.
+    assert compact == h
+    assert compact.copy() == h
+    assert compact.copy().bin_edges is compact.bin_edges
+    np.testing.assert_allclose(compact.x, h.x)
+    np.testing.assert_allclose(compact.errors, h.errors)
+    assert compact.integral(min_bin = 1, max_bin = 3) == pytest.approx(h.integral(min_bin = 1, max_bin = 3))
+    assert compact.rebin(2) == h.rebin(2)
+    compact_sum = compact + other
+    assert isinstance(compact_sum, histogram.CompactHistogram1D)
+    assert compact_sum == h + h
+    compact.fill(np.array([0.5, 4]))
+    h.fill(np.array([0.5, 4]))
+    assert compact == h
+    if dtype is not None:
+        assert compact.y.dtype == dtype
+
+    # Replacing the binning.
+    compact.bin_edges = np.array([0, 2, 4, 6, 8])
+    np.testing.assert_allclose(compact.x, [1, 3, 5, 7])
+
+def test_compact_histogram_pickle(logging_mixin, setup_basic_hist):
+    """ Test pickling a compact histogram, which requires special handling due to the slots. """
+    import pickle
+    _, bin_edges, y, errors_squared = setup_basic_hist
+
+    compact = histogram.CompactHistogram1D(
+        bin_edges = bin_edges, y = y, errors_squared = errors_squared, dtype = np.float32
+    )
+    result = pickle.loads(pickle.dumps(compact))
+
+    assert result == compact
+    assert result.dtype == np.float32
+    assert result.bin_edges is compact.bin_edges
+
+class FakeArray:
+    """ Minimal stand in for a ``TArrayD``. """
+    def __init__(self, values: np.ndarray):
+        self.values = values
+
+    def GetArray(self):
+        return self.values
+
+class FakeAxis:
+    """ Minimal stand in for a ``TAxis``, which supports setting a range. """
+    kAxisRange = 1
+
+    def __init__(self, n_bins: int, min: float, max: float, bin_edges: Optional[np.ndarray] = None):
+        self.variable_bin_size = bin_edges is not None
+        self.bin_edges = bin_edges if bin_edges is not None else np.linspace(min, max, n_bins + 1)
+        self.range = None
+
+    def GetNbins(self):
+        return len(self.bin_edges) - 1
+
+    def GetXmin(self):
+        return self.bin_edges[0]
+
+    def GetXmax(self):
+        return self.bin_edges[-1]
+
+    def IsVariableBinSize(self):
+        return self.variable_bin_size
+
+    def GetXbins(self):
+        return FakeArray(self.bin_edges if self.variable_bin_size else np.array([]))
+
+    def GetBinLowEdge(self, i):
+        return self.bin_edges[i - 1]
+
+    def GetBinUpEdge(self, i):
+        return self.bin_edges[i]
+
+    def GetBinWidth(self, i):
+        return self.bin_edges[i] - self.bin_edges[i - 1]
+
+    def SetRange(self, first = 0, last = 0):
+        self.range = (first, last) if first or last else None
+
+    def TestBit(self, bit):
+        return bit == self.kAxisRange and self.range is not None
+
+    def GetFirst(self):
+        return self.range[0]
+
+    def GetLast(self):
+        return self.range[1]
+
+@pytest.fixture
+def setup_sparse_hist(logging_mixin):
+    """ Create a 3D sparse hist along with the equivalent dense contents (including the under- and overflow). """
+    np.random.seed(1234)
+    axes = [FakeAxis(4, 0, 4), FakeAxis(3, 0, 3), FakeAxis(5, -1, 1)]
+    shape = tuple(axis.GetNbins() + 2 for axis in axes)
+    dense_y = np.random.poisson(0.5, size = shape).astype(np.float64)
+    dense_errors_squared = dense_y * 2
+
+    coordinates = np.array(np.nonzero(dense_y), dtype = np.int32).T
+    sparse = histogram.SparseHistogram(
+        name = "test", axes = axes, coordinates = coordinates,
+        y = dense_y[dense_y != 0], errors_squared = dense_errors_squared[dense_y != 0],
+    )
+    return sparse, dense_y, dense_errors_squared
+
+def test_sparse_histogram_projection(setup_sparse_hist):
+    """ Test projecting a sparse hist with ranges on the projected and non-projected axes. """
+    sparse, dense_y, dense_errors_squared = setup_sparse_hist
+    assert sparse.GetNdimensions() == 3
+    assert np.isclose(sparse.GetSumw(), np.sum(dense_y))
+    assert np.isclose(sparse.GetEntries(), np.sum(dense_y))
+
+    # Without any ranges, the projection just sums over the other axes (including the under- and overflow).
+    y, errors_squared, bin_edges = sparse.project_to_arrays([2, 0])
+    np.testing.assert_allclose(y, np.sum(dense_y, axis = 1).T)
+    np.testing.assert_allclose(errors_squared, np.sum(dense_errors_squared, axis = 1).T)
+    np.testing.assert_allclose(bin_edges[0], np.linspace(-1, 1, 6))
+    np.testing.assert_allclose(bin_edges[1], np.linspace(0, 4, 5))
+
+    # Restrict the non-projected axis, as well as the projected axis.
+    sparse.GetAxis(1).SetRange(2, 3)
+    sparse.GetAxis(0).SetRange(2, 3)
+    y, errors_squared, bin_edges = sparse.project_to_arrays([0])
+    expected = np.zeros(4)
+    expected[1:3] = np.sum(dense_y[2:4, 2:4, :], axis = (1, 2))
+    np.testing.assert_allclose(y, expected)
+    np.testing.assert_allclose(errors_squared, expected * 2)
+    np.testing.assert_allclose(bin_edges[0], [1, 2, 3])
+
+    # Explicitly provided weights are combined with the ranges.
+    weights = np.full(len(sparse.y), 2)
+    weights[sparse.coordinates[:, 0] == 2] = 0
+    y, _, _ = sparse.project_to_arrays([0], weights = weights)
+    np.testing.assert_allclose(y, [0, 0, expected[2] * 2, 0])
+
+@pytest.mark.ROOT
+def test_sparse_histogram_from_THnSparse(logging_mixin):
+    """ Test that projecting the extracted sparse hist agrees with projecting the THnSparse. """
+    import ROOT
+
+    n_bins = np.array([4, 3, 5], dtype = np.int32)
+    x_min = np.array([0, 0, -1], dtype = np.float64)
+    x_max = np.array([4, 3, 1], dtype = np.float64)
+    hist = ROOT.THnSparseD("test_sparse", "test_sparse", 3, n_bins, x_min, x_max)
+    hist.Sumw2()
+    np.random.seed(1234)
+    for values in np.random.uniform(-1.5, 4.5, size = (200, 3)):
+        hist.Fill(np.array(values, dtype = np.float64), 2.0)
+
+    sparse = histogram.SparseHistogram.from_existing_hist(hist)
+    assert sparse.GetNdimensions() == 3
+    assert np.isclose(sparse.GetSumw(), hist.GetSumw())
+
+    for axis in [hist.GetAxis(1), sparse.GetAxis(1)]:
+        axis.SetRange(2, 3)
+    for axis in [hist.GetAxis(0), sparse.GetAxis(0)]:
+        axis.SetRange(2, 3)
+    expected = histogram.Histogram1D.from_existing_hist(hist.Projection(0, "E"))
+    result = histogram.Histogram1D.from_existing_hist(sparse.project([0], name = "test_sparse_proj"))
+
+    assert np.allclose(result.bin_edges, expected.bin_edges)
+    assert np.allclose(result.y, expected.y)
+    assert np.allclose(result.errors_squared, expected.errors_squared)
+
+class FakeTH2D:
+    """ Minimal stand in for a ``TH2D``, which stores the contents in a buffer (including the under- and overflow). """
+    def __init__(self, x_axis: FakeAxis, y_axis: FakeAxis, contents: np.ndarray, errors_squared: np.ndarray):
+        self.axes = [x_axis, y_axis, FakeAxis(1, 0, 1)]
+        # The contents are indexed as [x][y], while ROOT stores them with x varying the fastest.
+        self.contents = np.ascontiguousarray(contents.T).ravel()
+        self.sumw2 = FakeArray(np.ascontiguousarray(errors_squared.T).ravel())
+
+    def GetXaxis(self):
+        return self.axes[0]
+
+    def GetYaxis(self):
+        return self.axes[1]
+
+    def GetZaxis(self):
+        return self.axes[2]
+
+    def GetDimension(self):
+        return 2
+
+    def GetNcells(self):
+        return len(self.contents)
+
+    def InheritsFrom(self, name):
+        return name in ["TH2", "TH2D", "TArrayD"]
+
+    def GetArray(self):
+        return self.contents
+
+    def GetSumw2N(self):
+        return len(self.sumw2.values)
+
+    def GetSumw2(self):
+        return self.sumw2
+
+@pytest.mark.parametrize("return_bin_edges", [False, True], ids = ["Bin centers", "Bin edges"])
+@pytest.mark.parametrize("mesh", [False, True], ids = ["No mesh", "Mesh"])
+def test_get_array_from_hist2D_bulk(logging_mixin, return_bin_edges, mesh):
+    """ Test reading the contents and errors of a 2D hist from the buffers. """
+    x_axis = FakeAxis(4, 0, 4)
+    # Variable binning.
+    y_axis = FakeAxis(3, -1.5, 1.5, bin_edges = np.array([-1.5, -1.0, 0.5, 1.5]))
+    # Include the under- and overflow.
+    contents = np.arange(6 * 5, dtype = np.float64).reshape(6, 5)
+    errors_squared = contents * 4
+    hist = FakeTH2D(x_axis = x_axis, y_axis = y_axis, contents = contents, errors_squared = errors_squared)
+
+    x, y, hist_array, errors = histogram.get_array_from_hist2D(
+        hist, set_zero_to_NaN = False, return_bin_edges = return_bin_edges, return_errors = True, mesh = mesh,
+    )
+
+    np.testing.assert_allclose(hist_array, contents[1:-1, 1:-1])
+    np.testing.assert_allclose(errors, np.sqrt(errors_squared[1:-1, 1:-1]))
+    expected_x = x_axis.bin_edges if return_bin_edges else [0.5, 1.5, 2.5, 3.5]
+    expected_y = y_axis.bin_edges if return_bin_edges else [-1.25, -0.25, 1.0]
+    if mesh:
+        expected_x, expected_y = np.meshgrid(expected_x, expected_y)
+    np.testing.assert_allclose(x, expected_x)
+    np.testing.assert_allclose(y, expected_y)
+
+def _create_root_hist(hist_type: str, sumw2: bool) -> Hist:
+    """ Create and randomly fill a ROOT hist of the given type (such as "TH1F"). """
+    import ROOT
+
+    dimension = int(hist_type[2])
+    # Include variable binning on the x axis.
+    bin_edges = [np.array([0.0, 0.1, 0.3, 0.35, 0.7, 1.0])] + [np.linspace(0, 1, 4)] * (dimension - 1)
+    args: list = []
+    for edges in bin_edges:
+        args.extend([len(edges) - 1, edges])
+    hist = getattr(ROOT, hist_type)(f"{hist_type}_{sumw2}", f"{hist_type}_{sumw2}", *args)
+    hist.SetDirectory(0)
+    if sumw2:
+        hist.Sumw2()
+    rng = np.random.default_rng(1234)
+    # Fill outside of the axis ranges, so that the under- and overflow are also filled.
+    for values in rng.uniform(-0.2, 1.2, size = (200, dimension)):
+        hist.Fill(*values, *([rng.uniform(0.5, 2)] if sumw2 else []))
+    return hist
+
+@pytest.mark.ROOT
+@pytest.mark.parametrize("sumw2", [False, True], ids = ["No sumw2", "Sumw2"])
+@pytest.mark.parametrize("hist_type", ["TH1F", "TH2D", "TH3D"])
+def test_hist_buffers_with_root(logging_mixin, hist_type, sumw2):
+    """ Test reading and writing the buffers of ROOT hists against the bin-by-bin values. """
+    hist = _create_root_hist(hist_type = hist_type, sumw2 = sumw2)
+    n_cells = hist.GetNcells()
+    expected_contents = np.array([hist.GetBinContent(i) for i in range(n_cells)])
+    expected_errors = np.array([hist.GetBinError(i) for i in range(n_cells)])
+
+    contents, errors_squared = histogram._get_hist_buffers(hist)
+
+    # The shape follows the numpy convention, with the x axis varying the fastest.
+    expected_shape = tuple(
+        axis.GetNbins() + 2 for axis in reversed([hist.GetXaxis(), hist.GetYaxis(), hist.GetZaxis()][:hist.GetDimension()])
+    )
+    assert contents.shape == expected_shape
+    assert contents.dtype == np.float64
+    np.testing.assert_allclose(contents.ravel(), expected_contents)
+    np.testing.assert_allclose(np.sqrt(errors_squared.ravel()), expected_errors)
+
+    # Write the values back in bulk into a new hist and compare bin-by-bin.
+    output = hist.Clone(f"{hist.GetName()}_output")
+    output.Reset()
+    histogram._set_hist_buffers(output, contents = contents * 2, errors_squared = errors_squared * 4)
+    np.testing.assert_allclose([output.GetBinContent(i) for i in range(n_cells)], expected_contents * 2, rtol = 1e-6)
+    np.testing.assert_allclose([output.GetBinError(i) for i in range(n_cells)], expected_errors * 2, rtol = 1e-6)
+
+@pytest.mark.ROOT
+@pytest.mark.parametrize("bin_edges", [
+    None,
+    np.array([-0.3, 0.1, 0.17, 0.5, 2.3]),
+], ids = ["Fixed binning", "Variable binning"])
+def test_get_bin_edges_from_axis_with_root(logging_mixin, bin_edges):
+    """ Test that the bin edges are identical to those determined by ROOT. """
+    import ROOT
+
+    if bin_edges is None:
+        # Values which aren't exactly representable, so that any difference in the calculation would show up.
+        hist = ROOT.TH1D("fixed_binning", "fixed_binning", 37, -0.3, 2.3)
+    else:
+        hist = ROOT.TH1D("variable_binning", "variable_binning", len(bin_edges) - 1, bin_edges)
+    hist.SetDirectory(0)
+    axis = hist.GetXaxis()
+
+    result = histogram.get_bin_edges_from_axis(axis)
+
+    np.testing.assert_array_equal(result, [axis.GetBinLowEdge(i) for i in range(1, axis.GetNbins() + 2)])
+
+@pytest.mark.ROOT
+def test_convert_histograms_with_root(logging_mixin):
+    """ Test the bulk conversion of ROOT hists against the bin-by-bin values. """
+    hists = {
+        "TH1F": _create_root_hist(hist_type = "TH1F", sumw2 = False),
+        "nested": {"TH1D": _create_root_hist(hist_type = "TH1D", sumw2 = True)},
+        "TH2D": _create_root_hist(hist_type = "TH2D", sumw2 = True),
+    }
+
+    output = histogram.convert_histograms(hists)
+
+    for converted, hist in [(output["TH1F"], hists["TH1F"]), (output["nested"]["TH1D"], hists["nested"]["TH1D"])]:
+        n_bins = hist.GetXaxis().GetNbins()
+        np.testing.assert_array_equal(
+            converted.bin_edges, [hist.GetXaxis().GetBinLowEdge(i) for i in range(1, n_bins + 2)]
+        )
+        np.testing.assert_allclose(converted.y, [hist.GetBinContent(i) for i in range(1, n_bins + 1)])
+        np.testing.assert_allclose(
+            converted.errors_squared, np.array([hist.GetBinError(i) for i in range(1, n_bins + 1)]) ** 2
+        )
+        # Round trip back to ROOT.
+        root_hist = converted.to_root(name = f"{hist.GetName()}_round_trip")
+        np.testing.assert_allclose(
+            [root_hist.GetBinContent(i) for i in range(n_bins + 2)],
+            [0] + [hist.GetBinContent(i) for i in range(1, n_bins + 1)] + [0],
+        )
+        np.testing.assert_allclose(
+            [root_hist.GetBinError(i) for i in range(1, n_bins + 1)],
+            [hist.GetBinError(i) for i in range(1, n_bins + 1)],
+        )
+    # Higher dimensional hists are stored unchanged.
+    assert output["TH2D"] is hists["TH2D"]
+
 @dataclass
 class HistInfo:
     """ Convenience for storing hist testing information.
@@ -834,6 +1425,19 @@ class TestIntegrateHistogram1D:
         assert np.isclose(res, expected_result)
         assert np.isclose(res_error, expected_error)
 
+def test_integral_with_large_dynamic_range(logging_mixin):
+    """ Test that integrals are precise when one bin is much larger than the others. """
+    h = histogram.Histogram1D(
+        bin_edges = np.array([0, 1, 2, 4]), y = np.array([1e16, 1, 1]), errors_squared = np.array([1e16, 1, 1])
+    )
+
+    value, error = h.counts_in_interval(min_bin = 1, max_bin = 2)
+    assert value == 2
+    assert np.isclose(error, np.sqrt(2))
+    value, error = h.integral(min_bin = 1, max_bin = 2)
+    assert value == 3
+    assert np.isclose(error, np.sqrt(5))
+
 class TestHistogramIntegralValidation:
     """ Tests histogram integral validation. These tests don't require ROOT, so they are separate. """
     def test_integral_validation_for_min_values(self, setup_basic_hist):
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+
+""" Tests for the instrumentation.
+
+.. codeauthor:: Raymond Ehlers <raymond.ehlers@cern.ch>, Yale University
+"""
+
+import logging
+import threading
+from typing import Any, List, Tuple
+
+from pachyderm import instrumentation
+
+logger = logging.getLogger(__name__)
+
+def test_disabled_instrumentation(logging_mixin):
+    """ Test that nothing is recorded when instrumentation isn't enabled. """
+    local = instrumentation.Statistics()
+    assert instrumentation.current() is None
+
+    with instrumentation.timer("test", local):
+        pass
+    instrumentation.increment("counter", local = local)
+
+    assert local.as_dict() == {"timers": {}, "counters": {}}
+
+def test_enabled_instrumentation(logging_mixin):
+    """ Test recording timers and counters into the aggregate and local statistics, as well as the sinks. """
+    local = instrumentation.Statistics()
+    recorded: List[Tuple[str, str, float]] = []
+
+    with instrumentation.enable(sinks = [lambda *args: recorded.append(args)]) as inst:
+        assert instrumentation.current() is inst
+        for _ in range(3):
+            with instrumentation.timer("test", local):
+                pass
+        instrumentation.increment("counter", 2, local = local)
+        instrumentation.increment("counter")
+    assert instrumentation.current() is None
+
+    assert inst.statistics.calls == {"test": 3}
+    assert inst.statistics.counters == {"counter": 3}
+    assert local.calls == {"test": 3}
+    assert local.counters == {"counter": 2}
+    assert [(kind, name) for kind, name, _ in recorded] == [("timer", "test")] * 3 + [("counter", "counter")] * 2
+    assert "test" in inst.statistics.report()
+
+    # Merge the statistics
+    merged = instrumentation.Statistics()
+    merged.merge(local)
+    merged.merge(local)
+    assert merged.calls == {"test": 6}
+    assert merged.counters == {"counter": 4}
+    assert merged.times["test"] == 2 * local.times["test"]
+
+def test_instrumentation_is_context_local(logging_mixin):
+    """ Test that instrumentation enabled in one thread doesn't affect another. """
+    results: List[Any] = []
+
+    def run() -> None:
+        results.append(instrumentation.current())
+        instrumentation.increment("counter")
+
+    with instrumentation.enable() as inst:
+        thread = threading.Thread(target = run)
+        thread.start()
+        thread.join()
+
+    assert results == [None]
+    assert inst.statistics.counters == {}
@@ -9,9 +9,13 @@ import copy
 import enum
 import dataclasses
 import logging
+import numpy as np
+import os
 import pytest
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
+from pachyderm import histogram
+from pachyderm import instrumentation
 from pachyderm import projectors
 from pachyderm import utils
 
@@ -395,6 +399,404 @@ def check_and_get_projection(single_observable: bool,
 
     return proj
 
+class FakeAxis:
+    """ Minimal stand in for a ``TAxis`` so that we can test the argument handling without ROOT. """
+    def __init__(self, n_bins: int, edges: Optional[np.ndarray] = None):
+        self.n_bins = n_bins
+        self.range = (1, n_bins)
+        self.edges = edges
+
+    def GetNbins(self) -> int:
+        return self.n_bins
+
+    def GetXmin(self) -> float:
+        return 0.0
+
+    def GetXmax(self) -> float:
+        return float(self.n_bins)
+
+    def IsVariableBinSize(self) -> bool:
+        return self.edges is not None
+
+    def GetXbins(self) -> "FakeArray":
+        bins = FakeArray()
+        if self.edges is not None:
+            bins.Set(len(self.edges), self.edges)
+        return bins
+
+    def SetRange(self, min_val: int, max_val: int) -> None:
+        self.range = (min_val, max_val)
+
+class FakeAxisProxy:
+    """ Stand in for the short lived proxy objects which PyROOT returns when retrieving an axis. """
+    def __init__(self, axis: FakeAxis):
+        self._axis = axis
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._axis, name)
+
+class FakeHist:
+    """ Minimal stand in for a ``TH2`` so that we can test the argument handling without ROOT. """
+    def __init__(self, name: str):
+        self.name = name
+        self.axes = [FakeAxis(10), FakeAxis(10), FakeAxis(1)]
+        self.contents: Optional[np.ndarray] = None
+        self.sumw2 = FakeArray()
+        self.entries = 0.0
+
+    def GetName(self) -> str:
+        return self.name
+
+    def SetName(self, name: str) -> None:
+        self.name = name
+
+    def GetXaxis(self) -> FakeAxis:
+        return self.axes[0]
+
+    def GetYaxis(self) -> FakeAxis:
+        return self.axes[1]
+
+    def GetZaxis(self) -> FakeAxis:
+        return self.axes[2]
+
+    def ProjectionX(self) -> "FakeHist":
+        return FakeHist(f"{self.name}_px")
+
+    def ProjectionY(self) -> "FakeHist":
+        return FakeHist(f"{self.name}_py")
+
+    def Add(self, other: "FakeHist") -> None:
+        pass
+
+    def SetDirectory(self, directory: Any) -> None:
+        pass
+
+    def Clone(self, name: str) -> "FakeHist":
+        cloned = copy.deepcopy(self)
+        cloned.name = name
+        return cloned
+
+    def GetDimension(self) -> int:
+        return 2
+
+    def GetNcells(self) -> int:
+        return (self.axes[0].GetNbins() + 2) * (self.axes[1].GetNbins() + 2)
+
+    def InheritsFrom(self, name: str) -> bool:
+        return name == "TArrayD"
+
+    def GetArray(self) -> np.ndarray:
+        return self.contents if self.contents is not None else np.zeros(self.GetNcells())
+
+    def SetBinContent(self, bin: int, value: float) -> None:
+        # As in ROOT, setting the content increments the number of entries.
+        self.contents = np.array(self.GetArray())
+        self.contents[bin] = value
+        self.entries += 1
+
+    def GetEntries(self) -> float:
+        return self.entries
+
+    def GetSumOfWeights(self) -> float:
+        return float(np.sum(self.GetArray()))
+
+    def GetSumw2N(self) -> int:
+        return len(self.sumw2.values)
+
+    def GetSumw2(self) -> "FakeArray":
+        return self.sumw2
+
+class FakeArray:
+    """ Minimal stand in for a ``TArrayD``. """
+    def __init__(self) -> None:
+        self.values = np.zeros(0)
+
+    def GetArray(self) -> np.ndarray:
+        return self.values
+
+    def Set(self, n: int, values: np.ndarray) -> None:
+        self.values = np.array(values[:n])
+
+class RecordingProjector(projectors.HistProjector):
+    """ Projector which records the arguments that are passed to the overridable functions. """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.recorded: Dict[str, List[Dict[str, Any]]] = {"get_hist": [], "projection_name": [], "output_hist": []}
+
+    def get_hist(self, observable: Any, **kwargs: Any) -> Any:
+        self.recorded["get_hist"].append(dict(observable = observable, **kwargs))
+        return observable
+
+    def projection_name(self, **kwargs: Any) -> str:
+        self.recorded["projection_name"].append(kwargs)
+        return super().projection_name(**kwargs)
+
+    def output_hist(self, output_hist: Any, input_observable: Any, **kwargs: Any) -> Any:
+        self.recorded["output_hist"].append(dict(output_hist = output_hist, input_observable = input_observable, **kwargs))
+        return output_hist
+
+def test_projector_argument_layering(logging_mixin):
+    """ Test the precedence of the arguments passed to the overridable functions, and that they aren't copied. """
+    analysis_object = {"large": list(range(1000))}
+    hists = {"first": FakeHist("first"), "second": FakeHist("second")}
+    output_observable: Dict[str, Any] = {}
+    obj = RecordingProjector(
+        observable_to_project_from = hists,
+        output_observable = output_observable,
+        projection_name_format = "{input_key}_{label}_{source}",
+        projection_information = {"label": "info", "source": "info", "info_only": analysis_object, "input_key": "info"},
+    )
+    obj.projection_axes.append(projectors.HistAxisRange(
+        axis_type = projectors.TH1AxisType.x_axis, axis_range_name = "x",
+        min_val = projectors.HistAxisRange.apply_func_to_find_bin(None, 2),
+        max_val = projectors.HistAxisRange.apply_func_to_find_bin(None, 5),
+    ))
+
+    obj.project(source = "kwargs", analysis = analysis_object)
+
+    assert list(output_observable) == ["first_info_kwargs", "second_info_kwargs"]
+    for key, get_hist_args, name_args, output_args in zip(
+        hists, obj.recorded["get_hist"], obj.recorded["projection_name"], obj.recorded["output_hist"]
+    ):
+        # The objects should be passed by reference rather than copied.
+        assert get_hist_args["observable"] is hists[key]
+        assert get_hist_args["analysis"] is analysis_object
+        assert name_args["analysis"] is analysis_object
+        assert name_args["info_only"] is analysis_object
+        # Reserved keys take precedence, followed by the kwargs, and then the projection information.
+        assert name_args["input_key"] == key
+        assert name_args["source"] == "kwargs"
+        assert name_args["label"] == "info"
+        # Output args from one observable shouldn't leak into the next.
+        assert "output_hist" not in name_args and "projection_name" not in name_args
+        assert output_args["projection_name"] == f"{key}_info_kwargs"
+    # The projection axis should be reset after the projection.
+    assert hists["first"].GetXaxis().range == (1, 10)
+
+class ProxyHist(FakeHist):
+    """ Fake hist which returns a new axis object on every call, as for PyROOT. """
+    def GetYaxis(self) -> Any:
+        return FakeAxisProxy(self.axes[1])
+
+def test_hist_axis_range_bin_range_caching(logging_mixin):
+    """ Test that the resolved bin range is cached based on the binning of the axis. """
+    calls: List[Any] = []
+
+    def find_bin(axis: FakeAxis, value: float) -> int:
+        calls.append(axis)
+        return int(value)
+
+    hist_axis_range = projectors.HistAxisRange(
+        axis_type = projectors.TH1AxisType.y_axis, axis_range_name = "y",
+        min_val = projectors.HistAxisRange.apply_func_to_find_bin(find_bin, 2),
+        max_val = projectors.HistAxisRange.apply_func_to_find_bin(None, 5),
+    )
+    # The caches shouldn't be visible in the comparison.
+    expected = copy.copy(hist_axis_range)
+
+    # A new axis object is returned each time, and the hists have the same binning.
+    first, second = ProxyHist("first"), ProxyHist("second")
+    hist_axis_range.apply_range_set(first)
+    hist_axis_range.apply_range_set(second)
+    hist_axis_range.apply_range_set(first)
+    assert first.axes[1].range == (2, 5)
+    assert second.axes[1].range == (2, 5)
+    # Only evaluated once for the same binning.
+    assert len(calls) == 1
+    assert hist_axis_range == expected
+    # The caches aren't copied.
+    assert copy.deepcopy(hist_axis_range) == expected
+
+    # Changing the binning requires resolving the range again.
+    first.axes[1].n_bins = 20
+    hist_axis_range.apply_range_set(first)
+    assert len(calls) == 2
+    # Including for variable binning with the same number of bins, but different edges.
+    second.axes[1] = FakeAxis(3, edges = np.array([0.0, 1.0, 2.0, 4.0]))
+    hist_axis_range.apply_range_set(second)
+    assert len(calls) == 3
+    second.axes[1] = FakeAxis(3, edges = np.array([0.0, 1.0, 3.0, 4.0]))
+    hist_axis_range.apply_range_set(second)
+    assert len(calls) == 4
+    second.axes[1] = FakeAxis(3, edges = np.array([0.0, 1.0, 3.0, 4.0]))
+    hist_axis_range.apply_range_set(second)
+    assert len(calls) == 4
+
+    # As does changing the range.
+    hist_axis_range.min_val = projectors.HistAxisRange.apply_func_to_find_bin(find_bin, 3)
+    hist_axis_range.apply_range_set(first)
+    assert first.axes[1].range == (3, 5)
+    assert len(calls) == 5
+
+class CountingHist(FakeHist):
+    """ Fake hist which counts the number of projections. """
+    n_projections = 0
+
+    def ProjectionX(self) -> FakeHist:
+        CountingHist.n_projections += 1
+        return super().ProjectionX()
+
+def test_projection_cache(logging_mixin):
+    """ Test retrieving projections from a cache which is shared between projectors. """
+    CountingHist.n_projections = 0
+    cache = projectors.ProjectionCache(max_size = 2)
+    hist = CountingHist("hist")
+
+    def create_projector(max_bin: int) -> projectors.HistProjector:
+        output_observable: Dict[str, Any] = {}
+        obj = projectors.HistProjector(
+            observable_to_project_from = {"hist": hist},
+            output_observable = output_observable,
+            projection_name_format = "{input_key}_proj",
+            projection_cache = cache,
+        )
+        obj.additional_axis_cuts.append(projectors.HistAxisRange(
+            axis_type = projectors.TH1AxisType.y_axis, axis_range_name = "y",
+            min_val = projectors.HistAxisRange.apply_func_to_find_bin(None, 1),
+            max_val = projectors.HistAxisRange.apply_func_to_find_bin(None, max_bin),
+        ))
+        obj.projection_axes.append(projectors.HistAxisRange(
+            axis_type = projectors.TH1AxisType.x_axis, axis_range_name = "x",
+            min_val = projectors.HistAxisRange.apply_func_to_find_bin(None, 1),
+            max_val = projectors.HistAxisRange.apply_func_to_find_bin(None, 5),
+        ))
+        return obj
+
+    # The first projection is performed, while the second (with identical cuts) is retrieved from the cache.
+    first = create_projector(max_bin = 3).project()
+    second = create_projector(max_bin = 3).project()
+    assert CountingHist.n_projections == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    # We should receive a copy.
+    assert second["hist_proj"] is not first["hist_proj"]
+    assert second["hist_proj"].GetName() == "hist_proj"
+
+    # Different cuts require a new projection.
+    create_projector(max_bin = 4).project()
+    assert CountingHist.n_projections == 2
+    # As does a changed hist.
+    hist.axes[1] = FakeAxis(20)
+    create_projector(max_bin = 3).project()
+    assert CountingHist.n_projections == 3
+    # The least recently used projection should have been evicted.
+    assert len(cache) == 2
+    hist.axes[1] = FakeAxis(10)
+    create_projector(max_bin = 3).project()
+    assert CountingHist.n_projections == 4
+    # Changing the contents requires a new projection, even if the sum of weights is unchanged.
+    hist.SetBinContent(15, 1)
+    create_projector(max_bin = 3).project()
+    hist.SetBinContent(15, 0)
+    hist.SetBinContent(16, 1)
+    create_projector(max_bin = 3).project()
+    assert CountingHist.n_projections == 6
+    create_projector(max_bin = 3).project()
+    assert CountingHist.n_projections == 6
+
+def test_projection_cache_content_hash(logging_mixin, mocker):
+    """ Test that the hash of the contents of the input hist is only determined when the hist changes. """
+    cache = projectors.ProjectionCache()
+    hist = FakeHist("hist")
+    content_digest = mocker.spy(projectors, "_hist_content_digest")
+
+    key = cache.hist_key(hist)
+    assert cache.hist_key(hist) == key
+    assert content_digest.call_count == 1
+    # The key is the same as the uncached key.
+    assert projectors.default_hist_key(hist) == key
+    # Filling the hist changes the number of entries, so the hash must be redetermined.
+    hist.SetBinContent(15, 1)
+    assert cache.hist_key(hist) != key
+    assert cache.hist_key(hist) == projectors.default_hist_key(hist)
+    assert content_digest.call_count == 4
+    # A different hist object requires its own hash, even if the contents are the same.
+    other = copy.deepcopy(hist)
+    assert cache.hist_key(other) == cache.hist_key(hist)
+    assert content_digest.call_count == 5
+    cache.clear()
+    cache.hist_key(hist)
+    assert content_digest.call_count == 6
+
+def test_projection_cache_filename(logging_mixin, tmp_path):
+    """ Test that the filename of the stored projections is determined from explicit fields of the key. """
+    cache = projectors.ProjectionCache(directory = str(tmp_path))
+    key = ("TH2D", "hist", ((10, 0.0, 1.0),), "abc", ((1, 3),))
+    filename = cache._filename(key)
+    assert filename == os.path.join(str(tmp_path), "8011447a3f4fd7572744265f31628eca2325d4f9.root")
+    # Equal keys (which may have different representations) are stored in the same file.
+    assert cache._filename(("TH2D", "hist", ((np.int64(10), np.float64(0), 1.0),), "abc", ((1, 3),))) == filename
+    # But the type of the values is taken into account.
+    assert cache._filename(("TH2D", "hist", ((10, 0.0, 1.0),), b"abc", ((1, 3),))) != filename
+    with pytest.raises(TypeError, match = "Cannot store"):
+        cache._filename(("TH2D", object()))
+
+def test_projector_instrumentation(logging_mixin):
+    """ Test that the projection phases are recorded when instrumentation is enabled. """
+    hists = {"first": FakeHist("first"), "second": FakeHist("second")}
+    obj = projectors.HistProjector(
+        observable_to_project_from = hists,
+        output_observable = {},
+        projection_name_format = "{input_key}_proj",
+    )
+    obj.projection_axes.append(projectors.HistAxisRange(
+        axis_type = projectors.TH1AxisType.x_axis, axis_range_name = "x",
+        min_val = projectors.HistAxisRange.apply_func_to_find_bin(None, 2),
+        max_val = projectors.HistAxisRange.apply_func_to_find_bin(None, 5),
+    ))
+
+    # Nothing is recorded by default.
+    obj.project()
+    assert obj.statistics.calls == {}
+
+    with instrumentation.enable() as inst:
+        obj.project()
+
+    expected_phases = ["get_hist", "projection_name", "apply_cuts", "projection", "cleanup_cuts", "output_hist", "project_observable"]
+    assert obj.statistics.calls == {phase: 2 for phase in expected_phases}
+    assert obj.statistics.counters == {"projections": 2}
+    assert inst.statistics.calls == obj.statistics.calls
+
+class RangeRecordingHist(FakeHist):
+    """ Fake hist which records the y axis range used for each projection. """
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.projection_ranges: List[Any] = []
+
+    def ProjectionX(self) -> FakeHist:
+        self.projection_ranges.append(self.GetYaxis().range)
+        return super().ProjectionX()
+
+@pytest.mark.parametrize("bin_ranges, expected_projection_ranges", [
+    ([(4, 6), (1, 3)], [(1, 6)]),
+    ([(1, 3), (5, 6)], [(1, 3), (5, 6)]),
+    ([(1, 4), (4, 6)], [(1, 4), (4, 6)]),
+], ids = ["Adjacent ranges", "Disjoint ranges", "Overlapping ranges"])
+def test_merge_projection_dependent_cut_axes(logging_mixin, bin_ranges, expected_projection_ranges):
+    """ Test that adjacent projection dependent cut ranges are projected in a single pass. """
+    hist = RangeRecordingHist("hist")
+    obj = projectors.HistProjector(
+        observable_to_project_from = {"hist": hist},
+        output_observable = {},
+        projection_name_format = "{input_key}_proj",
+    )
+    for min_bin, max_bin in bin_ranges:
+        obj.projection_dependent_cut_axes.append([projectors.HistAxisRange(
+            axis_type = projectors.TH1AxisType.y_axis, axis_range_name = f"y_{min_bin}_{max_bin}",
+            min_val = projectors.HistAxisRange.apply_func_to_find_bin(None, min_bin),
+            max_val = projectors.HistAxisRange.apply_func_to_find_bin(None, max_bin),
+        )])
+    obj.projection_axes.append(projectors.HistAxisRange(
+        axis_type = projectors.TH1AxisType.x_axis, axis_range_name = "x",
+        min_val = projectors.HistAxisRange.apply_func_to_find_bin(None, 1),
+        max_val = projectors.HistAxisRange.apply_func_to_find_bin(None, 5),
+    ))
+
+    obj.project()
+
+    assert hist.projection_ranges == expected_projection_ranges
+    # The range should be reset after the projection.
+    assert hist.GetYaxis().range == (1, 10)
+
 @pytest.mark.ROOT
 class TestProjectorsWithRoot():
     """ Tests for projectors for TH1 derived histograms. """
@@ -552,6 +954,32 @@ class TestProjectorsWithRoot():
             assert non_zero_bin_location == 1
             assert proj.GetBinContent(non_zero_bin_location) == 1
 
+    def test_TH2_projection_with_cache(self, logging_mixin, test_root_hists, tmp_path):
+        """ Test retrieving a TH2 projection from the projection cache, including from disk. """
+        import ROOT  # noqa: F401
+
+        results = []
+        for _ in range(2):
+            # Use a new cache each time so that the second projection must be retrieved from disk.
+            cache = projectors.ProjectionCache(directory = str(tmp_path))
+            output_observable: Dict[str, Any] = {}
+            obj = projectors.HistProjector(
+                observable_to_project_from = {"hist2D": test_root_hists.hist2D},
+                output_observable = output_observable,
+                projection_name_format = "hist",
+                projection_cache = cache,
+            )
+            obj.additional_axis_cuts.append(setup_hist_axis_range(hist_axis_ranges.y_axis))
+            obj.projection_axes.append(setup_hist_axis_range(hist_axis_ranges.x_axis))
+            obj.project()
+            results.append((output_observable["hist"], cache.hits))
+
+        (first, first_hits), (second, second_hits) = results
+        assert (first_hits, second_hits) == (0, 1)
+        assert second.GetName() == "hist"
+        assert [first.GetBinContent(i) for i in range(first.GetNcells())] == \
+            [second.GetBinContent(i) for i in range(second.GetNcells())]
+
     @pytest.mark.parametrize("single_observable", [
         False,
         True,
@@ -866,11 +1294,14 @@ class TestsForTHnSparseProjection():
         (sparse_hist_axis_ranges.z_axis, 1),
         (sparse_hist_axis_ranges_with_no_entries.z_axis, 0)
     ], ids = ["PA with entries", "PA without entries"])
+    @pytest.mark.parametrize("use_sparse_histogram", [
+        False, True
+    ], ids = ["THnSparse", "SparseHistogram"])
     def test_THn_projection(logging_mixin, test_sparse, single_observable,
                             additional_axis_cuts, expected_additional_axis_cuts_counts,
                             projection_dependent_cut_axes, expected_projection_dependent_cut_axes_counts,
-                            projection_axes, expected_projection_axes_counts):
-        """ Test projection of a THnSparse into a TH1. """
+                            projection_axes, expected_projection_axes_counts, use_sparse_histogram):
+        """ Test projection of a THnSparse (or the extracted sparse hist) into a TH1. """
         import ROOT  # noqa: F401
 
         # Setup hist ranges
@@ -881,6 +1312,8 @@ class TestsForTHnSparseProjection():
         projection_axes = setup_hist_axis_range(projection_axes)
         # Setup objects
         sparse, _ = test_sparse
+        if use_sparse_histogram:
+            sparse = histogram.SparseHistogram.from_existing_hist(sparse)
         # Setup projector
         kwdargs, observable, output_observable = determine_projector_input_args(
             single_observable = single_observable,
@@ -5,10 +5,11 @@
 .. codeauthor:: Raymond Ehlers <raymond.ehlers@cern.ch>, Yale University
 """
 
+import concurrent.futures
 from dataclasses import dataclass
 import enum
 import numpy as np
-import pytest  # noqa: F401
+import pytest
 import tempfile
 
 from pachyderm import yaml
@@ -76,3 +77,72 @@ def test_module_registration(logging_mixin, mocker):
     result = dump_and_load_yaml(yml = yml, input_value = [input_value])
 
     assert result == [input_value]
+
+@dataclass
+class FastTestClass:
+    """ Class for testing registration with the fast YAML object. """
+    a: int
+    b: str
+
+class FastTestEnum(enum.Enum):
+    """ Enum for testing registration with the fast YAML object. """
+    a = 1
+    b = 2
+
+    def __str__(self):
+        return str(self.name)
+
+    to_yaml = classmethod(yaml.enum_to_yaml)
+    from_yaml = classmethod(yaml.enum_from_yaml)
+
+def test_fast_yaml(logging_mixin):
+    """ Test the fast YAML object with registered classes, enums, and numpy arrays. """
+    yml = yaml.yaml(classes_to_register = [FastTestClass, FastTestEnum], fast = True)
+    input_value = {
+        "obj": FastTestClass(a = 1, b = "hello"),
+        "enum": FastTestEnum.b,
+        "array": np.array([1.5, 2.5, 3.5]),
+        "nested": {"list": [1, 2, 3]},
+    }
+
+    # Perform a round-trip of dumping and loading
+    result = dump_and_load_yaml(yml = yml, input_value = input_value)
+
+    # The fast object loads standard types.
+    assert type(result) is dict
+    assert type(result["nested"]["list"]) is list
+    assert result["obj"] == input_value["obj"]
+    assert result["enum"] == input_value["enum"]
+    assert np.allclose(result["array"], input_value["array"])
+
+    # The registration shouldn't impact other safe YAML objects.
+    other = yaml.ruamel.yaml.YAML(typ = "safe")
+    with pytest.raises(yaml.ruamel.yaml.constructor.ConstructorError):
+        other.load("value: !numpy_array [1, 2]")
+
+def test_cached_yaml(logging_mixin, mocker):
+    """ Test that the cached YAML object is only created (and the classes registered) once. """
+    # Mock inspect so we don't have to actually depend on another module.
+    m_inspect_getmembers = mocker.MagicMock(return_value = [(None, FastTestClass)])
+    mocker.patch("pachyderm.yaml.inspect.getmembers", m_inspect_getmembers)
+    yaml._cached_yaml.cache_clear()
+
+    yml = yaml.cached_yaml(modules_to_register = ["Fake module"], classes_to_register = [FastTestEnum])
+    # The same arguments (even if passed in a different container) return the same object.
+    assert yaml.cached_yaml(modules_to_register = ("Fake module",), classes_to_register = (FastTestEnum,)) is yml
+    m_inspect_getmembers.assert_called_once()
+    # Different arguments return a different object.
+    assert yaml.cached_yaml(modules_to_register = ["Fake module"], classes_to_register = [FastTestEnum], fast = True) is not yml
+    assert yaml.cached_yaml() is not yml
+    # Each thread receives its own object because the YAML object isn't thread safe.
+    with concurrent.futures.ThreadPoolExecutor(max_workers = 1) as executor:
+        other_thread_yml = executor.submit(
+            yaml.cached_yaml, modules_to_register = ["Fake module"], classes_to_register = [FastTestEnum]
+        ).result()
+    assert other_thread_yml is not yml
+    assert yaml.cached_yaml(modules_to_register = ["Fake module"], classes_to_register = [FastTestEnum]) is yml
+
+    # Check that the cached object works as expected.
+    input_value = [FastTestClass(a = 1, b = "hello"), FastTestEnum.a]
+    assert dump_and_load_yaml(yml = yml, input_value = input_value) == input_value
+    yaml._cached_yaml.cache_clear()